@@ -0,0 +1,70 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from mf6rtm.mup3d import cache
+
+SCRIPT_1 = hashlib.sha256(b"SOLUTION 1\nEND\n").hexdigest()
+SCRIPT_2 = hashlib.sha256(b"SOLUTION 2\nEND\n").hexdigest()
+
+
+@pytest.fixture
+def database(tmp_path):
+    fname = tmp_path / "test.dat"
+    fname.write_text("SOLUTION_MASTER_SPECIES\nCa Ca+2 0 Ca 40.08\n")
+    return fname
+
+
+class TestInitCache:
+    """Test suite for the initial equilibration cache."""
+
+    def test_key_depends_on_inputs(self, database):
+        """Test that the key changes with the script, ic and settings only."""
+        ic = np.array([[1, -1, -1, -1, -1, -1, -1]])
+        key = cache.chemistry_key(SCRIPT_1, database, ic, {"h2o": False})
+        assert key == cache.chemistry_key(SCRIPT_1, database, ic.copy(),
+                                          {"h2o": False})
+        assert key != cache.chemistry_key(SCRIPT_2, database, ic, {"h2o": False})
+        assert key != cache.chemistry_key(SCRIPT_1, database, ic + 1,
+                                          {"h2o": False})
+        assert key != cache.chemistry_key(SCRIPT_1, database, ic, {"h2o": True})
+        database.write_text("changed")
+        assert key != cache.chemistry_key(SCRIPT_1, database, ic, {"h2o": False})
+
+    def test_save_and_load(self, tmp_path):
+        """Test that a saved equilibration is loaded by its key only."""
+        conc = np.arange(6.0).reshape(3, 2)
+        key = "ab" * 32
+        assert cache.load(tmp_path, key) is None
+        cache.save(tmp_path / "cache", key, ["H", "O", "Ca"], conc)
+        components, loaded = cache.load(tmp_path / "cache", key)
+        assert components == ["H", "O", "Ca"]
+        np.testing.assert_array_equal(loaded, conc)
+        assert cache.load(tmp_path / "cache", key[:16] + "cd" * 24) is None
+        assert len(list((tmp_path / "cache").iterdir())) == 1
+
+
+class TestSolutionLibrary:
+    """Test suite for the boundary solution library."""
+
+    def test_add_and_get(self):
+        """Test that solutions are indexed by number in any order."""
+        library = cache.SolutionLibrary("ab" * 32)
+        assert library.missing([2, 1, 2]) == [1, 2]
+        library.add(["H", "Ca"], [2, 1], np.array([[1.0, 2.0], [3.0, 4.0]]))
+        assert library.missing([1, 3, 2]) == [3]
+        np.testing.assert_array_equal(library.get([1, 2, 1]), [[2.0, 1.0, 2.0], [4.0, 3.0, 4.0]])
+        with pytest.raises(AssertionError):
+            library.get([3])
+        with pytest.raises(AssertionError):
+            library.add(["H", "Fe"], [3], np.ones((2, 1)))
+
+    def test_persistent(self, tmp_path):
+        """Test that a cached library is loaded by its key only."""
+        library = cache.SolutionLibrary("ab" * 32, tmp_path)
+        library.add(["H", "Ca"], [5], np.array([[1.0], [2.0]]))
+        loaded = cache.SolutionLibrary("ab" * 32, tmp_path)
+        assert loaded.components == ["H", "Ca"]
+        np.testing.assert_array_equal(loaded.get([5]), [[1.0], [2.0]])
+        assert cache.SolutionLibrary("ab" * 8 + "cd" * 24, tmp_path).missing([5]) == [5]
@@ -0,0 +1,117 @@
+import pytest
+
+from mf6rtm.config import MF6RTMConfig
+
+
+class TestMF6RTMConfig:
+    """Test suite for the MF6RTMConfig class."""
+
+    def test_defaults(self):
+        """Test default reactive configuration."""
+        config = MF6RTMConfig()
+        assert config.reactive_enabled is True
+        assert config.reactive_timing == 'all'
+        assert config.reactive_compact is False
+
+    def test_from_dict_reactive_section(self):
+        """Test that the reactive section sets the reactive attributes."""
+        config = MF6RTMConfig.from_dict(
+            {'reactive': {'timing': 'user', 'tsteps': [[1, 2]], 'compact': True}}
+        )
+        assert config.reactive_timing == 'user'
+        assert config.reactive_tsteps == [[1, 2]]
+        assert config.reactive_compact is True
+        assert config.reactive['compact'] is True
+
+    def test_invalid_timing(self):
+        """Test that an unknown reaction timing raises."""
+        with pytest.raises(ValueError):
+            MF6RTMConfig(reactive_timing='sometimes')
+
+    def test_externalio_format(self, tmp_path):
+        """Test the external array format option."""
+        assert MF6RTMConfig().reactive_externalio_format == 'npy'
+        fname = tmp_path / "mf6rtm.toml"
+        MF6RTMConfig(reactive_externalio_format='txt').save_to_file(fname)
+        assert MF6RTMConfig.from_toml_file(fname).reactive_externalio_format == 'txt'
+        with pytest.raises(ValueError):
+            MF6RTMConfig(reactive_externalio_format='bin')
+
+    def test_toml_roundtrip(self, tmp_path):
+        """Test that a saved configuration is read back unchanged."""
+        fname = tmp_path / "mf6rtm.toml"
+        MF6RTMConfig(reactive_compact=True).save_to_file(fname)
+        config = MF6RTMConfig.from_toml_file(fname)
+        assert config.reactive_compact is True
+        assert config.reactive_timing == 'all'
+
+    def test_toml_reaction_timing(self, tmp_path):
+        """Test that the reaction timing saved to the toml file is read back."""
+        fname = tmp_path / "mf6rtm.toml"
+        MF6RTMConfig(reactive_timing='user', reactive_tsteps=[(1, 3)],
+                     reactive_enabled=False).save_to_file(fname)
+        config = MF6RTMConfig.from_toml_file(fname)
+        assert config.reactive_timing == 'user'
+        assert [tuple(t) for t in config.reactive_tsteps] == [(1, 3)]
+        assert config.reactive_enabled is False
+
+    def test_from_dict_adaptive_options(self):
+        """Test that adaptive timing options are read from the reactive section."""
+        config = MF6RTMConfig.from_dict(
+            {'reactive': {'timing': 'adaptive', 'adaptive_tolerance': 1e-3}}
+        )
+        assert config.reactive_timing == 'adaptive'
+        assert config.reactive_adaptive_tolerance == 1e-3
+        assert config.reactive_adaptive_max_tsteps == 10
+
+    def test_output_schedule_all(self):
+        """Test that output is due at all time steps by default."""
+        config = MF6RTMConfig()
+        assert all(config.is_output_tstep(1, k + 1, k, 0.1 * k, 0.1) for k in range(5))
+
+    def test_output_schedule_every(self):
+        """Test output every N time steps."""
+        config = MF6RTMConfig(output_schedule='every', output_every=3)
+        due = [config.is_output_tstep(1, k + 1, k, 0.1 * k, 0.1) for k in range(7)]
+        assert due == [False, False, True, False, False, True, False]
+
+    def test_output_schedule_tsteps(self):
+        """Test output at (kper, kstp) pairs read from toml lists."""
+        config = MF6RTMConfig.from_dict(
+            {'output': {'schedule': 'tsteps', 'tsteps': [[1, 2], [2, 1]]}}
+        )
+        assert config.is_output_tstep(1, 2, 1, 0.1, 0.1)
+        assert config.is_output_tstep(2, 1, 5, 0.5, 0.1)
+        assert not config.is_output_tstep(1, 1, 0, 0.0, 0.1)
+
+    def test_output_schedule_times(self):
+        """Test output at the time steps reaching the output times."""
+        config = MF6RTMConfig(output_schedule='times', output_times=[0.25, 0.3])
+        due = [config.is_output_tstep(1, k + 1, k, 0.1 * k, 0.1) for k in range(5)]
+        assert due == [False, False, True, False, False]
+
+    def test_output_schedule_invalid(self):
+        """Test that invalid output schedules raise."""
+        with pytest.raises(ValueError):
+            MF6RTMConfig(output_schedule='never')
+        with pytest.raises(ValueError):
+            MF6RTMConfig(output_schedule='every', output_every=0)
+
+    def test_observations_roundtrip(self, tmp_path):
+        """Test that observation sets are saved and read back as cell lists."""
+        fname = tmp_path / "mf6rtm.toml"
+        observations = {'wells': [[0, 0, 1], [0, 0, 5]], 'nodes': [3, 4]}
+        MF6RTMConfig(observations=observations).save_to_file(fname)
+        config = MF6RTMConfig.from_toml_file(fname)
+        assert config.observations == observations
+        assert config.emulator_observations == []
+
+    def test_flow_section(self, tmp_path):
+        """Test that the flow section is saved and read back."""
+        fname = tmp_path / "mf6rtm.toml"
+        MF6RTMConfig(flow_steady='auto').save_to_file(fname)
+        config = MF6RTMConfig.from_toml_file(fname)
+        assert config.flow_steady == 'auto'
+        assert config.flow_cache == 'flow_cache'
+        with pytest.raises(ValueError):
+            MF6RTMConfig(flow_steady='always')
@@ -0,0 +1,63 @@
+import pytest
+
+from mf6rtm.utils import database
+from mf6rtm.utils.database import DatabaseIndex, parse_blocks
+
+DATABASE = """SOLUTION_MASTER_SPECIES
+Ca    Ca+2    0.0    40.08    40.08
+Cl    Cl-     0.0    35.45    35.45
+# comment
+EXCHANGE_MASTER_SPECIES
+X    X-
+SOLUTION_SPECIES
+Ca+2 = Ca+2
+PHASES
+Calcite    CaCO3 = Ca+2 + CO3-2
+Gypsum     CaSO4:2H2O = Ca+2 + SO4-2 + 2H2O
+"""
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(database, "_indexes", {})
+    fname = tmp_path / "test.dat"
+    fname.write_text(DATABASE)
+    return fname
+
+
+class TestDatabaseIndex:
+    """Test suite for the parsed database index."""
+
+    def test_parse_blocks(self):
+        """Test that all blocks are parsed in one pass."""
+        names = parse_blocks(DATABASE.splitlines(keepends=True))
+        assert names["SOLUTION_MASTER_SPECIES"] == ["Ca", "Cl"]
+        assert names["PHASES"] == ["Calcite", "Gypsum"]
+        assert names["EXCHANGE"] == ["X", "X-"]
+        assert names["RATES"] == []
+
+    def test_load_cached(self, db_file, monkeypatch):
+        """Test that the database is parsed once while it does not change."""
+        index = DatabaseIndex.load(db_file)
+        assert index.contains("PHASES", "Calcite")
+        assert not index.contains("PHASES", "Ca")
+        assert DatabaseIndex.load(db_file) is index
+        assert len(list((db_file.parent / "cache").iterdir())) == 1
+
+        # a new process reads the index from the cache directory
+        monkeypatch.setattr(database, "_indexes", {})
+        monkeypatch.setattr(database, "parse_blocks", None)
+        assert DatabaseIndex.load(db_file).names("PHASES") == ["Calcite", "Gypsum"]
+
+    def test_load_changed(self, db_file):
+        """Test that a changed database is parsed again."""
+        DatabaseIndex.load(db_file)
+        db_file.write_text(DATABASE.replace("Gypsum", "Anhydrite"))
+        index = DatabaseIndex.load(db_file)
+        assert index.names("PHASES") == ["Calcite", "Anhydrite"]
+
+    def test_block_not_indexed(self, db_file):
+        """Test that other blocks are parsed on first use."""
+        index = DatabaseIndex.load(db_file)
+        assert index.names("SOLUTION_SPECIES", db_file)[0] == "Ca+2"
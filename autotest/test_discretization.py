@@ -0,0 +1,31 @@
+import pytest
+import numpy as np
+
+from mf6rtm.simulation.discretization import node_indices
+
+
+class TestNodeIndices:
+    """Test suite for the cell to node number conversion."""
+
+    def test_dis_cells(self):
+        """Test (layer, row, col) cells of a DIS grid."""
+        nodes = node_indices((2, 3, 4), [(0, 0, 0), (1, 2, 3), [0, 1, 2]])
+        np.testing.assert_array_equal(nodes, [0, 23, 6])
+
+    def test_disv_cells(self):
+        """Test (layer, cell2d) cells of a DISV grid."""
+        nodes = node_indices((3, 10), [(0, 9), (2, 1)])
+        np.testing.assert_array_equal(nodes, [9, 21])
+
+    def test_node_numbers(self):
+        """Test cells given as node numbers."""
+        np.testing.assert_array_equal(node_indices((2, 5), [0, 7]), [0, 7])
+
+    def test_invalid_cells(self):
+        """Test cells outside of the grid or with wrong dimensions."""
+        with pytest.raises(ValueError):
+            node_indices((2, 5), [10])
+        with pytest.raises(ValueError):
+            node_indices((2, 3, 4), [(0, 1)])
+        with pytest.raises(ValueError):
+            node_indices((2, 3, 4), [(0, 3, 0)])
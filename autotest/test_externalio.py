@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from mf6rtm.io.externalio import Regenerator
+
+
+@pytest.fixture
+def regenerator():
+    """Regenerator of a 1x2x3 grid with m0 arrays set, without MODFLOW."""
+    reg = Regenerator.__new__(Regenerator)
+    reg.zones = True
+    reg.nxyz = 6
+    reg.file_data = {}
+    calcite = np.array([1.0, 2.0, 1.0, 3.0, 2.0, 1.0]).reshape(1, 2, 3)
+    reg.config = {
+        "equilibrium_phases": {
+            "names": ["Calcite", "Gypsum"],
+            "si": {"Calcite": 0.0, "Gypsum": -0.5},
+            "m0": {"Calcite": calcite, "Gypsum": np.zeros((1, 2, 3))},
+        },
+        "exchange_phases": {
+            "names": ["X"],
+            "m0": {"X": np.arange(6.0).reshape(1, 2, 3)},
+        },
+    }
+    reg.add_m0_to_config = lambda: reg.config
+    return reg
+
+
+class TestRegeneratorZones:
+    """Test suite for the blocks of the distinct m0 values."""
+
+    def test_zones(self, regenerator):
+        """Test that cells with the same m0 values share a block."""
+        zones, first = regenerator.get_zones("equilibrium_phases")
+        np.testing.assert_array_equal(zones, [0, 1, 0, 2, 1, 0])
+        np.testing.assert_array_equal(first, [0, 1, 3])
+        blocks = regenerator.generate_equilibrium_phases_blocks()
+        assert len(blocks) == 3
+        assert blocks[2].startswith("EQUILIBRIUM_PHASES 3\n    Calcite 0.00000e+00 3.00000e+00\n")
+
+    def test_zones_per_phase(self, regenerator):
+        """Test that the zones of each phase type are independent."""
+        zones, first = regenerator.get_zones("exchange_phases")
+        np.testing.assert_array_equal(zones, np.arange(6))
+        assert len(regenerator.generate_exchange_phases_blocks()) == 6
+
+    def test_zones_off(self, regenerator):
+        """Test that one block per cell is written without zones."""
+        regenerator.zones = False
+        blocks = regenerator.generate_equilibrium_phases_blocks()
+        assert len(blocks) == 6
+        assert blocks[3].startswith("EQUILIBRIUM_PHASES 4\n    Calcite 0.00000e+00 3.00000e+00\n")
+
+
+class TestReadExternalFiles:
+    """Test suite for the external m0 arrays."""
+
+    @pytest.fixture
+    def reader(self, tmp_path):
+        """Regenerator of a DISV grid of 2 layers and 3 cells per layer."""
+        reg = Regenerator.__new__(Regenerator)
+        reg.wd = str(tmp_path)
+        reg.grid_shape = (2, 3)
+        reg.nlay = 2
+        reg.nxyz = 6
+        reg.config = {"equilibrium_phases": {"names": ["Calcite"]}}
+        return reg
+
+    def test_npy_memmap(self, reader, tmp_path):
+        """Test that .npy arrays are memory-mapped with the grid shape."""
+        m0 = np.arange(6.0)
+        np.save(tmp_path / "equilibrium_phases.Calcite.m0.npy", m0)
+        arr = reader.read_external_files()["equilibrium_phases"]["Calcite"]
+        assert isinstance(arr.base, np.memmap) or isinstance(arr, np.memmap)
+        np.testing.assert_array_equal(arr, m0.reshape(2, 3))
+
+    def test_layered_txt(self, reader, tmp_path):
+        """Test that layered txt files are read without a .npy file."""
+        for lay in range(2):
+            np.savetxt(tmp_path / f"equilibrium_phases.Calcite.m0.layer{lay+1}.txt",
+                       np.arange(3.0) + 3 * lay)
+        arr = reader.read_external_files()["equilibrium_phases"]["Calcite"]
+        np.testing.assert_array_equal(arr, np.arange(6.0).reshape(2, 3))
+
+    def test_missing_layer_file(self, reader, tmp_path):
+        """Test that a missing layer file other than the last one raises."""
+        reader.phinp = "phinp.dat"
+        (tmp_path / "phinp.dat").touch()
+        np.savetxt(tmp_path / "equilibrium_phases.Calcite.m0.layer2.txt", np.zeros(3))
+        with pytest.raises(FileNotFoundError, match="layer1"):
+            reader.validate_external_files()
+
+    def test_npy_wrong_size(self, reader, tmp_path):
+        """Test that arrays of another grid raise."""
+        np.save(tmp_path / "equilibrium_phases.Calcite.m0.npy", np.zeros(4))
+        with pytest.raises(AssertionError):
+            reader.read_external_files()
+
+    def test_other_sections_skipped(self, reader, tmp_path, capsys):
+        """Test that config sections other than phases are not read."""
+        np.save(tmp_path / "equilibrium_phases.Calcite.m0.npy", np.zeros(6))
+        reader.config.update({
+            "reactive": {"externalio": True},
+            "output": {"format": "csv"},
+            "observations": {"names": [0, 1]},
+        })
+        reader.phinp = "phinp.dat"
+        (tmp_path / "phinp.dat").touch()
+        reader.validate_external_files()
+        assert list(reader.read_external_files()) == ["equilibrium_phases"]
+        assert "Warning" not in capsys.readouterr().out
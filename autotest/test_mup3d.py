@@ -377,6 +377,38 @@ class TestMup3dSetters:
         model.set_fixed_components(fixed)
         assert model.fixed_components == fixed
 
+    def test_set_idomain(self, sample_solutions_data):
+        """Test the grid to chemistry cell mapping from idomain."""
+        solutions = Solutions(sample_solutions_data)
+        solutions.set_ic(1)
+        model = Mup3d(solutions=solutions, nlay=1, nrow=1, ncol=4)
+        assert model.get_grid_to_chem_mapping() is None
+        model.set_idomain([1, 1, 1, 1])
+        assert model.get_grid_to_chem_mapping() is None
+        model.set_idomain([1, 0, -1, 1])
+        assert model.idomain.shape == (1, 1, 4)
+        np.testing.assert_array_equal(model.get_grid_to_chem_mapping(), [0, -1, -1, 1])
+
+    def test_get_ic_to_chem_mapping(self, sample_solutions_data):
+        """Test that cells with the same initial conditions share a chemistry cell."""
+        solutions = Solutions(sample_solutions_data)
+        solutions.set_ic(1)
+        model = Mup3d(solutions=solutions, nlay=1, nrow=1, ncol=5)
+        ic1 = np.full((5, 7), -1)
+        ic1[:, 0] = [2, 1, 2, 1, 2]
+        ic1[:, 1] = [1, 1, 1, 1, 2]
+        np.testing.assert_array_equal(model.get_ic_to_chem_mapping(ic1), [1, 0, 1, 0, 2])
+        model.set_idomain([1, 0, 1, 1, 1])
+        np.testing.assert_array_equal(model.get_ic_to_chem_mapping(ic1), [1, -1, 1, 0, 2])
+
+    def test_set_idomain_invalid_size(self, sample_solutions_data):
+        """Test set_idomain with a wrong number of cells."""
+        solutions = Solutions(sample_solutions_data)
+        solutions.set_ic(1)
+        model = Mup3d(solutions=solutions, nlay=1, nrow=1, ncol=4)
+        with pytest.raises(AssertionError):
+            model.set_idomain([1, 1])
+
 
 class TestMup3dPhases:
     """Test suite for Mup3d phase-related methods."""
@@ -408,6 +440,21 @@ class TestMup3dPhases:
         
         assert model.kinetic_phases is not None
     
+    def test_write_external_files_disv(self, sample_solutions_data, temp_dir):
+        """Test that external arrays are written with the DISV grid shape."""
+        solutions = Solutions(sample_solutions_data)
+        solutions.set_ic(1)
+        model = Mup3d(solutions=solutions, nlay=2, ncpl=3)
+        model.set_wd(temp_dir)
+        eq_phases = EquilibriumPhases({0: {'Calcite': {'m0': 0.5, 'si': 0.0}},
+                                       1: {'Calcite': {'m0': 2.0, 'si': 0.0}}})
+        eq_phases.set_ic(np.array([[1, 1, 2], [2, 2, 1]]))
+        model.set_equilibrium_phases(eq_phases)
+
+        model.write_external_files()
+        arr = np.load(os.path.join(temp_dir, 'equilibrium_phases.Calcite.m0.npy'))
+        np.testing.assert_array_equal(arr, [[0.5, 0.5, 2.0], [2.0, 2.0, 0.5]])
+    
     def test_set_phases_invalid_ic_shape(self, sample_solutions_data, sample_equilibrium_data):
         """Test set_phases with invalid IC shape."""
         solutions = Solutions(sample_solutions_data)
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from mf6rtm.simulation.profiler import StepProfiler, rss_bytes
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return StepProfiler(tmp_path / "profile.jsonl")
+
+
+def read_records(fname):
+    with open(fname) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestStepProfiler:
+    """Test suite for the per time step profiler."""
+
+    def test_disabled_is_noop(self, tmp_path):
+        """Test that a disabled profiler writes nothing."""
+        fname = tmp_path / "profile.jsonl"
+        prof = StepProfiler(fname, enabled=False)
+        prof.start_step(kiter=0)
+        with prof.span("transport"):
+            pass
+        prof.count("reactive", True)
+        prof.end_step()
+        assert prof.close() == {}
+        assert not fname.exists()
+
+    def test_records_one_line_per_step(self, profiler):
+        """Test that every time step is appended as one JSON record."""
+        for kiter in range(3):
+            profiler.start_step(kiter=kiter, time=float(kiter))
+            with profiler.span("transport"):
+                pass
+            with profiler.span("transport"):
+                pass
+            profiler.count("gwt_iters", [2, 3])
+            profiler.end_step()
+        profiler.close()
+        records = read_records(profiler.fname)
+        assert [r["kiter"] for r in records] == [0, 1, 2]
+        assert records[0]["gwt_iters"] == [2, 3]
+        assert {"transport", "step", "rss_mb"} <= set(records[0])
+        assert records[0]["transport"] <= records[0]["step"]
+
+    def test_summary(self, profiler, tmp_path):
+        """Test that the summary aggregates timings only."""
+        for _ in range(2):
+            profiler.start_step(kiter=0)
+            with profiler.span("chemistry"):
+                pass
+            profiler.count("ncells_react", 10)
+            profiler.end_step()
+        summary = profiler.close()
+        assert summary["nsteps"] == 2
+        assert set(summary["timings"]) == {"chemistry", "step"}
+        assert summary["timings"]["step"]["fraction"] == pytest.approx(1.0)
+        assert 0.0 <= summary["timings"]["chemistry"]["fraction"] <= 1.0
+        with open(tmp_path / "profile.summary.json") as f:
+            assert json.load(f)["nsteps"] == 2
+
+    def test_span_outside_step(self, profiler):
+        """Test that spans outside a time step are not recorded."""
+        with profiler.span("transport"):
+            pass
+        assert profiler.totals == {}
+        profiler.close()
+
+    def test_rss_bytes(self):
+        """Test that the resident set size is a non-negative integer."""
+        assert rss_bytes() >= 0
+
+
+class TestTrace:
+    """Test suite for the Chrome trace-event timeline."""
+
+    def test_trace_only(self, tmp_path):
+        """Test that tracing works without the step records file."""
+        fname = tmp_path / "trace.json"
+        prof = StepProfiler(trace_fname=fname)
+        prof.start_step(kiter=0)
+        with prof.span("transport"):
+            with prof.trace("solve", sln=1):
+                pass
+        prof.count("ncells_react", 5)
+        prof.end_step()
+        prof.close()
+        with open(fname) as f:
+            events = json.load(f)
+        complete = {e["name"]: e for e in events if e["ph"] == "X"}
+        assert complete["solve"]["args"] == {"sln": 1}
+        assert complete["solve"]["cat"] == "detail"
+        assert complete["transport"]["cat"] == "step"
+        # the nested span is inside its parent on the timeline
+        outer, inner = complete["transport"], complete["solve"]
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1e-3
+        counters = [e for e in events if e["ph"] == "C"]
+        assert counters[0]["args"] == {"ncells_react": 5.0}
+        assert not (tmp_path / "trace.summary.json").exists()
+
+    def test_trace_outside_step(self, tmp_path):
+        """Test that spans outside a time step are traced, not recorded."""
+        fname = tmp_path / "trace.json"
+        prof = StepProfiler(trace_fname=fname)
+        with prof.span("output"):
+            pass
+        assert prof.totals == {}
+        prof.close()
+        with open(fname) as f:
+            names = [e["name"] for e in json.load(f)]
+        assert "output" in names
+
+    def test_no_trace_is_noop(self, profiler):
+        """Test that trace blocks are no-ops when not tracing."""
+        profiler.start_step(kiter=0)
+        with profiler.trace("solve"):
+            pass
+        profiler.end_step()
+        profiler.close()
+        assert "solve" not in read_records(profiler.fname)[0]
@@ -0,0 +1,356 @@
+import os
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+from mf6rtm.io.soutio import (RingBuffer, CsvSoutWriter, BinarySoutWriter,
+                              ChunkedSoutWriter, SoutStore, AsyncSoutWriter,
+                              read_binary_sout, binary_sout_to_dataframe)
+
+HEADERS = ["time", "cell", "pH", "Ca"]
+NXYZ = 6
+
+
+def make_sout(time):
+    sout = np.arange(len(HEADERS) * NXYZ, dtype=np.float64).reshape(len(HEADERS), NXYZ)
+    sout[0] = time
+    return sout
+
+
+class TestRingBuffer:
+    """Test suite for the selected output ring buffer."""
+
+    def test_last_before_full(self):
+        """Test that only appended steps are returned."""
+        ring = RingBuffer(3, len(HEADERS), NXYZ)
+        ring.append(make_sout(1.0))
+        assert len(ring) == 1
+        np.testing.assert_allclose(ring.last()[:, 0, 0], [1.0])
+
+    def test_wraps_around(self):
+        """Test that old steps are overwritten, oldest first."""
+        ring = RingBuffer(3, len(HEADERS), NXYZ)
+        for t in range(5):
+            ring.append(make_sout(float(t)))
+        assert len(ring) == 3
+        np.testing.assert_allclose(ring.last()[:, 0, 0], [2.0, 3.0, 4.0])
+        np.testing.assert_allclose(ring.last(2)[:, 0, 0], [3.0, 4.0])
+
+    def test_copies_input(self):
+        """Test that the buffer does not keep references to the input."""
+        ring = RingBuffer(2, len(HEADERS), NXYZ)
+        sout = make_sout(1.0)
+        ring.append(sout)
+        sout[0] = 9.0
+        assert ring.last()[0, 0, 0] == 1.0
+
+
+class TestSoutWriters:
+    """Test suite for the streaming selected output writers."""
+
+    def test_csv_matches_dataframe(self, tmp_path):
+        """Test that the csv writer matches the pandas csv layout."""
+        fname = tmp_path / "sout.csv"
+        writer = CsvSoutWriter(fname, HEADERS)
+        for t in [0.5, 1.0]:
+            writer.write(make_sout(t))
+        writer.close()
+        df = pd.read_csv(fname)
+        assert list(df.columns) == HEADERS
+        assert len(df) == 2 * NXYZ
+        np.testing.assert_allclose(df["Ca"].values[:NXYZ], make_sout(0.5)[3])
+
+    def test_binary_roundtrip(self, tmp_path):
+        """Test that binary records are read back by the memmap reader."""
+        fname = str(tmp_path / "sout.bin")
+        writer = BinarySoutWriter(fname, HEADERS, NXYZ)
+        for t in [0.5, 1.0, 1.5]:
+            writer.write(make_sout(t))
+        writer.close()
+        data, columns = read_binary_sout(fname)
+        assert columns == HEADERS
+        assert data.shape == (3, len(HEADERS), NXYZ)
+        np.testing.assert_allclose(data[:, 0, 0], [0.5, 1.0, 1.5])
+        np.testing.assert_allclose(data[2], make_sout(1.5))
+
+    def test_binary_to_dataframe(self, tmp_path):
+        """Test the csv-like dataframe layout of the binary file."""
+        fname = str(tmp_path / "sout.bin")
+        writer = BinarySoutWriter(fname, HEADERS, NXYZ)
+        writer.write(make_sout(0.5))
+        writer.write(make_sout(1.0))
+        writer.close()
+        df = binary_sout_to_dataframe(fname)
+        assert list(df.columns) == HEADERS
+        assert len(df) == 2 * NXYZ
+        np.testing.assert_allclose(df["Ca"].values[NXYZ:], make_sout(1.0)[3])
+
+    def test_binary_shape_mismatch(self, tmp_path):
+        """Test that records of the wrong shape are rejected."""
+        writer = BinarySoutWriter(str(tmp_path / "sout.bin"), HEADERS, NXYZ)
+        with pytest.raises(AssertionError):
+            writer.write(np.zeros((2, NXYZ)))
+        writer.close()
+
+
+class TestSoutStore:
+    """Test suite for the chunked columnar selected output store."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        path = str(tmp_path / "sout.store")
+        writer = ChunkedSoutWriter(path, HEADERS, NXYZ, chunk_time=2, chunk_cells=4)
+        for t in range(5):
+            sout = make_sout(float(t))
+            sout[3] += 100 * t
+            writer.write(sout)
+        writer.close()
+        return SoutStore(path)
+
+    def test_index(self, store):
+        """Test the store index."""
+        assert store.columns == HEADERS
+        assert store.ntimes == 5
+        np.testing.assert_allclose(store.times, [0, 1, 2, 3, 4])
+
+    def test_get_full(self, store):
+        """Test reading a variable across all chunks."""
+        ca = store.get("Ca")
+        assert ca.shape == (5, NXYZ)
+        expected = make_sout(0.0)[3] + 100 * np.arange(5)[:, None]
+        np.testing.assert_allclose(ca, expected)
+
+    def test_get_slices(self, store):
+        """Test integer, slice and array selections."""
+        assert store.get("Ca", time=3, cell=5) == make_sout(0.0)[3, 5] + 300
+        assert store.get("Ca", time=slice(1, 4)).shape == (3, NXYZ)
+        assert store.get("Ca", time=[0, 4], cell=[1, 4, 5]).shape == (2, 3)
+
+    def test_breakthrough(self, store):
+        """Test a breakthrough curve at one cell."""
+        times, values = store.breakthrough("Ca", 4)
+        np.testing.assert_allclose(values, make_sout(0.0)[3, 4] + 100 * times)
+
+    def test_select(self, store):
+        """Test a (time, cell, variable) block."""
+        block = store.select(time=slice(0, 3), cell=[0, 5], var=["time", "Ca"])
+        assert block.shape == (3, 2, 2)
+        np.testing.assert_allclose(block[:, 0, 0], [0, 1, 2])
+        assert store.time_index(2.2) == 2
+
+    def test_index_written_per_time_chunk(self, tmp_path):
+        """Test that the index is written when a time chunk is complete."""
+        path = str(tmp_path / "sout.store")
+        writer = ChunkedSoutWriter(path, HEADERS, NXYZ, chunk_time=2, chunk_cells=4)
+        for t in range(3):
+            writer.write(make_sout(float(t)))
+        assert SoutStore(path).ntimes == 2
+        writer.close()
+        assert SoutStore(path).ntimes == 3
+
+    def test_chunk_files(self, store):
+        """Test that chunks are split along time and cells."""
+        files = sorted(os.listdir(os.path.join(store.path, store.dirnames[3])))
+        assert files == [f"t{t}_c{c}.npy" for t in range(3) for c in range(2)]
+
+
+class SlowWriter:
+    """Writer recording the time steps it receives, slowly"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.times = []
+        self.closed = False
+
+    def write(self, sout):
+        time.sleep(self.delay)
+        if self.fail:
+            raise IOError("disk full")
+        self.times.append(sout[0, 0])
+
+    def close(self):
+        self.closed = True
+
+
+class TestAsyncSoutWriter:
+    """Test suite for the asynchronous selected output writer."""
+
+    def test_writes_in_order(self, tmp_path):
+        """Test that the binary file matches a synchronous write."""
+        fname = str(tmp_path / "sout.bin")
+        writer = AsyncSoutWriter(BinarySoutWriter(fname, HEADERS, NXYZ),
+                                 (len(HEADERS), NXYZ), nbuffers=2)
+        sout = make_sout(0.0)
+        for t in range(6):
+            # the same array is reused by the caller every step
+            sout[0] = t
+            writer.write(sout)
+        writer.close()
+        data, _ = read_binary_sout(fname)
+        np.testing.assert_allclose(data[:, 0, 0], np.arange(6))
+
+    def test_backpressure(self):
+        """Test that writes block when all buffers are in use."""
+        inner = SlowWriter(delay=0.05)
+        writer = AsyncSoutWriter(inner, (len(HEADERS), NXYZ), nbuffers=1)
+        start = time.perf_counter()
+        for t in range(4):
+            writer.write(make_sout(float(t)))
+        elapsed = time.perf_counter() - start
+        writer.close()
+        assert elapsed >= 0.1
+        assert inner.times == [0.0, 1.0, 2.0, 3.0]
+        assert inner.closed
+
+    def test_submit(self):
+        """Test that submitted calls run on the writer thread in order."""
+        calls = []
+        writer = AsyncSoutWriter(SlowWriter(), (len(HEADERS), NXYZ))
+        writer.write(make_sout(1.0))
+        writer.submit(calls.append, 1)
+        writer.submit(calls.append, 2)
+        writer.close()
+        assert calls == [1, 2]
+
+    def test_error_raised_on_main_thread(self):
+        """Test that writer thread errors are raised by close."""
+        writer = AsyncSoutWriter(SlowWriter(fail=True), (len(HEADERS), NXYZ))
+        writer.write(make_sout(0.0))
+        with pytest.raises(RuntimeError):
+            writer.close()
+
+
+class FakePhreeqcSout:
+    """Minimal stand-in for the PhreeqcBMI selected output access."""
+    sout_headers = HEADERS
+    components = ["Ca"]
+    ncomps = 1
+    soutdf = pd.DataFrame(columns=HEADERS)
+
+    def set_scalar(self, var_name, value):
+        pass
+
+    def GetSelectedOutput(self):
+        return make_sout(0.0).ravel()
+
+
+@pytest.fixture
+def selected_output(tmp_path):
+    from types import SimpleNamespace
+    from mf6rtm.io.externalio import SelectedOutput
+
+    mf6rtm = SimpleNamespace(
+        phreeqcbmi=FakePhreeqcSout(), mf6api=None, nxyz=NXYZ, wd=str(tmp_path),
+        ctime=0.0, time_step=1.0, diffmask=np.ones(NXYZ),
+        get_saturation_from_mf6=lambda: np.ones(NXYZ),
+        _check_inactive_cells_exist=lambda diffmask: not np.all(diffmask),
+    )
+    so = SelectedOutput(mf6rtm)
+    so.set_observations({"wells": [1, 4]}, ml_observations=["wells"])
+    return so
+
+
+class TestObservations:
+    """Test suite for the observation set outputs."""
+
+    def test_observation_stream(self, selected_output, tmp_path):
+        """Test that observation sets are written to their own file."""
+        selected_output._write_sout_headers()
+        for t in range(3):
+            selected_output.mf6rtm.ctime = float(t)
+            selected_output._update_selected_output()
+            selected_output._append_observations()
+        selected_output._close()
+        df = pd.read_csv(tmp_path / "sout_wells.csv")
+        assert list(df.columns) == ["time", "node", "cell", "pH", "Ca"]
+        assert len(df) == 6
+        np.testing.assert_array_equal(df["node"].values, [1, 4] * 3)
+        np.testing.assert_allclose(df["Ca"].values[:2], make_sout(0.0)[3, [1, 4]])
+        # full grid file has headers only
+        assert len(pd.read_csv(tmp_path / "sout.csv")) == 0
+
+    def test_observations_on_writer_thread(self, selected_output, tmp_path):
+        """Test that observation sets share the writer thread of the full
+        grid output."""
+        selected_output.set_format("binary", async_buffers=2)
+        selected_output._write_sout_headers()
+        assert isinstance(selected_output._writer, AsyncSoutWriter)
+        assert not isinstance(selected_output._obs_writers["wells"], AsyncSoutWriter)
+        for t in range(3):
+            selected_output.mf6rtm.ctime = float(t)
+            selected_output._update_selected_output()
+            selected_output._append_observations()
+        selected_output._close()
+        data, columns = read_binary_sout(str(tmp_path / "sout_wells.bin"))
+        assert data.shape == (3, len(HEADERS) + 1, 2)
+        np.testing.assert_array_equal(data[:, 1], [[1, 4]] * 3)
+
+    def test_ml_arrays_subset(self, selected_output, tmp_path):
+        """Test that emulator arrays are restricted to observation sets."""
+        selected_output._write_sout_headers()
+        conc = np.arange(NXYZ, dtype=float)
+        selected_output.write_ml_arrays(conc, 0, add_var_names=["pH"])
+        selected_output._close()
+        df = pd.read_csv(tmp_path / "wells_features.csv")
+        assert list(df.columns) == ["time", "cell", "saturation", "Ca", "pH"]
+        np.testing.assert_array_equal(df["cell"].values, [1, 4])
+        np.testing.assert_allclose(df["Ca"].values, [1.0, 4.0])
+        np.testing.assert_allclose(df["pH"].values, make_sout(0.0)[2, [1, 4]])
+        assert not os.path.exists(tmp_path / "_features.csv")
+
+
+class TestReactedOutput:
+    """Test suite for the selected output of cells skipped by reactions."""
+
+    def run_step(self, so, step, diffmask, output_due):
+        """Emulate a reaction step of the solver, reacted cells get the
+        selected output value of the step"""
+        dry = np.zeros(NXYZ, dtype=bool)
+        mask = so.get_reaction_mask(diffmask, dry, output_due)
+        so.mf6rtm.diffmask = mask
+        sout = make_sout(0.0)
+        sout[3] = step
+        so.phreeqcbmi.GetSelectedOutput = lambda: sout.ravel()
+        so._update_reacted_output(output_due)
+        if output_due:
+            so._update_selected_output()
+            return so._current_sout[3]
+        return None
+
+    def test_output_every_2(self, selected_output):
+        """Test that skipped cells written on output steps have the output
+        of the step they last reacted, with output every 2 steps."""
+        so = selected_output
+        dry = np.zeros(NXYZ, dtype=bool)
+        partial = np.array([1, 1, 0, 0, 1, 1])
+        # first reaction step, all cells react without selected output
+        assert self.run_step(so, 1, np.ones(NXYZ), False) is None
+        assert so.has_stale_output(dry)
+        # output step skipping cells after a step without selected output,
+        # all cells are reacted
+        np.testing.assert_array_equal(self.run_step(so, 2, partial, True), [2] * NXYZ)
+        assert not so.has_stale_output(dry)
+        # steps without output do not react the skipped cells
+        assert self.run_step(so, 3, 1 - partial, False) is None
+        np.testing.assert_array_equal(so.mf6rtm.diffmask, 1 - partial)
+        # cells reacted at step 3 are reacted again at the output step
+        np.testing.assert_array_equal(self.run_step(so, 4, partial, True), [4] * NXYZ)
+        assert self.run_step(so, 5, np.ones(NXYZ), False) is None
+        np.testing.assert_array_equal(self.run_step(so, 6, 1 - partial, True),
+                                      [6] * NXYZ)
+        # skipped cells without reactions since the last output keep it
+        np.testing.assert_array_equal(self.run_step(so, 7, partial, True),
+                                      [7, 7, 6, 6, 7, 7])
+
+    def test_dry_cells_not_reacted(self, selected_output):
+        """Test that dry cells reacted without output are not reacted again."""
+        so = selected_output
+        dry = np.array([0, 0, 0, 0, 0, 1], dtype=bool)
+        self.run_step(so, 1, np.ones(NXYZ), False)
+        assert so.has_stale_output(dry)
+        mask = so.get_reaction_mask(np.zeros(NXYZ), dry, True)
+        np.testing.assert_array_equal(mask, ~dry)
+        # steps without selected output do not react them
+        np.testing.assert_array_equal(so.get_reaction_mask(np.zeros(NXYZ), dry, False), 0)
@@ -0,0 +1,198 @@
+import os
+from pathlib import Path
+
+import flopy
+import pytest
+
+from mf6rtm.simulation import steadyflow
+from mf6rtm.simulation.steadyflow import (
+    BUDGET_FNAME, COMPLETE_FNAME, HEAD_FNAME, TRANSPORT_WS, inputs_hash, is_steady_flow,
+    load_simulation, prepare_steady_flow, write_flow_simulation,
+    write_transport_simulation,
+)
+
+
+def build_simulation(ws, nper=1, transient=False, chd_periods=1, rch_periods=0,
+                     time_series=False):
+    """Write a one row flow and transport simulation with two components"""
+    sim = flopy.mf6.MFSimulation(sim_name="test", sim_ws=ws)
+    flopy.mf6.ModflowTdis(sim, nper=nper, perioddata=[(10.0, 10, 1.0)] * nper)
+    gwf = flopy.mf6.ModflowGwf(sim, modelname="gwf", save_flows=True)
+    ims = flopy.mf6.ModflowIms(sim, filename="gwf.ims")
+    sim.register_ims_package(ims, [gwf.name])
+    flopy.mf6.ModflowGwfdis(gwf, nlay=1, nrow=1, ncol=5, top=1.0, botm=0.0)
+    flopy.mf6.ModflowGwfnpf(gwf, k=1.0)
+    flopy.mf6.ModflowGwfic(gwf, strt=1.0)
+    if transient:
+        flopy.mf6.ModflowGwfsto(gwf, transient={0: True})
+    spd = {kper: [[(0, 0, 0), 2.0 + kper, 1.0], [(0, 0, 4), 1.0, 0.0]]
+           for kper in range(chd_periods)}
+    chd = flopy.mf6.ModflowGwfchd(gwf, stress_period_data=spd, auxiliary=["Na"])
+    if time_series:
+        chd.ts.initialize(filename="gwf.chd.ts", timeseries=[(0.0, 1.0), (10.0, 2.0)],
+                          time_series_namerecord="h", interpolation_methodrecord="linear")
+    if rch_periods:
+        flopy.mf6.ModflowGwfrcha(gwf, recharge={kper: 1e-3 * (kper + 1)
+                                                for kper in range(rch_periods)})
+    flopy.mf6.ModflowGwfoc(gwf, budget_filerecord="gwf.cbb",
+                           saverecord=[("BUDGET", "ALL")])
+    for c in ["Na", "Cl"]:
+        gwt = flopy.mf6.MFModel(sim, model_type="gwt6", modelname=c,
+                                model_nam_file=f"{c}.nam")
+        ims = flopy.mf6.ModflowIms(sim, filename=f"{c}.ims")
+        sim.register_ims_package(ims, [gwt.name])
+        flopy.mf6.ModflowGwtdis(gwt, nlay=1, nrow=1, ncol=5, top=1.0, botm=0.0)
+        flopy.mf6.ModflowGwtic(gwt, strt=0.0)
+        flopy.mf6.ModflowGwtadv(gwt)
+        flopy.mf6.ModflowGwtmst(gwt, porosity=0.3)
+        flopy.mf6.ModflowGwtssm(gwt, sources=[("chd_0", "aux", "Na")])
+        flopy.mf6.ModflowGwtoc(gwt, concentration_filerecord=f"{c}.ucn",
+                               saverecord=[("CONCENTRATION", "LAST")])
+        flopy.mf6.ModflowGwfgwt(sim, exgtype="GWF6-GWT6", exgmnamea="gwf",
+                                exgmnameb=c, filename=f"{c}.gwfgwt")
+    sim.write_simulation(silent=True)
+    return sim
+
+
+@pytest.fixture
+def wd(tmp_path):
+    ws = tmp_path / "model"
+    build_simulation(ws)
+    return ws
+
+
+class TestIsSteadyFlow:
+    """Test suite for the detection of steady flow."""
+
+    def test_steady(self, wd):
+        """Test that a flow model without storage is steady."""
+        assert is_steady_flow(load_simulation(wd))
+
+    def test_transient_storage(self, tmp_path):
+        """Test that transient storage is not steady."""
+        build_simulation(tmp_path, transient=True)
+        assert not is_steady_flow(load_simulation(tmp_path))
+
+    def test_stress_periods(self, tmp_path):
+        """Test that boundaries changing between periods are not steady."""
+        build_simulation(tmp_path, nper=2, chd_periods=2)
+        assert not is_steady_flow(load_simulation(tmp_path))
+
+    def test_array_stress_periods(self, tmp_path):
+        """Test that array input changing between periods is not steady."""
+        build_simulation(tmp_path, nper=2, rch_periods=2)
+        assert not is_steady_flow(load_simulation(tmp_path))
+        build_simulation(tmp_path / "steady", nper=2, rch_periods=1)
+        assert is_steady_flow(load_simulation(tmp_path / "steady"))
+
+    def test_time_series(self, tmp_path):
+        """Test that packages reading time series are not steady."""
+        build_simulation(tmp_path, time_series=True)
+        assert not is_steady_flow(load_simulation(tmp_path))
+
+
+class TestSplitSimulation:
+    """Test suite for the flow and transport simulations."""
+
+    def test_flow_simulation(self, wd, tmp_path):
+        """Test that the flow simulation has one flow model and time step."""
+        ws = tmp_path / "flow"
+        assert write_flow_simulation(wd, ws) == "gwf"
+        sim = load_simulation(ws)
+        assert sim.model_names == ["gwf"]
+        assert len(sim.exchange_files) == 0
+        assert sim.tdis.nper.get_data() == 1
+        oc = sim.get_model("gwf").get_package("oc")
+        assert oc.head_filerecord.get_data()[0][0] == HEAD_FNAME
+        assert oc.budget_filerecord.get_data()[0][0] == BUDGET_FNAME
+        # transport solutions are not written
+        assert not (ws / "Na.ims").exists()
+
+    def test_transport_simulation(self, wd, tmp_path):
+        """Test that the transport models read the flow through FMI."""
+        ws, flow_ws = tmp_path / "transport", tmp_path / "flow"
+        assert write_transport_simulation(wd, ws, flow_ws) == ["na", "cl"]
+        sim = load_simulation(ws)
+        assert steadyflow.model_names_of_type(sim, "gwf6") == []
+        assert len(sim.exchange_files) == 0
+        fmi = sim.get_model("na").get_package("fmi")
+        files = [row[1] for row in fmi.packagedata.get_data()]
+        assert files == [os.path.join("..", "flow", HEAD_FNAME),
+                         os.path.join("..", "flow", BUDGET_FNAME)]
+        assert sim.tdis.nper.get_data() == 1
+
+    def test_flow_simulation_refuses_periods(self, tmp_path):
+        """Test that stress data of later periods are not dropped."""
+        build_simulation(tmp_path / "model", nper=2, chd_periods=2)
+        with pytest.raises(AssertionError):
+            write_flow_simulation(tmp_path / "model", tmp_path / "flow")
+
+    def test_hash_is_stable(self, wd, tmp_path):
+        """Test that the same flow model gives the same hash."""
+        write_flow_simulation(wd, tmp_path / "a")
+        write_flow_simulation(wd, tmp_path / "b")
+        assert inputs_hash(tmp_path / "a") == inputs_hash(tmp_path / "b")
+
+
+class TestPrepareSteadyFlow:
+    """Test suite for the cached steady flow solution."""
+
+    def test_reuse_cache(self, wd, tmp_path, monkeypatch):
+        """Test that a cached solution is reused without running."""
+        staging = tmp_path / "staging"
+        write_flow_simulation(wd, staging)
+        flow_ws = wd / "flow_cache" / inputs_hash(staging)[:16]
+        flow_ws.mkdir(parents=True)
+        (flow_ws / HEAD_FNAME).touch()
+        (flow_ws / BUDGET_FNAME).touch()
+        (flow_ws / COMPLETE_FNAME).touch()
+
+        def run(*args, **kwargs):
+            raise AssertionError("flow simulation was run")
+        monkeypatch.setattr(steadyflow, "run_flow_simulation", run)
+
+        ws = prepare_steady_flow(wd)
+        assert ws == wd / TRANSPORT_WS
+        assert (ws / "mfsim.nam").exists()
+        assert not list((wd / "flow_cache").glob("staging*"))
+
+    def test_incomplete_cache_rerun(self, wd, tmp_path, monkeypatch):
+        """Test that outputs without the completion marker are replaced by
+        a solution run in the staging directory."""
+        staging = tmp_path / "staging"
+        write_flow_simulation(wd, staging)
+        flow_ws = wd / "flow_cache" / inputs_hash(staging)[:16]
+        flow_ws.mkdir(parents=True)
+        (flow_ws / HEAD_FNAME).touch()
+        (flow_ws / BUDGET_FNAME).touch()
+
+        runs = []
+
+        def run(ws, exe_name="mf6"):
+            assert Path(ws).name.startswith("staging")
+            (Path(ws) / HEAD_FNAME).write_text("solved")
+            runs.append(ws)
+        monkeypatch.setattr(steadyflow, "run_flow_simulation", run)
+
+        prepare_steady_flow(wd)
+        assert len(runs) == 1
+        assert (flow_ws / COMPLETE_FNAME).exists()
+        assert (flow_ws / HEAD_FNAME).read_text() == "solved"
+        assert not list((wd / "flow_cache").glob("staging*"))
+
+    def test_failed_run_not_cached(self, wd, monkeypatch):
+        """Test that a failed flow simulation leaves nothing in the cache."""
+        def run(ws, exe_name="mf6"):
+            (Path(ws) / HEAD_FNAME).touch()
+            raise AssertionError("Steady flow simulation did not converge")
+        monkeypatch.setattr(steadyflow, "run_flow_simulation", run)
+
+        with pytest.raises(AssertionError):
+            prepare_steady_flow(wd)
+        assert not list((wd / "flow_cache").iterdir())
+
+    def test_not_steady(self, tmp_path):
+        """Test that a transient flow is left coupled with check."""
+        build_simulation(tmp_path, transient=True)
+        assert prepare_steady_flow(tmp_path, check=True) == tmp_path
+        assert not (tmp_path / TRANSPORT_WS).exists()
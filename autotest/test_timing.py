@@ -0,0 +1,196 @@
+import pytest
+import numpy as np
+
+from mf6rtm.simulation.timing import AdaptiveTiming, TimeStepControl
+from mf6rtm.simulation.transfer import ConcentrationTransfer, CouplingTable
+from autotest.test_transfer import FakeMf6, FakePhreeqc, COMPONENTS
+
+
+@pytest.fixture
+def mf6():
+    mf6 = FakeMf6([c.lower() for c in COMPONENTS], nxyz=5)
+    for c in COMPONENTS:
+        mf6.mem[f"{c.upper()}/X"][:] = 1.0
+    return mf6
+
+
+@pytest.fixture
+def phreeqc():
+    return FakePhreeqc(len(COMPONENTS), nxyz=5)
+
+
+@pytest.fixture
+def timing(mf6, phreeqc):
+    model_dict = {c: c.lower() for c in COMPONENTS}
+    table = CouplingTable.build(mf6, COMPONENTS, model_dict)
+    transfer = ConcentrationTransfer(table, phreeqc, 5)
+    return AdaptiveTiming(transfer, tolerance=1e-2, max_tsteps=3)
+
+
+def react(timing, phreeqc, factor=1.0):
+    """Emulate a chemistry call scaling the transported concentrations"""
+    timing.transfer.to_phreeqcrm()
+    phreeqc.concentrations[:] = timing.transfer.conc.ravel() * factor
+    timing.transfer.to_mf6()
+    timing.update_rates()
+
+
+class TestAdaptiveTiming:
+    """Test suite for the adaptive reaction timing."""
+
+    def test_first_step_is_due(self, timing):
+        """Test that reactions are due before any chemistry call."""
+        assert timing.step(1.0)
+        assert timing.error == np.inf
+
+    def test_skip_without_change(self, timing, phreeqc):
+        """Test that steps without change are accumulated."""
+        timing.step(1.0)
+        react(timing, phreeqc)
+        assert not timing.step(1.0)
+        assert not timing.step(2.0)
+        assert timing.dt == 3.0
+        assert timing.nskipped == 2
+
+    def test_max_tsteps(self, timing, phreeqc):
+        """Test that reactions are due after max_tsteps steps."""
+        timing.step(1.0)
+        react(timing, phreeqc)
+        assert not timing.step(1.0)
+        assert not timing.step(1.0)
+        assert timing.step(1.0)
+
+    def test_force(self, timing, phreeqc):
+        """Test that forced steps are due."""
+        timing.step(1.0)
+        react(timing, phreeqc)
+        assert timing.step(1.0, force=True)
+
+    def test_transport_change(self, timing, phreeqc, mf6):
+        """Test that a transport change above the tolerance is due."""
+        timing.step(1.0)
+        react(timing, phreeqc)
+        mf6.mem["CA/X"][2] = 1.5
+        assert timing.step(1.0)
+        assert timing.error == pytest.approx(0.5 / 1.5)
+
+    def test_water_and_charge_not_checked(self, timing, phreeqc, mf6):
+        """Test that changes of H, O and charge do not trigger reactions."""
+        timing.step(1.0)
+        react(timing, phreeqc)
+        mf6.mem["CHARGE/X"][:] = 1.0 + 1e-9
+        mf6.mem["CHARGE/X"][0] = -1.0
+        mf6.mem["H/X"][1] = 2.0
+        assert not timing.step(1.0)
+        assert timing.error == 0.0
+
+    def test_buffer_sent_without_refresh(self, timing, phreeqc, mf6):
+        """Test that the concentrations read by step are sent as is."""
+        timing.step(1.0)
+        mf6.mem["CA/X"][:] = 7.0
+        timing.transfer.to_phreeqcrm(refresh=False)
+        np.testing.assert_allclose(phreeqc.received.reshape(4, 5)[3], 1e-3)
+
+    def test_reaction_rate(self, timing, phreeqc):
+        """Test that the last reaction rates predict the error."""
+        timing.step(1.0)
+        react(timing, phreeqc, factor=1.02)
+        # reacted values are now transported values without change
+        assert timing.step(1.0)
+        assert timing.error == pytest.approx(0.02 / 1.02)
+        timing.update_rates()
+        assert timing.dt == 0.0
+        assert timing.ntsteps == 0
+
+
+@pytest.fixture
+def control(mf6):
+    # Modflow 6 time step of 10 ending at 30, third step of the period
+    mf6.mem["TDIS/DELT"] = np.array([10.0])
+    mf6.mem["TDIS/TOTIM"] = np.array([30.0])
+    mf6.mem["TDIS/PERTIM"] = np.array([30.0])
+    ctl = TimeStepControl(mf6, ["h", "ca"], cutback=0.5, grow=2.0, grow_after=2,
+                          min_fraction=0.25)
+    ctl.start_step()
+    return ctl
+
+
+class TestTimeStepControl:
+    """Test suite for the time step cutback."""
+
+    def test_full_step(self, control, mf6):
+        """Test that a converged step covers the Modflow 6 time step."""
+        assert control.set_step() == 10.0
+        control.converged(10.0)
+        assert control.end_of_step
+        assert mf6.mem["TDIS/TOTIM"][0] == 30.0
+
+    def test_cutback_restores_state(self, control, mf6):
+        """Test that a failed step restores X and is retried shorter."""
+        control.save()
+        dt = control.set_step()
+        mf6.mem["CA/X"][:] = 9.0
+        assert control.failed(dt)
+        control.restore()
+        np.testing.assert_allclose(mf6.mem["CA/X"], 1.0)
+
+        dt = control.set_step()
+        assert dt == 5.0
+        assert mf6.mem["TDIS/DELT"][0] == 5.0
+        assert mf6.mem["TDIS/TOTIM"][0] == 25.0
+        assert mf6.mem["TDIS/PERTIM"][0] == 25.0
+        control.converged(dt)
+        assert not control.end_of_step
+        assert control.set_step() == 5.0
+        assert mf6.mem["TDIS/TOTIM"][0] == 30.0
+        control.converged(5.0)
+        assert control.end_of_step
+        assert mf6.mem["TDIS/DELT"][0] == 10.0
+        assert mf6.mem["TDIS/TOTIM"][0] == 30.0
+        assert mf6.mem["TDIS/PERTIM"][0] == 30.0
+
+    def test_grow_after_converged_steps(self, control):
+        """Test that the step grows back after converged steps."""
+        control.failed(control.set_step())
+        control.converged(control.set_step())
+        assert control.fraction == 0.5
+        control.converged(control.set_step())
+        assert control.end_of_step
+        assert control.fraction == 1.0
+
+    def test_min_fraction(self, control):
+        """Test that a step failing at the smallest fraction is accepted."""
+        assert control.failed(control.set_step())
+        assert control.failed(control.set_step())
+        dt = control.set_step()
+        assert dt == 2.5
+        assert not control.failed(dt)
+        assert control.fraction == 0.25
+        assert control.ncutbacks == 2
+
+    def test_substeps_storage_decay(self, control, mf6):
+        """Test that coupled steps after a cutback start from the previous
+        step, so storage and first order decay balance the mass."""
+        k = 0.1
+        x, xold = mf6.mem["CA/X"], mf6.mem["CA/XOLD"]
+        xold[:] = 1.0
+
+        def solve():
+            # implicit storage and decay, (X - XOLD) / dt = -k X
+            x[:] = xold / (1.0 + k * mf6.mem["TDIS/DELT"][0])
+
+        control.save()
+        control.failed(control.set_step())
+        control.restore()
+        mass = [xold.copy()]
+        decayed = 0.0
+        while not control.end_of_step:
+            control.save()
+            dt = control.set_step()
+            solve()
+            decayed += k * x * dt
+            mass.append(x.copy())
+            control.converged(dt)
+        assert len(mass) == 3
+        np.testing.assert_allclose(mass[-1] + decayed, mass[0])
+        np.testing.assert_allclose(mass[-1], 1.0 / (1.0 + 0.5) ** 2)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from mf6rtm.simulation.tolerance import ChangeTolerance, get_conc_change_mask
+
+COMPONENTS = ["H", "O", "Charge", "Ca", "Fe"]
+
+
+@pytest.fixture
+def previous():
+    # (ncomps, nxyz) with 4 cells
+    prev = np.empty((5, 4))
+    prev[0], prev[1], prev[2] = 111.0, 55.5, 1e-12
+    prev[3] = 1e-3
+    prev[4] = 0.0
+    return prev
+
+
+class TestChangeTolerance:
+    """Test suite for the per component reaction skip criterion."""
+
+    def test_disabled(self):
+        """Test that zero tolerances are disabled."""
+        assert not ChangeTolerance(COMPONENTS, 4).enabled
+        assert ChangeTolerance(COMPONENTS, 4, rtol=1e-3).enabled
+
+    def test_cells_not_mixed(self, previous):
+        """Test that a change of one component only activates its cell."""
+        tol = ChangeTolerance(COMPONENTS, 4, rtol=1e-3)
+        conc = previous.copy()
+        conc[3, 2] *= 1.1
+        np.testing.assert_array_equal(tol.mask(conc, previous), [0, 0, 1, 0])
+        assert tol.nskipped == 3
+        assert tol.triggers["Ca"] == 1
+        assert tol.triggers["Fe"] == 0
+
+    def test_near_zero_uses_atol(self, previous):
+        """Test that species appearing from zero are compared to atol."""
+        tol = ChangeTolerance(COMPONENTS, 4, atol=1e-10, rtol=1e-3)
+        conc = previous.copy()
+        conc[4] = [0.0, 1e-12, 1e-9, 0.0]
+        np.testing.assert_array_equal(tol.mask(conc, previous), [0, 0, 1, 0])
+
+    def test_water_and_charge(self, previous):
+        """Test that H and O are not checked and charge uses atol only."""
+        tol = ChangeTolerance(COMPONENTS, 4, atol=1e-10, rtol=1e-3)
+        conc = previous.copy()
+        conc[0] += 1.0
+        conc[1] += 1.0
+        conc[2, 1] = 5e-11
+        conc[2, 3] = 1e-9
+        np.testing.assert_array_equal(tol.mask(conc, previous), [0, 0, 0, 1])
+        assert tol.triggers["Charge"] == 1
+
+    def test_component_tolerances(self, previous):
+        """Test that component tolerances override the defaults."""
+        tol = ChangeTolerance(COMPONENTS, 4, rtol=1e-3,
+                              tolerances={"Ca": {"rtol": 0.5}, "H": {"atol": 1e-3}})
+        conc = previous.copy()
+        conc[3] *= 1.1
+        conc[0, 0] += 1.0
+        np.testing.assert_array_equal(tol.mask(conc, previous), [1, 0, 0, 0])
+
+    def test_unknown_component(self):
+        """Test that tolerances of unknown components raise."""
+        with pytest.raises(AssertionError):
+            ChangeTolerance(COMPONENTS, 4, tolerances={"Zn": {"atol": 1.0}})
+
+
+def test_get_conc_change_mask_layout():
+    """Test that flat (ncomp, nxyz) arrays are not reshaped cell first."""
+    ck = np.ones((2, 3))
+    ci = ck.copy()
+    ci[1, 0] = 2.0
+    mask = get_conc_change_mask(ci.ravel(), ck.ravel(), 2, 3, treshold=1e-6)
+    np.testing.assert_array_equal(mask, [1, 0, 0])
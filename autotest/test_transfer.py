@@ -0,0 +1,173 @@
+import pytest
+import numpy as np
+
+from mf6rtm.simulation.tolerance import ChangeTolerance
+from mf6rtm.simulation.transfer import ConcentrationTransfer, CouplingTable
+
+
+class FakeMf6:
+    """Minimal stand-in for the Mf6API memory access used by the transfer."""
+
+    def __init__(self, models, nxyz):
+        self.mem = {f"{m.upper()}/X": np.zeros(nxyz) for m in models}
+        self.mem.update({f"{m.upper()}/XOLD": np.zeros(nxyz) for m in models})
+        self.mem.update({f"{m}/FMI/GWFSAT": np.ones(nxyz) for m in models})
+        self.lookups = 0
+
+    def get_var_address(self, var, model, package=None):
+        self.lookups += 1
+        if package is not None:
+            return f"{model}/{package}/{var}"
+        return f"{model}/{var}"
+
+    def get_value_ptr(self, address):
+        return self.mem[address]
+
+
+class FakePhreeqc:
+    """Minimal stand-in for the PhreeqcBMI concentration access."""
+
+    def __init__(self, ncomps, nxyz):
+        self.concentrations = np.zeros(ncomps * nxyz)
+        self.received = None
+
+    def SetConcentrations(self, c):
+        self.received = np.array(c)
+
+    def get_value_ptr(self, name):
+        assert name == "Concentrations"
+        return self.concentrations
+
+
+COMPONENTS = ["H", "O", "Charge", "Ca"]
+
+
+@pytest.fixture
+def mf6():
+    return FakeMf6([c.lower() for c in COMPONENTS], nxyz=5)
+
+
+@pytest.fixture
+def transfer(mf6):
+    model_dict = {c: c.lower() for c in COMPONENTS}
+    phreeqc = FakePhreeqc(len(COMPONENTS), nxyz=5)
+    table = CouplingTable.build(mf6, COMPONENTS, model_dict, charge_offset=2.0)
+    return ConcentrationTransfer(table, phreeqc, 5)
+
+
+class TestConcentrationTransfer:
+    """Test suite for the zero-copy concentration exchange."""
+
+    def test_views_share_mf6_memory(self, transfer, mf6):
+        """Test that the X arrays are views, not copies."""
+        assert transfer.table.entries[0].x is mf6.mem["H/X"]
+
+    def test_table_resolved_once(self, transfer, mf6):
+        """Test that no address lookups happen during the exchange."""
+        lookups = mf6.lookups
+        transfer.to_phreeqcrm()
+        transfer.to_mf6()
+        transfer.get_saturation()
+        assert mf6.lookups == lookups
+
+    def test_table_is_immutable(self, transfer):
+        """Test that the coupling table cannot be modified."""
+        with pytest.raises(AttributeError):
+            transfer.table.entries[0].offset = 1.0
+
+    def test_table_charge_offset(self, transfer):
+        """Test that only the charge component carries the offset."""
+        offsets = {e.component: e.offset for e in transfer.table.entries}
+        assert offsets == {"H": 0.0, "O": 0.0, "Charge": 2.0, "Ca": 0.0}
+
+    def test_saturation_is_a_copy(self, transfer, mf6):
+        """Test that modifying the saturation does not touch mf6 memory."""
+        sat = transfer.get_saturation()
+        sat[0] = 0.0
+        assert mf6.mem["h/FMI/GWFSAT"][0] == 1.0
+
+    def test_to_phreeqcrm_units_and_charge(self, transfer, mf6):
+        """Test unit conversion and charge offset when sending to phreeqc."""
+        mf6.mem["CA/X"][:] = 1.0
+        mf6.mem["CHARGE/X"][:] = 2.5
+        conc = transfer.to_phreeqcrm()
+        assert conc.shape == (4, 5)
+        np.testing.assert_allclose(conc[3], 1e-3)
+        np.testing.assert_allclose(conc[2], 0.5e-3)
+        np.testing.assert_allclose(transfer.phreeqcbmi.received, conc.ravel())
+
+    def test_to_mf6_units_and_charge(self, transfer, mf6):
+        """Test unit conversion and charge offset when sending to mf6."""
+        transfer.phreeqcbmi.concentrations[:] = 1e-3
+        transfer.to_mf6()
+        np.testing.assert_allclose(mf6.mem["CA/X"], 1.0)
+        np.testing.assert_allclose(mf6.mem["CHARGE/X"], 3.0)
+
+    def test_to_mf6_keeps_skipped_cells(self, transfer, mf6):
+        """Test that skipped cells keep their transported concentrations in
+        mf6 and their previous reacted values in the buffer."""
+        transfer.phreeqcbmi.concentrations[:] = 1e-3
+        transfer.to_mf6()
+        mf6.mem["CA/X"][:] = 1.5
+        transfer.phreeqcbmi.concentrations[:] = 5e-3
+        active = np.array([1, 0, 1, 0, 1])
+        reacted = transfer.to_mf6(active=active)
+        np.testing.assert_allclose(reacted[0], [5e-3, 1e-3, 5e-3, 1e-3, 5e-3])
+        np.testing.assert_allclose(mf6.mem["CA/X"], [5.0, 1.5, 5.0, 1.5, 5.0])
+
+    def test_skipped_changes_add_up(self, transfer, mf6):
+        """Test that transport changes below the tolerance of skipped cells
+        add up until the cell is reacted."""
+        tolerance = ChangeTolerance(COMPONENTS, 5, atol=0.25e-3)
+        transfer.phreeqcbmi.concentrations[:] = 1e-3
+        transfer.to_mf6()
+        for step in range(1, 4):
+            # transport moves 0.1 mmol/L into the first cell every step
+            mf6.mem["CA/X"][0] += 0.1
+            conc = transfer.to_phreeqcrm()
+            active = tolerance.mask(conc, transfer.reacted)
+            transfer.phreeqcbmi.concentrations[:] = conc.ravel()
+            transfer.to_mf6(active=active)
+            np.testing.assert_allclose(mf6.mem["CA/X"][0], 1.0 + 0.1 * step)
+        np.testing.assert_array_equal(active, [True, False, False, False, False])
+        np.testing.assert_allclose(transfer.reacted[3, 0], 1.3e-3)
+
+    def test_fixed_component_not_transferred(self, mf6):
+        """Test that fixed components keep the phreeqc concentrations."""
+        model_dict = {c: c.lower() for c in COMPONENTS}
+        phreeqc = FakePhreeqc(len(COMPONENTS), nxyz=5)
+        table = CouplingTable.build(mf6, COMPONENTS, model_dict,
+                                    fixed_components=["Ca"])
+        transfer = ConcentrationTransfer(table, phreeqc, 5)
+        np.testing.assert_array_equal(table.fixed, [3])
+
+        phreeqc.concentrations[:] = 2e-3
+        transfer.to_mf6()
+        np.testing.assert_allclose(mf6.mem["H/X"], 2.0)
+        np.testing.assert_allclose(mf6.mem["CA/X"], 0.0)
+
+        mf6.mem["H/X"][:] = 1.0
+        mf6.mem["CA/X"][:] = 7.0
+        conc = transfer.to_phreeqcrm()
+        np.testing.assert_allclose(conc[0], 1e-3)
+        np.testing.assert_allclose(conc[3], 2e-3)
+
+    def test_reduced_nodes_scattered_to_user_cells(self):
+        """Test that idomain removed cells are skipped by the exchange."""
+        mf6 = FakeMf6([c.lower() for c in COMPONENTS], nxyz=3)
+        for c in COMPONENTS:
+            mf6.mem[f"{c.upper()}/DIS/NODEUSER"] = np.array([1, 3, 5])
+        model_dict = {c: c.lower() for c in COMPONENTS}
+        phreeqc = FakePhreeqc(len(COMPONENTS), nxyz=5)
+        table = CouplingTable.build(mf6, COMPONENTS, model_dict, nxyz=5)
+        transfer = ConcentrationTransfer(table, phreeqc, 5)
+        np.testing.assert_array_equal(table.nodes, [0, 2, 4])
+
+        mf6.mem["CA/X"][:] = [1.0, 2.0, 3.0]
+        conc = transfer.to_phreeqcrm()
+        np.testing.assert_allclose(conc[3], [1e-3, 0.0, 2e-3, 0.0, 3e-3])
+        np.testing.assert_allclose(transfer.get_saturation(), [1, 0, 1, 0, 1])
+
+        phreeqc.concentrations.reshape(4, 5)[3] = [4e-3, 9.0, 5e-3, 9.0, 6e-3]
+        transfer.to_mf6()
+        np.testing.assert_allclose(mf6.mem["CA/X"], [4.0, 5.0, 6.0])
@@ -1,3 +1,5 @@
+import io
+import hashlib
 import pytest
 import numpy as np
 import pandas as pd
@@ -247,6 +249,45 @@ class TestHandleBlock:
         assert 'X' in script
 
 
+class TestScriptWriter:
+    """Test suite for the streaming PHREEQC script writer."""
+
+    def blocks(self):
+        return [
+            utils.generate_solution_block({'pH': 7.0, 'Ca': 1.0}, 0),
+            utils.generate_solution_block({'pH': 8.0, 'Ca': 2.0}, 1),
+            utils.endmainblock,
+            '\n',
+            'SELECTED_OUTPUT\n    -pH true\nEND\n\n',
+        ]
+
+    def write(self, **kwargs):
+        buffer = io.StringIO()
+        writer = utils.ScriptWriter(buffer, **kwargs)
+        for block in self.blocks():
+            writer.write(block)
+        writer.close()
+        return buffer.getvalue(), writer.sha256
+
+    def test_same_as_joined(self):
+        """Test that streaming writes the joined blocks."""
+        script, sha = self.write()
+        assert script == ''.join(self.blocks())
+        assert sha == hashlib.sha256(script.encode()).hexdigest()
+
+    def test_charge_flag(self):
+        """Test that the charge flag matches the flag on the joined script."""
+        script, _ = self.write(charge_species=['pH'])
+        expected = utils.add_charge_flag_to_species_in_solution(''.join(self.blocks()))
+        assert script == expected
+        assert 'pH 7.00000e+00 charge' in script
+
+    def test_strip(self):
+        """Test that strip matches stripping the joined script."""
+        script, _ = self.write(strip=True)
+        assert script == ''.join(self.blocks()).strip()
+
+
 class TestGetCompoundNames:
     """Test suite for compound name extraction from database."""
     
@@ -0,0 +1,41 @@
+# File generated by Flopy version 3.7.0 on 10/18/2026 at 10:32:05.
+BEGIN options
+  XT3D_OFF
+END options
+
+BEGIN griddata
+  alh  LAYERED
+    OPEN/CLOSE  'Na.dsp_alh_layer1.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer2.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer3.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer4.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer5.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer6.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer7.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer8.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer9.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_alh_layer10.txt'  FACTOR  1.0
+  ath1  LAYERED
+    OPEN/CLOSE  'Na.dsp_ath1_layer1.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer2.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer3.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer4.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer5.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer6.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer7.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer8.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer9.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_ath1_layer10.txt'  FACTOR  1.0
+  atv  LAYERED
+    OPEN/CLOSE  'Na.dsp_atv_layer1.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer2.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer3.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer4.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer5.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer6.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer7.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer8.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer9.txt'  FACTOR  1.0
+    OPEN/CLOSE  'Na.dsp_atv_layer10.txt'  FACTOR  1.0
+END griddata
+
@@ -0,0 +1,14 @@
+# File generated by Flopy version 3.7.0 on 10/18/2026 at 10:32:23.
+BEGIN options
+  XT3D_OFF
+END options
+
+BEGIN griddata
+  alh
+    OPEN/CLOSE  'O.dsp_alh.txt'  FACTOR  1.0
+  ath1
+    OPEN/CLOSE  'O.dsp_ath1.txt'  FACTOR  1.0
+  atv
+    OPEN/CLOSE  'O.dsp_atv.txt'  FACTOR  1.0
+END griddata
+
@@ -0,0 +1,178 @@
+"""
+Scaling benchmark of the coupled solve on synthetic models.
+
+Builds the synthetic models of ``synthetic.py`` (ex1 calcite/dolomite, ex2
+and ex3 AMD, ex4 cation exchange) for every combination of number of
+cells, extra components and threads, runs them with ``Mup3d.run`` and
+writes cells*steps per second, the per stage timings of the step profiler
+and the peak memory of every run to a JSON file. Each run is done in its
+own process so the peak memory is not shared between runs.
+
+Usage::
+
+    python benchmark/perf/bench_scaling.py --cases ex1 ex4 --nxyz 1000 100000 1000000 \\
+        --nextra 0 4 --nthreads 1 8 --nsteps 10 --out results.json
+
+Options of the run configuration are set with ``--set key=value``, e.g.
+``--set output_schedule=\\"last\\" --set reactive_compact=true``.
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PERF_DIR = os.path.abspath(os.path.dirname(__file__))
+if PERF_DIR not in sys.path:
+    sys.path.insert(0, PERF_DIR)
+
+import synthetic  # noqa: E402
+
+
+def peak_rss_mb(fallback=0.0):
+    """Peak resident set size of the current process in MB"""
+    try:
+        import resource
+    except ImportError:
+        return fallback
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    scale = 1e6 if sys.platform == "darwin" else 1e3
+    return max(peak / scale, fallback)
+
+
+def run_one(case, nxyz, nextra, nthread, nsteps, workdir, config, bindir, keep=False):
+    """Build and run one synthetic model, return its result record"""
+    wd = os.path.join(workdir, f"{case}_n{nxyz}_c{nextra}_t{nthread}")
+    if os.path.exists(wd):
+        shutil.rmtree(wd)
+    os.makedirs(wd)
+    config = dict(config)
+    config.setdefault("profile_enabled", True)
+
+    start = time.perf_counter()
+    model = synthetic.build(case, wd, nxyz, nsteps=nsteps, nextra=nextra,
+                            config=config, nthread=nthread, bindir=bindir)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    success = model.run(nthread=nthread)
+    run_time = time.perf_counter() - start
+
+    summary_fname = os.path.join(
+        wd, f"{os.path.splitext(model.config.profile_fname)[0]}.summary.json"
+    )
+    summary = {}
+    if os.path.exists(summary_fname):
+        with open(summary_fname) as f:
+            summary = json.load(f)
+    timings = summary.get("timings", {})
+    solve_time = timings.get("step", {}).get("total", run_time)
+    nsteps_run = summary.get("nsteps", nsteps)
+    ncells = model.nlay * model.nrow * model.ncol
+
+    if not keep:
+        shutil.rmtree(wd, ignore_errors=True)
+    return {
+        "case": case,
+        "nxyz": ncells,
+        "ncomps": len(model.components),
+        "nextra": nextra,
+        "nthread": nthread,
+        "nsteps": nsteps_run,
+        "success": bool(success),
+        "build_time": build_time,
+        "run_time": run_time,
+        "solve_time": solve_time,
+        "cells_steps_per_s": ncells * nsteps_run / solve_time if solve_time > 0 else 0.0,
+        "timings": {key: t["total"] for key, t in timings.items()},
+        "fractions": {key: t["fraction"] for key, t in timings.items()},
+        "peak_rss_mb": peak_rss_mb(summary.get("peak_rss_mb", 0.0)),
+    }
+
+
+def metadata():
+    """Description of the machine and software of the benchmark"""
+    import mf6rtm
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "mf6rtm": getattr(mf6rtm, "__version__", "unknown"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def parse_settings(settings):
+    """Parse ``key=value`` config options, values as JSON when possible"""
+    config = {}
+    for item in settings or []:
+        key, _, value = item.partition("=")
+        try:
+            config[key] = json.loads(value)
+        except json.JSONDecodeError:
+            config[key] = value
+    return config
+
+
+def main(cases=("ex1",), nxyz=(1000,), nextra=(0,), nthreads=(1,), nsteps=10,
+         out="bench_scaling.json", workdir=None, config=None, bindir=synthetic.BIN_DIR,
+         keep=False):
+    workdir = workdir or tempfile.mkdtemp(prefix="mf6rtm_bench_")
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'case':<5} | {'nxyz':>9} | {'ncomps':>6} | {'nthread':>7} | "
+          f"{'cells*steps/s':>14} | {'solve (s)':>10} | {'peak MB':>9}")
+    for case in cases:
+        for n in nxyz:
+            for extra in nextra:
+                for nthread in nthreads:
+                    with concurrent.futures.ProcessPoolExecutor(1, mp_context=ctx) as pool:
+                        future = pool.submit(run_one, case, n, extra, nthread, nsteps,
+                                             workdir, config or {}, bindir, keep)
+                        try:
+                            res = future.result()
+                        except Exception as e:
+                            res = {"case": case, "nxyz": n, "nextra": extra,
+                                   "nthread": nthread, "success": False, "error": repr(e)}
+                    results.append(res)
+                    if res["success"]:
+                        print(f"{case:<5} | {res['nxyz']:>9} | {res['ncomps']:>6} | "
+                              f"{nthread:>7} | {res['cells_steps_per_s']:14.4e} | "
+                              f"{res['solve_time']:10.3f} | {res['peak_rss_mb']:9.1f}")
+                    else:
+                        print(f"{case:<5} | {n:>9} | failed: {res.get('error', 'run failed')}")
+                    # write after every run so partial sweeps are kept
+                    with open(out, "w") as f:
+                        json.dump({"metadata": metadata(), "config": config or {},
+                                   "results": results}, f, indent=2)
+    if not keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", nargs="+", default=["ex1"], choices=sorted(synthetic.CASES))
+    parser.add_argument("--nxyz", nargs="+", type=int, default=[1000])
+    parser.add_argument("--nextra", nargs="+", type=int, default=[0],
+                        help="number of trace elements added as components")
+    parser.add_argument("--nthreads", nargs="+", type=int, default=[1])
+    parser.add_argument("--nsteps", type=int, default=10)
+    parser.add_argument("--out", default="bench_scaling.json")
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--bindir", default=synthetic.BIN_DIR,
+                        help="directory with linux/mac/win folders of mf6 and libmf6")
+    parser.add_argument("--set", dest="settings", action="append",
+                        help="MF6RTMConfig option as key=value")
+    parser.add_argument("--keep", action="store_true", help="keep the model directories")
+    args = parser.parse_args()
+    main(args.cases, args.nxyz, args.nextra, args.nthreads, args.nsteps, args.out,
+         args.workdir, parse_settings(args.settings), args.bindir, args.keep)
@@ -0,0 +1,106 @@
+"""
+Benchmark of the coupling overhead of Mf6RTM.solve.
+
+Runs ``Mf6RTM.solve`` through the stand-in interfaces of ``mocks.py``, whose
+transport and chemistry calls return instantly, so the measured time is the
+Python glue of the coupled loop: concentration transfers, change mask,
+saturation, selected output and bookkeeping. Per stage times come from the
+step profiler of the run.
+
+Usage::
+
+    python benchmark/perf/bench_solve.py --nxyz 1000000 --ncomps 14 --nsteps 20
+
+Options of the run configuration are set with ``--set key=value``, e.g.
+``--set output_format=\\"binary\\" --set output_schedule=\\"every\\"``.
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PERF_DIR = os.path.abspath(os.path.dirname(__file__))
+if PERF_DIR not in sys.path:
+    sys.path.insert(0, PERF_DIR)
+
+from mocks import MockMf6API, MockPhreeqcBMI  # noqa: E402
+
+from mf6rtm.config.config import MF6RTMConfig  # noqa: E402
+from mf6rtm.simulation.solver import Mf6RTM  # noqa: E402
+
+
+def parse_settings(settings):
+    """Parse ``key=value`` config options, values as JSON when possible"""
+    config = {}
+    for item in settings or []:
+        key, _, value = item.partition("=")
+        try:
+            config[key] = json.loads(value)
+        except json.JSONDecodeError:
+            config[key] = value
+    return config
+
+
+def run(nxyz=100000, ncomps=14, nsout=20, nsteps=10, config=None, wd=None, verbose=False):
+    """Run Mf6RTM.solve on the mocks and return the profile summary"""
+    components = ["H", "O", "Charge"] + [f"C{i}" for i in range(ncomps - 3)]
+    headers = ["time", "cell"] + [f"v{i}" for i in range(nsout - 2)]
+    cleanup = wd is None
+    wd = wd or tempfile.mkdtemp(prefix="mf6rtm_bench_solve_")
+
+    options = {"profile_enabled": True}
+    options.update(config or {})
+    MF6RTMConfig(**options).save_to_file(os.path.join(wd, "mf6rtm.toml"))
+
+    mf6api = MockMf6API((1, 1, nxyz), components, nsteps=nsteps)
+    phreeqcbmi = MockPhreeqcBMI(nxyz, components, headers)
+    stdout = None if verbose else open(os.devnull, "w")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stdout or sys.stdout):
+        mf6rtm = Mf6RTM(wd, mf6api, phreeqcbmi)
+        success = mf6rtm.solve()
+    wall_time = time.perf_counter() - start
+    if stdout is not None:
+        stdout.close()
+
+    fname = os.path.join(wd, mf6rtm.config.profile_fname)
+    with open(f"{os.path.splitext(fname)[0]}.summary.json") as f:
+        summary = json.load(f)
+    summary.update(success=success, wall_time=wall_time, nxyz=nxyz,
+                   ncomps=ncomps, nsout=nsout, config=config or {})
+    if cleanup:
+        shutil.rmtree(wd, ignore_errors=True)
+    return summary
+
+
+def main(nxyz=100000, ncomps=14, nsout=20, nsteps=10, config=None, out=None):
+    summary = run(nxyz, ncomps, nsout, nsteps, config)
+    print(f"nxyz={nxyz} ncomps={ncomps} nsout={nsout} nsteps={summary['nsteps']}")
+    print(f"{'stage':<15} | {'ms/step':>10} | {'max ms':>10} | {'fraction':>8}")
+    for key, t in sorted(summary["timings"].items(), key=lambda kv: -kv[1]["total"]):
+        print(f"{key:<15} | {t['mean'] * 1e3:10.3f} | {t['max'] * 1e3:10.3f} | "
+              f"{t['fraction']:8.1%}")
+    print(f"peak RSS {summary['peak_rss_mb']:.1f} MB")
+    if out:
+        with open(out, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nxyz", type=int, default=100000)
+    parser.add_argument("--ncomps", type=int, default=14)
+    parser.add_argument("--nsout", type=int, default=20,
+                        help="number of selected output columns")
+    parser.add_argument("--nsteps", type=int, default=10)
+    parser.add_argument("--set", dest="settings", action="append",
+                        help="MF6RTMConfig option as key=value")
+    parser.add_argument("--out", default=None, help="JSON file of the summary")
+    args = parser.parse_args()
+    main(args.nxyz, args.ncomps, args.nsout, args.nsteps,
+         parse_settings(args.settings), args.out)
@@ -0,0 +1,136 @@
+"""
+Benchmark of the concentration exchange between Modflow 6 and PhreeqcRM.
+
+Compares the legacy list-based transfer (``get_value``/``set_value`` copies,
+Python lists and ``np.reshape``) with the preallocated ConcentrationTransfer
+engine. The Modflow 6 and PhreeqcRM memory is emulated with numpy arrays so
+only the coupling overhead is measured.
+
+Usage::
+
+    python benchmark/perf/bench_transfer.py --nxyz 200000 --ncomps 14 --nsteps 10
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from mf6rtm.simulation.transfer import ConcentrationTransfer, CouplingTable
+from mf6rtm.utils import utils
+
+
+class CountingMf6:
+    """Emulates modflowapi memory access and counts bytes copied."""
+
+    def __init__(self, models, nxyz):
+        self.mem = {f"{m.upper()}/X": np.random.rand(nxyz) for m in models}
+        self.mem.update({f"{m}/FMI/GWFSAT": np.ones(nxyz) for m in models})
+        self.bytes_copied = 0
+
+    def get_var_address(self, var, model):
+        return f"{model}/{var}"
+
+    def get_value(self, address):
+        self.bytes_copied += self.mem[address].nbytes
+        return self.mem[address].copy()
+
+    def get_value_ptr(self, address):
+        return self.mem[address]
+
+    def set_value(self, address, value):
+        value = np.asarray(value)
+        self.bytes_copied += value.nbytes
+        self.mem[address][:] = value
+
+
+class CountingPhreeqc:
+    """Emulates PhreeqcRM concentration access and counts bytes copied."""
+
+    def __init__(self, ncomps, nxyz):
+        self.concentrations = np.random.rand(ncomps * nxyz)
+        self.bytes_copied = 0
+
+    def SetConcentrations(self, c):
+        c = np.asarray(c, dtype=np.float64)
+        self.bytes_copied += c.nbytes
+        self.concentrations[:] = c
+
+    def GetConcentrations(self):
+        self.bytes_copied += self.concentrations.nbytes
+        return self.concentrations.copy()
+
+    def get_value_ptr(self, name):
+        return self.concentrations
+
+
+def legacy_step(mf6, phreeqc, components, model_dict, nxyz, charge_offset=0.0):
+    """One exchange in both directions as done by the list-based transfer"""
+    mf6_conc_array = []
+    for c in components:
+        x = mf6.get_value(mf6.get_var_address("X", model_dict[c].upper()))
+        if c.lower() == "charge":
+            x = x - charge_offset
+        mf6_conc_array.append(utils.concentration_m3_to_l(x))
+    c_dbl_vect = np.reshape(mf6_conc_array, nxyz * len(components))
+    phreeqc.SetConcentrations(c_dbl_vect)
+
+    c_dbl_vect = phreeqc.GetConcentrations()
+    conc = [c_dbl_vect[i : i + nxyz] for i in range(0, len(c_dbl_vect), nxyz)]
+    for i, c in enumerate(components):
+        value = utils.concentration_l_to_m3(conc[i])
+        if c.lower() == "charge":
+            value = value + charge_offset
+        mf6.set_value(f"{model_dict[c].upper()}/X", value)
+
+
+def engine_step(transfer):
+    """One exchange in both directions through the ConcentrationTransfer"""
+    transfer.to_phreeqcrm()
+    transfer.to_mf6()
+
+
+def measure(step, nsteps, counters):
+    """Return seconds, API bytes copied and temporary bytes allocated per step"""
+    for counter in counters:
+        counter.bytes_copied = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(nsteps):
+        step()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    copied = sum(counter.bytes_copied for counter in counters)
+    return elapsed / nsteps, copied / nsteps, peak
+
+
+def main(nxyz=100000, ncomps=14, nsteps=10):
+    components = ["H", "O", "Charge"] + [f"C{i}" for i in range(ncomps - 3)]
+    model_dict = {c: c.lower() for c in components}
+    mf6 = CountingMf6(model_dict.values(), nxyz)
+    phreeqc = CountingPhreeqc(ncomps, nxyz)
+
+    results = {}
+    results["legacy"] = measure(
+        lambda: legacy_step(mf6, phreeqc, components, model_dict, nxyz),
+        nsteps, [mf6, phreeqc],
+    )
+    table = CouplingTable.build(mf6, components, model_dict)
+    transfer = ConcentrationTransfer(table, phreeqc, nxyz)
+    results["engine"] = measure(lambda: engine_step(transfer), nsteps, [mf6, phreeqc])
+
+    print(f"nxyz={nxyz} ncomps={ncomps} nsteps={nsteps}")
+    print(f"{'transfer':<10} | {'s/step':>10} | {'MB copied/step':>15} | {'MB peak temp':>13}")
+    for name, (sec, copied, peak) in results.items():
+        print(f"{name:<10} | {sec:10.4f} | {copied / 1e6:15.1f} | {peak / 1e6:13.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nxyz", type=int, default=100000)
+    parser.add_argument("--ncomps", type=int, default=14)
+    parser.add_argument("--nsteps", type=int, default=10)
+    args = parser.parse_args()
+    main(args.nxyz, args.ncomps, args.nsteps)
@@ -0,0 +1,235 @@
+"""
+Stand-ins for the Modflow 6 and PhreeqcRM interfaces used by Mf6RTM.
+
+MockMf6API and MockPhreeqcBMI subclass Mf6API and PhreeqcBMI without
+loading libmf6 or PhreeqcRM. The low level BMI calls return preallocated
+arrays instantly, while the Mf6API and PhreeqcBMI methods called by the
+solver (``_prepare_mf6``, ``_solve_gwt``, ``_solve_phreeqcrm``, ...) are
+the real ones, so a run of ``Mf6RTM.solve`` through them measures the
+Python coupling overhead only.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from mf6rtm.simulation.mf6api import Mf6API
+from mf6rtm.simulation.phreeqcbmi import PhreeqcBMI
+from mf6rtm.simulation.profiler import NULL_PROFILER
+
+
+def _data(value):
+    """Object with a flopy-like get_data method"""
+    return SimpleNamespace(get_data=lambda: value)
+
+
+class MockSimulation:
+    """Minimal flopy MFSimulation with a DIS flow model and one gwt6 model
+    per component."""
+
+    def __init__(self, shape, model_names, time_units="days"):
+        nlay, nrow, ncol = shape
+        dis = SimpleNamespace(nlay=_data(nlay), nrow=_data(nrow), ncol=_data(ncol))
+        grid_type = SimpleNamespace(name="DIS")
+        self.models = {"gwf": SimpleNamespace(model_type="gwf6", dis=dis,
+                                              get_grid_type=lambda: grid_type)}
+        for name in model_names:
+            self.models[name] = SimpleNamespace(model_type="gwt6", dis=dis,
+                                                get_grid_type=lambda: grid_type)
+        self.model_names = list(self.models)
+        self.tdis = SimpleNamespace(time_units=_data(time_units))
+        # one solution per transport model, the flow model is not solved
+        rows = [("ims6", f"{name}.ims", name) for name in model_names]
+        self.name_file = SimpleNamespace(solutiongroup=_data({0: rows}))
+
+    def get_model(self, name):
+        return self.models[name]
+
+
+class MockMf6API(Mf6API):
+    """Modflow 6 API returning preallocated arrays.
+
+    Parameters
+    ----------
+    shape : tuple
+        (nlay, nrow, ncol) of the grid.
+    components : list
+        Component names, one transport model each.
+    nsteps : int, optional
+        Number of time steps of the simulation. Default is 10.
+    dt : float, optional
+        Length of the first time step in days. Default is 1.0.
+    tsmult : float, optional
+        Multiplier of the time step length. Default is 1.0.
+    """
+    def __init__(self, shape, components, nsteps=10, dt=1.0, tsmult=1.0):
+        # libmf6 is not loaded, Mf6API.__init__ is not called
+        nxyz = int(np.prod(shape))
+        self.sim = MockSimulation(shape, components)
+        self.fmi = False
+        self.profiler = NULL_PROFILER
+        self.dt = dt
+        self.tsmult = tsmult
+        self.nsteps = nsteps
+        self.mem = {"TDIS/KPER": np.ones(1, dtype=np.int32),
+                    "TDIS/KSTP": np.zeros(1, dtype=np.int32),
+                    "TDIS/DELT": np.array([dt]),
+                    "TDIS/TOTIM": np.zeros(1),
+                    "TDIS/PERTIM": np.zeros(1)}
+        self.mem["GWF/X"] = np.ones(nxyz)
+        self.mem["GWF/XOLD"] = np.ones(nxyz)
+        for i, name in enumerate(components):
+            self.mem[f"{name.upper()}/X"] = np.full(nxyz, 1.0 + i)
+            self.mem[f"{name.upper()}/XOLD"] = np.full(nxyz, 1.0 + i)
+            self.mem[f"{name.upper()}/FMI/GWFSAT"] = np.ones(nxyz)
+            self.mem[f"SLN_{i + 1}/MXITER"] = np.array([25], dtype=np.int32)
+        self.nsolutions = len(components)
+
+    def __del__(self):
+        pass
+
+    def get_var_address(self, var_name, component_name, subcomponent_name=""):
+        parts = [component_name, subcomponent_name, var_name]
+        return "/".join(p.upper() for p in parts if p)
+
+    def get_value(self, name, dest=None):
+        value = self.mem[name]
+        if dest is None:
+            return value.copy()
+        dest[...] = value
+        return dest
+
+    def get_value_ptr(self, name):
+        return self.mem[name]
+
+    def set_value(self, name, values):
+        self.mem[name][...] = values
+
+    def get_subcomponent_count(self):
+        return self.nsolutions
+
+    def get_current_time(self):
+        return float(self.mem["TDIS/TOTIM"][0])
+
+    def get_end_time(self):
+        if self.tsmult == 1.0:
+            return self.nsteps * self.dt
+        return self.dt * (self.tsmult ** self.nsteps - 1.0) / (self.tsmult - 1.0)
+
+    def get_time_step(self):
+        return float(self.mem["TDIS/DELT"][0])
+
+    def prepare_time_step(self, dt):
+        # like libmf6 the time step length comes from TDIS, not from dt,
+        # and later steps are tsmult times the length left in TDIS
+        delt = self.mem["TDIS/DELT"]
+        if self.mem["TDIS/KSTP"][0] == 0:
+            delt[0] = self.dt
+        else:
+            delt[0] *= self.tsmult
+        self.mem["TDIS/TOTIM"][0] += delt[0]
+        self.mem["TDIS/PERTIM"][0] += delt[0]
+        self.mem["TDIS/KSTP"][0] += 1
+
+    def prepare_solve(self, component_id=1):
+        pass
+
+    def solve(self, component_id=1):
+        return True
+
+    def finalize_solve(self, component_id=1):
+        pass
+
+    def finalize_time_step(self):
+        pass
+
+    def finalize(self):
+        pass
+
+
+class MockPhreeqcBMI(PhreeqcBMI):
+    """PhreeqcRM BMI returning preallocated arrays.
+
+    Parameters
+    ----------
+    nxyz : int
+        Number of cells.
+    components : list
+        Component names.
+    sout_headers : list
+        Selected output headings, the first one is the time.
+    """
+    def __init__(self, nxyz, components, sout_headers):
+        # PhreeqcRM is not loaded, PhreeqcBMI.__init__ is not called
+        self.nxyz = nxyz
+        self._components = np.array(components)
+        self._sout_headers = list(sout_headers)
+        self.concentrations = np.full(len(components) * nxyz, 1e-3)
+        self.selected_output = np.zeros(len(sout_headers) * nxyz)
+        self.time_conversion = 1.0
+        self.sat_now = None
+        self.compact = False
+        self.profiler = NULL_PROFILER
+
+    def get_value_ptr(self, name):
+        if name == "Components":
+            return self._components
+        if name == "Concentrations":
+            return self.concentrations
+        raise KeyError(name)
+
+    def set_scalar(self, var_name, value):
+        pass
+
+    def GetGridCellCount(self):
+        return self.nxyz
+
+    def GetGridToMap(self):
+        return np.arange(self.nxyz)
+
+    def GetSelectedOutputHeadings(self):
+        return self._sout_headers
+
+    def GetSelectedOutput(self):
+        return self.selected_output
+
+    def GetConcentrations(self):
+        return self.concentrations
+
+    def SetConcentrations(self, c):
+        self.concentrations[:] = c
+
+    def SetTimeConversion(self, value):
+        self.time_conversion = value
+
+    def GetTimeConversion(self):
+        return self.time_conversion
+
+    def SetTimeStep(self, dt):
+        pass
+
+    def SetSaturation(self, sat):
+        pass
+
+    def SetSelectedOutputOn(self, on):
+        pass
+
+    def SetPrintChemistryOn(self, *args):
+        pass
+
+    def SetScreenOn(self, on):
+        pass
+
+    def SetRebalanceByCell(self, on):
+        pass
+
+    def SetRebalanceFraction(self, fraction):
+        pass
+
+    def LogMessage(self, message):
+        pass
+
+    def update(self):
+        pass
+
+    def finalize(self):
+        pass
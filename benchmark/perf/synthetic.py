@@ -0,0 +1,284 @@
+"""
+Parameterized synthetic models built from the chemistry of the benchmark
+examples, for throughput measurements at production scale.
+
+The chemistry (solutions, reactants, database and selected output) of
+ex1 (calcite/dolomite), ex2 and ex3 (AMD) and ex4 (cation exchange) is
+reused on a grid of any size. Flow is steady from a constant head column
+injecting the inflow solution to a constant head column at the other end
+of the domain. The number of components can be increased with trace
+elements of the database, each adding a transport model to Modflow 6.
+"""
+import os
+import re
+from dataclasses import dataclass
+
+import flopy
+import numpy as np
+import pandas as pd
+
+from mf6rtm import mup3d
+from mf6rtm.utils import utils
+
+PERF_DIR = os.path.abspath(os.path.dirname(__file__))
+BENCHMARK_DIR = os.path.dirname(PERF_DIR)
+DATA_DIR = os.path.join(BENCHMARK_DIR, "data")
+DATABASE_DIR = os.path.join(BENCHMARK_DIR, "database")
+BIN_DIR = os.path.join(BENCHMARK_DIR, "bin")
+
+# trace elements added to scale the number of components, in order of use
+TRACERS = ["Br", "Li", "Rb", "Cs", "I", "B", "Sr", "Ba", "F", "Zn", "Ni", "Cd"]
+TRACER_CONC = (1e-9, 1e-6)  # background and inflow (mol/L)
+
+
+@dataclass(frozen=True)
+class Case:
+    """Chemistry and layout of a synthetic case.
+
+    Attributes
+    ----------
+    prefix : str
+        Prefix of the example files in ``benchmark/data``.
+    database : str
+        PHREEQC database file in ``benchmark/database``.
+    porosity : float
+        Porosity of the domain.
+    reactants : str
+        'equilibrium_phases' or 'exchange'.
+    bulk : bool
+        True if the phase amounts are given per bulk volume (conc_mol_l).
+    layout : str
+        Default grid layout, 'column' (1D) or 'section' (2D vertical).
+    """
+    prefix: str
+    database: str
+    porosity: float
+    reactants: str
+    bulk: bool = False
+    layout: str = "column"
+
+
+CASES = {
+    "ex1": Case("ex1", "pht3d_datab.dat", 0.32, "equilibrium_phases"),
+    "ex2": Case("ex2", "pht3d_datab_walter1994.dat", 0.35, "equilibrium_phases", bulk=True),
+    "ex3": Case("ex3", "pht3d_datab_walter1994.dat", 0.35, "equilibrium_phases", bulk=True,
+                layout="section"),
+    "ex4": Case("ex4", "pht3d_datab.dat", 1.0, "exchange"),
+}
+
+
+def grid_shape(nxyz, layout="column", nlay=10):
+    """(nlay, nrow, ncol) with at least nxyz cells for the layout"""
+    if layout == "column":
+        return 1, 1, int(nxyz)
+    if layout == "section":
+        nlay = min(nlay, int(nxyz))
+        return nlay, 1, int(np.ceil(nxyz / nlay))
+    if layout == "plan":
+        nrow = int(np.sqrt(nxyz))
+        return 1, nrow, int(np.ceil(nxyz / nrow))
+    raise ValueError(f"layout must be 'column', 'section' or 'plan', got '{layout}'")
+
+
+def database_elements(database):
+    """Element names of SOLUTION_MASTER_SPECIES in a PHREEQC database"""
+    elements = []
+    in_block = False
+    with open(database, errors="ignore") as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            # keywords are upper case, element names at most two letters
+            if re.match(r"^[A-Z_]{3,}$", line.split()[0]):
+                in_block = line.split()[0] == "SOLUTION_MASTER_SPECIES"
+                continue
+            if in_block:
+                name = line.split()[0]
+                if "(" not in name:
+                    elements.append(name)
+    return elements
+
+
+def tracers_for(database, nextra, exclude=()):
+    """First nextra trace elements available in the database"""
+    available = set(database_elements(database))
+    tracers = [t for t in TRACERS if t in available and t not in exclude]
+    assert nextra <= len(tracers), (
+        f"only {len(tracers)} trace elements available in {os.path.basename(database)}"
+    )
+    return tracers[:nextra]
+
+
+def load_solutions(case, nextra=0):
+    """Solutions of the case with nextra trace elements added"""
+    df = pd.read_csv(os.path.join(DATA_DIR, f"{case.prefix}_solutions.csv"),
+                     comment="#", index_col=0)
+    database = os.path.join(DATABASE_DIR, case.database)
+    exclude = {re.sub(r"\(.*\)", "", comp) for comp in df.index}
+    for tracer in tracers_for(database, nextra, exclude):
+        df.loc[tracer] = TRACER_CONC
+    return utils.solution_df_to_dict(df)
+
+
+def build_chemistry(case, name, wd, shape, nextra=0, config=None, nthread=1):
+    """Mup3d model of the case chemistry on a grid of the given shape.
+
+    Parameters
+    ----------
+    case : Case
+        The case definition.
+    name : str
+        Model name.
+    wd : os.PathLike
+        Model directory.
+    shape : tuple
+        (nlay, nrow, ncol) of the grid.
+    nextra : int, optional
+        Number of trace elements added as components. Default is 0.
+    config : dict, optional
+        MF6RTMConfig options of the run.
+    nthread : int, optional
+        Number of threads for the initialization.
+
+    Returns
+    -------
+    Mup3d
+        The initialized model with an inflow ChemStress 'chdin'.
+    """
+    nlay, nrow, ncol = shape
+    solution = mup3d.Solutions(load_solutions(case, nextra))
+    solution.set_ic(np.ones(shape, dtype=int))
+
+    model = mup3d.Mup3d(name, solution, nlay, nrow, ncol)
+    model.set_wd(wd)
+    model.set_database(os.path.join(DATABASE_DIR, case.database))
+    model.set_postfix(os.path.join(DATA_DIR, f"{case.prefix}_postfix.phqr"))
+
+    if case.reactants == "equilibrium_phases":
+        phases = pd.read_csv(os.path.join(DATA_DIR, f"{case.prefix}_equilibrium_phases.csv"))
+        if case.bulk:
+            phases["conc_mol_lb"] = [utils.concentration_volbulk_to_volwater(i, case.porosity)
+                                     for i in phases["conc_mol_l"].values]
+        phases = mup3d.EquilibriumPhases(utils.parse_equilibriums_dataframe(phases))
+        phases.set_ic(np.ones(shape, dtype=int))
+        model.set_equilibrium_phases(phases)
+    else:
+        excdf = pd.read_csv(os.path.join(DATA_DIR, f"{case.prefix}_exchange.csv"),
+                            comment="#", index_col=0)
+        exchanger = mup3d.ExchangePhases({0: excdf.T.to_dict(index="comp")})
+        exchanger.set_equilibrate_solutions([1])
+        exchanger.set_ic(np.ones(shape, dtype=float))
+        model.set_exchange_phases(exchanger)
+
+    model.set_config(**(config or {}))
+    model.initialize(nthreads=nthread)
+
+    inflow = mup3d.ChemStress("chdin")
+    inflow.set_spd([2])
+    model.set_chem_stress(inflow)
+    return model
+
+
+def build_mf6(model, shape, nsteps, tstep=1.0, porosity=0.3, dispersivity=0.1,
+              bindir=BIN_DIR):
+    """Write the Modflow 6 flow and transport simulation of the model.
+
+    The domain has unit cells, a head drop of one across the columns and
+    the inflow chemistry at the first column.
+    """
+    nlay, nrow, ncol = shape
+    sim_ws = model.wd
+    sim = flopy.mf6.MFSimulation(sim_name=model.name, sim_ws=sim_ws, exe_name="mf6")
+    flopy.mf6.ModflowTdis(sim, nper=1, perioddata=[(nsteps * tstep, nsteps, 1.0)],
+                          time_units="days")
+    gwf = flopy.mf6.ModflowGwf(sim, modelname="gwf", save_flows=True)
+    ims = flopy.mf6.ModflowIms(sim, complexity="simple", linear_acceleration="CG",
+                               outer_dvclose=1e-6, inner_dvclose=1e-6,
+                               filename="gwf.ims")
+    sim.register_ims_package(ims, [gwf.name])
+
+    top = float(nlay)
+    botm = np.linspace(top, 0.0, nlay + 1)[1:]
+    idomain = np.ones(shape, dtype=int)
+    flopy.mf6.ModflowGwfdis(gwf, nlay=nlay, nrow=nrow, ncol=ncol, delr=1.0, delc=1.0,
+                            top=top, botm=botm, idomain=idomain).set_all_data_external()
+    flopy.mf6.ModflowGwfnpf(gwf, save_flows=True, save_saturation=True,
+                            save_specific_discharge=True, icelltype=0,
+                            k=10.0).set_all_data_external()
+    hin, hout = top + 1.0, top
+    strt = np.linspace(hin, hout, ncol)[None, None, :] * np.ones(shape)
+    flopy.mf6.ModflowGwfic(gwf, strt=strt)
+
+    inflow = list(model.chdin.data[0])
+    background = [0.0] * len(inflow)
+    chdspd = [[(k, i, 0), hin] + inflow for k in range(nlay) for i in range(nrow)]
+    chdspd += [[(k, i, ncol - 1), hout] + background for k in range(nlay) for i in range(nrow)]
+    flopy.mf6.ModflowGwfchd(gwf, maxbound=len(chdspd), stress_period_data=chdspd,
+                            auxiliary=model.components, pname="CHD",
+                            filename="gwf.chd").set_all_data_external()
+    flopy.mf6.ModflowGwfoc(gwf, budget_filerecord="gwf.cbb",
+                           saverecord=[("BUDGET", "ALL")])
+
+    for c in model.components:
+        gwt = flopy.mf6.MFModel(sim, model_type="gwt6", modelname=c,
+                                model_nam_file=f"{c}.nam")
+        ims = flopy.mf6.ModflowIms(sim, linear_acceleration="BICGSTAB",
+                                   outer_dvclose=1e-6, inner_dvclose=1e-6,
+                                   filename=f"{c}.ims")
+        sim.register_ims_package(ims, [gwt.name])
+        flopy.mf6.ModflowGwtdis(gwt, nlay=nlay, nrow=nrow, ncol=ncol, delr=1.0, delc=1.0,
+                                top=top, botm=botm, idomain=idomain).set_all_data_external()
+        flopy.mf6.ModflowGwtic(gwt, strt=model.sconc[c]).set_all_data_external()
+        flopy.mf6.ModflowGwtssm(gwt, sources=["chd", "aux", c]).set_all_data_external()
+        flopy.mf6.ModflowGwtadv(gwt, scheme="tvd")
+        flopy.mf6.ModflowGwtdsp(gwt, xt3d_off=True, alh=dispersivity,
+                                ath1=dispersivity * 0.1,
+                                atv=dispersivity * 0.1).set_all_data_external()
+        flopy.mf6.ModflowGwtmst(gwt, porosity=porosity).set_all_data_external()
+        flopy.mf6.ModflowGwtoc(gwt, concentration_filerecord=f"{c}.ucn",
+                               saverecord=[("CONCENTRATION", "LAST")])
+        flopy.mf6.ModflowGwfgwt(sim, exgtype="GWF6-GWT6", exgmnamea="gwf",
+                                exgmnameb=c, filename=f"{c}.gwfgwt")
+
+    sim.write_simulation(silent=True)
+    utils.prep_bins(sim_ws, src_path=bindir, get_only=["mf6", "libmf6"])
+    return sim
+
+
+def build(case_name, wd, nxyz, nsteps=10, nextra=0, layout=None, config=None,
+          nthread=1, bindir=BIN_DIR):
+    """Build a synthetic model of a case ready to run.
+
+    Parameters
+    ----------
+    case_name : str
+        One of ``CASES``.
+    wd : os.PathLike
+        Model directory.
+    nxyz : int
+        Minimum number of cells.
+    nsteps : int, optional
+        Number of time steps. Default is 10.
+    nextra : int, optional
+        Number of trace elements added as components. Default is 0.
+    layout : str, optional
+        Grid layout, defaults to the layout of the case.
+    config : dict, optional
+        MF6RTMConfig options of the run.
+    nthread : int, optional
+        Number of threads for the initialization.
+    bindir : os.PathLike, optional
+        Directory with the platform folders of the mf6 binaries.
+
+    Returns
+    -------
+    Mup3d
+        The model, to be run with ``Mup3d.run``.
+    """
+    case = CASES[case_name]
+    shape = grid_shape(nxyz, layout or case.layout)
+    model = build_chemistry(case, case_name, wd, shape, nextra=nextra,
+                            config=config, nthread=nthread)
+    build_mf6(model, shape, nsteps, porosity=case.porosity, bindir=bindir)
+    return model
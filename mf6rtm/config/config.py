@@ -21,11 +21,120 @@ class MF6RTMConfig:
         Controls when reactions are calculated. Options:
         - 'all' : Calculate reactions at all time steps (default)
         - 'user' : Calculate reactions only at user-specified time steps
-        - 'adaptive' : Use adaptive timing based on convergence criteria
+        - 'adaptive' : Calculate reactions when the estimated error of
+          skipping them exceeds ``adaptive_tolerance``, reacting the
+          accumulated transport steps over the combined dt
     tsteps : List[Tuple[int, int]], optional
         List of (kper, kstp) tuples specifying when reactions should be calculated.
         Only used when reaction_timing='user'. Default is empty list.
         kper is stress period (1-based), kstp is time step (1-based).
+    compact : bool, optional
+        If True, PhreeqcRM rebalances the workers by cell with a rebalance
+        fraction of 1.0 (``SetRebalanceFraction(1.0)``), so the partitions
+        follow the cell timings of the last step, where skipped cells take
+        no time. The chemistry cells are not compacted. Default is False.
+    adaptive_tolerance : float, optional
+        Relative error budget for skipping reactions when
+        reaction_timing='adaptive'. Default is 1e-2.
+    adaptive_max_tsteps : int, optional
+        Maximum number of transport steps reacted together when
+        reaction_timing='adaptive'. Default is 10.
+    adaptive_atol : float, optional
+        Absolute concentration (mol/L) added to the component scales of the
+        adaptive error estimate. Default is 1e-12.
+    fixed_components : List[str], optional
+        PhreeqcRM components that are not transported. Their transport
+        solutions are not solved and PhreeqcRM keeps their concentrations
+        from the previous chemistry step. Default is empty.
+    skip_atol : float, optional
+        Absolute tolerance (mol/L) of the transport change since the last
+        reaction step below which a cell is not sent to reactions, for all
+        components. Default is 0.0.
+    skip_rtol : float, optional
+        Relative tolerance of the transport change, for all components.
+        Cells react if the change of any component exceeds
+        ``skip_atol + skip_rtol * |c|``. The totals of H and O are not
+        checked, charge is checked against skip_atol only. Default is 0.0,
+        with both tolerances zero all cells react. Kinetic reactions of
+        skipped cells do not progress.
+    skip_tolerances : Dict[str, dict], optional
+        Tolerances of single components, e.g. ``{Fe = {atol = 1e-9,
+        rtol = 1e-3}}``, overriding skip_atol and skip_rtol. H and O are
+        checked if given. Default is empty.
+    output_format : str, optional
+        Selected output file format, 'csv' (sout.csv, default), 'binary'
+        (fixed-width records in sout.bin) or 'store' (chunked columnar
+        store in sout.store).
+    output_ring_size : int, optional
+        Number of last time steps of selected output kept in memory.
+        Default is 0 (disabled).
+    output_chunk_time : int, optional
+        Number of time steps per chunk of the 'store' format. Default is 64.
+    output_chunk_cells : int, optional
+        Number of cells per chunk of the 'store' format. Default is 65536.
+    output_async_buffers : int, optional
+        Number of buffers of the background thread writing the output while
+        the next time step is solved. Default is 0 (write on the main thread).
+    output_schedule : str, optional
+        Controls when selected output is calculated by PhreeqcRM and
+        written. Options:
+        - 'all' : At all time steps (default)
+        - 'every' : Every ``output_every`` time steps
+        - 'tsteps' : At the (kper, kstp) pairs in ``output_tsteps``
+        - 'times' : At the time steps ending at or just after the
+          simulation times in ``output_times``
+    output_every : int, optional
+        Output interval in time steps for output_schedule='every'.
+    output_tsteps : List[Tuple[int, int]], optional
+        List of 1-based (kper, kstp) pairs for output_schedule='tsteps'.
+    output_times : List[float], optional
+        List of simulation times for output_schedule='times'.
+    observations : Dict[str, list], optional
+        Named observation sets written at every time step to their own
+        selected output file (``sout_<name>``). Cells are 0-based node
+        numbers, (layer, row, col) tuples for DIS or (layer, cell2d)
+        tuples for DISV.
+    emulator_observations : List[str], optional
+        Names of observation sets the emulator training data is restricted
+        to, one file per set. Default is empty (all cells).
+    profile_enabled : bool, optional
+        Whether per time step timings and counters of the coupled solve are
+        recorded. Default is False.
+    profile_fname : str, optional
+        Name of the JSON Lines profile file in the model directory, one
+        record per time step. A summary is written to
+        ``<name>.summary.json``. Default is 'mf6rtm_profile.jsonl'.
+    profile_trace : bool, optional
+        Whether the nested spans of the coupled solve (transport solutions,
+        transfers, chemistry and output stages) are written as a Chrome
+        trace-event timeline. Default is False.
+    profile_trace_fname : str, optional
+        Name of the trace file in the model directory, viewable in
+        chrome://tracing, Perfetto or speedscope. Default is
+        'mf6rtm_trace.json'.
+    flow_steady : bool or str, optional
+        Whether the flow is solved once and the transport models are run
+        through the Flow Model Interface (FMI) against the saved heads and
+        flows. 'auto' does it only if the flow model is steady (no
+        transient storage, single stress period data). Default is False.
+    flow_cache : str, optional
+        Directory of the cached steady flow solutions, relative to the
+        model directory or absolute. Default is 'flow_cache'.
+    timestep_cutback : bool, optional
+        Whether a time step whose transport does not converge is restored
+        and retried in shorter coupled steps. Default is False.
+    timestep_cutback_factor : float, optional
+        Factor applied to the coupled step length after a failure.
+        Default is 0.5.
+    timestep_grow_factor : float, optional
+        Factor applied to the coupled step length after
+        ``timestep_grow_after`` converged steps, up to the Modflow 6 time
+        step. Default is 2.0.
+    timestep_grow_after : int, optional
+        Number of converged coupled steps before growing. Default is 3.
+    timestep_min_fraction : float, optional
+        Smallest coupled step as a fraction of the Modflow 6 time step,
+        steps failing at it are accepted unconverged. Default is 1e-3.
 
     Attributes
     ----------
@@ -44,6 +153,9 @@ class MF6RTMConfig:
 
         self._validate_reaction_timing()
         self._validate_tsteps()
+        self._validate_output_schedule()
+        self._validate_flow_steady()
+        self._validate_externalio_format()
 
     def _apply_defaults(self):
         """Apply default values for any missing attributes."""
@@ -52,9 +164,41 @@ class MF6RTMConfig:
             'reactive_timing': 'all',
             'reactive_tsteps': [],
             'reactive_externalio': False,
+            'reactive_externalio_zones': True,
+            'reactive_externalio_format': 'npy',
+            'reactive_compact': False,
+            'reactive_adaptive_tolerance': 1e-2,
+            'reactive_adaptive_max_tsteps': 10,
+            'reactive_adaptive_atol': 1e-12,
+            'reactive_fixed_components': [],
+            'reactive_skip_atol': 0.0,
+            'reactive_skip_rtol': 0.0,
+            'reactive_skip_tolerances': {},
             'emulator_training_data': False,
             'emulator_feature_variables': [],
             'emulator_target_variables': [],
+            'emulator_observations': [],
+            'output_format': 'csv',
+            'output_ring_size': 0,
+            'output_chunk_time': 64,
+            'output_chunk_cells': 65536,
+            'output_async_buffers': 0,
+            'output_schedule': 'all',
+            'output_every': 1,
+            'output_tsteps': [],
+            'output_times': [],
+            'observations': {},
+            'profile_enabled': False,
+            'profile_fname': 'mf6rtm_profile.jsonl',
+            'profile_trace': False,
+            'profile_trace_fname': 'mf6rtm_trace.json',
+            'flow_steady': False,
+            'flow_cache': 'flow_cache',
+            'timestep_cutback': False,
+            'timestep_cutback_factor': 0.5,
+            'timestep_grow_factor': 2.0,
+            'timestep_grow_after': 3,
+            'timestep_min_fraction': 1e-3,
         }
 
         # Apply defaults for any missing attributes
@@ -96,6 +240,74 @@ class MF6RTMConfig:
             normalized.insert(0, (1, 1))
 
 
+    def _validate_output_schedule(self):
+        """Validate output_schedule parameters."""
+        valid_options = ['all', 'every', 'tsteps', 'times']
+        if self.output_schedule not in valid_options:
+            raise ValueError(f"output_schedule must be one of {valid_options}, "
+                           f"got '{self.output_schedule}'")
+        if not isinstance(self.output_every, int) or self.output_every < 1:
+            raise ValueError("output_every must be a positive integer")
+        for i, tstep in enumerate(self.output_tsteps):
+            if not isinstance(tstep, (tuple, list)) or len(tstep) != 2:
+                raise ValueError(f"output_tsteps[{i}] must be a tuple/list of length 2")
+
+    def _validate_flow_steady(self):
+        """Validate flow_steady parameter."""
+        if self.flow_steady not in [True, False, 'auto']:
+            raise ValueError("flow_steady must be true, false or 'auto', "
+                           f"got '{self.flow_steady}'")
+
+    def _validate_externalio_format(self):
+        """Validate externalio_format parameter."""
+        valid_options = ['npy', 'txt']
+        if self.reactive_externalio_format not in valid_options:
+            raise ValueError(f"externalio_format must be one of {valid_options}, "
+                           f"got '{self.reactive_externalio_format}'")
+
+    def is_output_tstep(self, kper: int, kstp: int, kiter: int,
+                        ctime: float, dt: float) -> bool:
+        """Check if selected output is due at a specific time step.
+
+        Parameters
+        ----------
+        kper : int
+            Stress period number (1-based).
+        kstp : int
+            Time step number (1-based).
+        kiter : int
+            Time step counter over the whole simulation (0-based).
+        ctime : float
+            Simulation time at the start of the time step.
+        dt : float
+            Length of the time step.
+
+        Returns
+        -------
+        bool
+            True if selected output should be calculated and written.
+
+        Examples
+        --------
+        >>> config = MF6RTMConfig(output_schedule='every', output_every=5)
+        >>> config.is_output_tstep(1, 5, 4, 0.4, 0.1)
+        True
+        >>> config.is_output_tstep(1, 6, 5, 0.5, 0.1)
+        False
+        """
+        if self.output_schedule == 'all':
+            return True
+        elif self.output_schedule == 'every':
+            return (kiter + 1) % self.output_every == 0
+        elif self.output_schedule == 'tsteps':
+            return (kper, kstp) in {tuple(t) for t in self.output_tsteps}
+        elif self.output_schedule == 'times':
+            times = np.asarray(self.output_times, dtype=float)
+            etime = ctime + dt * (1.0 + 1e-9)
+            return bool(np.any((times > ctime) & (times <= etime)))
+        else:
+            return False
+
     def get_tsteps_for_period(self, kper: int) -> List[int]:
         """Get time steps for a specific stress period.
 
@@ -146,7 +358,7 @@ class MF6RTMConfig:
         elif self.reactive_timing == 'user':
             return (kper, kstp) in self.reactive_tsteps
         elif self.reactive_timing == 'adaptive':
-            # Placeholder for adaptive
+            # decided at run time by mf6rtm.simulation.timing.AdaptiveTiming
             return True
         else:
             return False
@@ -154,7 +366,7 @@ class MF6RTMConfig:
     def to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary for TOML output with nested structure."""
         result = {}
-        category_prefixes = ['reactive_', 'emulator_']  # generalized prefixes
+        category_prefixes = ['reactive_', 'emulator_', 'output_', 'profile_', 'flow_', 'timestep_']  # generalized prefixes
         category_groups = {prefix.rstrip('_'): {} for prefix in category_prefixes}
 
         for attr_name, value in self.__dict__.items():
@@ -287,8 +499,15 @@ class MF6RTMConfig:
                 'enabled': reactive_config.get('enabled', True),
                 'timing': reactive_config.get('timing', 'all'),
                 'tsteps': reactive_config.get('tsteps', []),
-                'externalio': reactive_config.get('externalio', False)
+                'externalio': reactive_config.get('externalio', False),
+                'compact': reactive_config.get('compact', False),
             }
+            # pass through any other reactive option, e.g. adaptive_*
+            for k, v in reactive_config.items():
+                kwargs['reactive'].setdefault(k, v)
+            # expose the reactive section as reactive_* attributes
+            for k, v in kwargs['reactive'].items():
+                kwargs[f'reactive_{k}'] = v
 
         if 'emulator' in config_dict:
             emu_config = config_dict['emulator']
@@ -297,8 +516,13 @@ class MF6RTMConfig:
                 'feature_variables': emu_config.get('feature_variables', None),
                 'target_variables': emu_config.get('target_variables', None)
             }
+        # observation sets are kept as a dictionary of cell lists
+        if 'observations' in config_dict:
+            kwargs['observations'] = dict(config_dict['observations'])
+
         # Flatten everything *except* 'reactive'
         remaining_dict = {k: v for k, v in config_dict.items() if k not in ['reactive',
+                                                                            'observations',
                                                                             # 'emulator'
                                                                             ]}
         flattened = flatten_dict(remaining_dict)
@@ -379,5 +603,8 @@ class MF6RTMConfig:
                 lines.append(f"    Period {kper}, Step {kstp}")
         elif self.reactive_timing == 'all':
             lines.append("  Reactions calculated at all time steps")
+        elif self.reactive_timing == 'adaptive':
+            lines.append(f"  Adaptive tolerance: {self.reactive_adaptive_tolerance}")
+            lines.append(f"  Adaptive max time steps: {self.reactive_adaptive_max_tsteps}")
 
         return '\n'.join(lines)
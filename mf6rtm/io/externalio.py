@@ -1,14 +1,19 @@
 """externalio to write outputs and to write and read phreeqcrm
-inputs from layered txt files.
+inputs from external .npy or layered txt files.
 """
+import io
 import os
+import math
+import shutil
 import numpy as np
 import pandas as pd
 from mf6rtm.simulation.mf6api import Mf6API
-from mf6rtm.simulation.discretization import grid_dimensions, total_cells_in_grid
+from mf6rtm.simulation.discretization import grid_dimensions
 from mf6rtm.config.yaml_reader import load_yaml_to_phreeqcrm
 from mf6rtm.config.config import MF6RTMConfig
-from mf6rtm.utils.utils import get_indices
+from mf6rtm.utils import utils
+from mf6rtm.io.soutio import (RingBuffer, CsvSoutWriter, BinarySoutWriter,
+                              ChunkedSoutWriter, AsyncSoutWriter, SOUT_FORMATS)
 
 ic_position = {
     'equilibrium_phases': 1,
@@ -19,12 +24,17 @@ ic_position = {
      'kinetic_phases':6,
 }
 
+def _format_5e(values, n):
+    """Format the first n values with '.5e' as in f-strings, at once"""
+    return np.char.mod('%.5e', np.asarray(values, dtype=np.float64)[:n]).tolist()
+
+
 class Regenerator:
     """
     A class to regenerate a Mup3d object from a script file.
     """
     def __init__(self, wd='.', phinp='phinp.dat',
-                 yamlfile='mf6rtm.yaml', dllfile='libmf6.dll'):
+                 yamlfile='mf6rtm.yaml', dllfile='libmf6.dll', zones=True):
         """
         Initialize the Regenerator with the working directory and phinp file.
 
@@ -32,14 +42,17 @@ class Regenerator:
             wd (str): Working directory where the phinp file is located.
             phinp (str): Name of the phinp file.
             yamlfile (str): Name of the YAML file to be used.
+            zones (bool): Write one block per distinct set of m0 values of
+                each phase type instead of one block per cell.
         """
         self.wd = os.path.abspath(wd)
         self.yamlfile = os.path.join(self.wd, yamlfile)
         self.phinp = phinp
+        self.zones = zones
         self.config = MF6RTMConfig.from_toml_file(os.path.join(self.wd, 'mf6rtm.toml')).to_dict()
         self.grid_shape = grid_dimensions(Mf6API(self.wd, os.path.join(self.wd, dllfile)))
         self.nlay = self.grid_shape[0]
-        self.nxyz = total_cells_in_grid(Mf6API(self.wd, os.path.join(self.wd, dllfile)))
+        self.nxyz = math.prod(self.grid_shape)
 
         # self.validate_external_files()
 
@@ -48,7 +61,8 @@ class Regenerator:
                                        phinpfile='phinp.dat',
                                        yamlfile='mf6rtm.yaml',
                                        dllfile='libmf6.dll',
-                                       prefix='_'):
+                                       prefix='_',
+                                       zones=True):
         """
         Class method to execute the regeneration process.
         """
@@ -56,8 +70,8 @@ class Regenerator:
             wd=wd,
             phinp=phinpfile,
             yamlfile=yamlfile,
-            dllfile=dllfile
-
+            dllfile=dllfile,
+            zones=zones
         )
         instance.write_new_script(filename=f"{prefix}{phinpfile}")
         instance.update_yaml(filename=f"{prefix}{yamlfile}")
@@ -71,18 +85,22 @@ class Regenerator:
         if not os.path.exists(phinp_path):
             raise FileNotFoundError(f"Required file '{self.phinp}' not found in working directory '{self.wd}'.")
 
+        # only the phase blocks, the other config sections are not phases
         for key, value in self.config.items():
-            if key not in ['reactive', 'emulator']:
+            if key in ic_position:
                 print(key)
                 if 'names' in self.config[key]:
                     names = self.config[key]['names']
                 else:
                     raise ValueError(f"Key '{key}' does not have 'names' attribute.")
                 for nme in names:
+                    file_path = os.path.join(self.wd, f"{key}.{nme}.m0.npy")
+                    if os.path.exists(file_path):
+                        continue
                     for lay in range(self.nlay):
                         file_path = os.path.join(self.wd, f"{key}.{nme}.m0.layer{lay+1}.txt")
-                    if not os.path.exists(file_path):
-                        raise FileNotFoundError(f"Required file '{file_path}' for key '{key}' not found in working directory '{self.wd}'.")
+                        if not os.path.exists(file_path):
+                            raise FileNotFoundError(f"Required file '{file_path}' for key '{key}' not found in working directory '{self.wd}'.")
 
     def read_phinp(self):
         with open(os.path.join(self.wd, self.phinp), 'r') as f:
@@ -111,13 +129,13 @@ class Regenerator:
         """
         yamlphreeqcrm, ic1 = load_yaml_to_phreeqcrm(self.yamlfile)
         ic1 = ic1.reshape(7, self.nxyz).T
-        ic1_phases = np.reshape(np.arange(1, self.nxyz + 1), self.nxyz)
 
-        phases = [i for i in self.config.keys() if 'phases' in i]
+        phases = [i for i in self.config.keys() if i in ic_position]
 
         for phase in phases:
             i = ic_position[phase]
-            ic1[:, i] = ic1_phases
+            # block number of each cell, see get_zones
+            ic1[:, i] = self.get_zones(phase)[0] + 1
 
         ic1_flatten = ic1.flatten('F')
 
@@ -158,126 +176,200 @@ class Regenerator:
         # + ''.join(postfix_block).strip()
         return postfix_block
 
-    def generate_new_script(self):
+    def _write_new_script(self, writer):
         """
-        Generate a new script based on the existing script and configuration.
+        Write the blocks of the new script to a utils.ScriptWriter.
         """
         script = self.read_phinp()
         solution_blocks = self.get_solution_blocks(script)
         postfix_block = self.get_postfix_block(script)
 
         # Create a new script with the solution blocks and postfix block
-        new_script = []
-        new_script.extend(solution_blocks)
+        writer.write(''.join(solution_blocks))
 
         # Add equilibrium phases, kinetic phases, and exchange blocks
-        sim_blocks = [key for key in self.config.keys() if key != 'reactive']
+        sim_blocks = [key for key in self.config.keys() if key in ic_position]
         block_generators = {
-            "equilibrium_phases": self.generate_equilibrium_phases_blocks,
-            "kinetic_phases": self.generate_kinetic_phases_blocks,
-            "exchange_phases": self.generate_exchange_phases_blocks
+            "equilibrium_phases": self._iter_equilibrium_phases_blocks,
+            "kinetic_phases": self._iter_kinetic_phases_blocks,
+            "exchange_phases": self._iter_exchange_phases_blocks
         }
         for block in sim_blocks:
             generator = block_generators.get(block)
             if generator is not None:
-                new_script.extend(generator())
-        new_script.extend(postfix_block)
-        self.regenerated_script = ''.join(new_script).strip()
+                for text in generator():
+                    writer.write(text)
+        writer.write(''.join(postfix_block))
+        writer.close()
+
+    def generate_new_script(self):
+        """
+        Generate a new script based on the existing script and configuration.
+        """
+        buffer = io.StringIO()
+        self._write_new_script(utils.ScriptWriter(buffer, strip=True))
+        self.regenerated_script = buffer.getvalue()
         return self.regenerated_script
 
     def write_new_script(self, filename='_phinp.dat'):
         """
-        Write the regenerated script to a file.
+        Write the regenerated script to a file. The blocks are streamed to
+        the file unless the script was already generated.
         """
-        if not hasattr(self, 'regenerated_script'):
-            self.generate_new_script()
-        with open(os.path.join(self.wd, filename), 'w') as f:
-            f.write(self.regenerated_script)
+        fname = os.path.join(self.wd, filename)
+        if hasattr(self, 'regenerated_script'):
+            with open(fname, 'w') as f:
+                f.write(self.regenerated_script)
+        else:
+            with open(fname, 'w', buffering=1 << 20) as f:
+                self._write_new_script(utils.ScriptWriter(f, strip=True))
         # print(f"New script written to {os.path.join(self.wd, filename)}")
-        self.regenerated_phinp = os.path.join(self.wd, filename)
+        self.regenerated_phinp = fname
         return self.regenerated_phinp
 
+    def _m0_columns(self, phase):
+        """
+        The m0 values of each name of a phase type formatted for all cells.
+        """
+        self.add_m0_to_config()
+        config = self.config.get(phase, {})
+        if not hasattr(self, '_columns'):
+            self._columns = {}
+        if phase not in self._columns:
+            self._columns[phase] = [_format_5e(config['m0'][nme].flatten(), self.nxyz)
+                                    for nme in config['names']]
+        return self._columns[phase]
+
+    def get_zones(self, phase):
+        """
+        Zones of the cells with the same m0 values of a phase type.
+
+        With ``zones`` on, one block is written per distinct row of the
+        formatted m0 values, numbered in order of the first cell of the zone,
+        and PhreeqcRM copies the block of its zone to each cell. Otherwise
+        each cell is its own zone.
+
+        Returns:
+            tuple: The (nxyz) zone of each cell (0-based) and the first cell
+            of each zone.
+        """
+        if not hasattr(self, '_zones'):
+            self._zones = {}
+        if phase not in self._zones:
+            if self.zones:
+                rows = np.array(self._m0_columns(phase)).reshape(-1, self.nxyz).T
+                _, first, inverse = np.unique(rows, axis=0, return_index=True,
+                                              return_inverse=True)
+                order = np.argsort(first)
+                rank = np.empty_like(order)
+                rank[order] = np.arange(order.size)
+                self._zones[phase] = (rank[inverse.ravel()], first[order])
+            else:
+                cells = np.arange(self.nxyz)
+                self._zones[phase] = (cells, cells)
+        return self._zones[phase]
+
     def generate_equilibrium_phases_blocks(self):
         """
         Generate equilibrium phases blocks from the config.
         """
-        self.add_m0_to_config()
-        equilibrium_phases = self.config.get('equilibrium_phases', {})
-        blocks = []
-
-        n_phases = self.nxyz
-        for i_phase in range(1, n_phases+1):
-            block = f"EQUILIBRIUM_PHASES {i_phase}\n"
-            for nme in equilibrium_phases['names']:
-                si = equilibrium_phases.get(f'si', None).get(nme, None)
-                m0 = equilibrium_phases.get(f'm0', None).get(nme, None).flatten()
-                block += f"    {nme} {si:.5e} {m0[i_phase-1]:.5e}\n"
-            block += "END\n"
-            blocks.append(block)
+        blocks = list(self._iter_equilibrium_phases_blocks())
         self.equilibrium_phases_blocks = blocks
         return blocks
 
+    def _iter_equilibrium_phases_blocks(self):
+        """
+        Yield the equilibrium phases block of each zone, the lines of all
+        cells are formatted from the m0 arrays at once.
+        """
+        columns = self._m0_columns('equilibrium_phases')
+        equilibrium_phases = self.config.get('equilibrium_phases', {})
+
+        lines = []
+        for nme, col in zip(equilibrium_phases['names'], columns):
+            si = equilibrium_phases.get(f'si', None).get(nme, None)
+            lines.append((f"    {nme} {si:.5e} ", col))
+        _, first = self.get_zones('equilibrium_phases')
+        for i_phase, cell in enumerate(first.tolist(), start=1):
+            yield (f"EQUILIBRIUM_PHASES {i_phase}\n"
+                   + "".join(f"{head}{col[cell]}\n" for head, col in lines)
+                   + "END\n")
+
     def generate_kinetic_phases_blocks(self):
         """
         Generate kinetic phases blocks from the config.
         """
-        self.add_m0_to_config()
-        kinetic_phases = self.config.get('kinetic_phases', {})
-        blocks = []
-
-        n_phases = self.nxyz
-        for i_phase in range(1, n_phases+1):
-            block = f"KINETICS {i_phase}\n"
-            for nme in kinetic_phases['names']:
-                # Get parameters for this kinetic phase
-                parms = kinetic_phases.get('parms', {}).get(nme, [])
-                m0 = kinetic_phases.get('m0', {}).get(nme, None).flatten()
-                # Start the kinetic phase line with name and initial moles
-                block += f"    {nme}\n"
-                block += f"        -m0 {m0[i_phase-1]:.5e}\n"
-                # Add parameters if they exist
-                if parms:
-                    parms_str = " ".join([f"{p:.5e}" for p in parms])
-                    block += f"        -parms {parms_str}\n"
-                # Add formula if it exists
-                formula = kinetic_phases.get('formula', {}).get(nme, None)
-                if formula:
-                    block += f"        -formula {formula}\n"
-            block += "END\n"
-            blocks.append(block)
+        blocks = list(self._iter_kinetic_phases_blocks())
         self.kinetic_phases_blocks = blocks
         return blocks
 
+    def _iter_kinetic_phases_blocks(self):
+        """
+        Yield the kinetic phases block of each zone, the lines of all cells
+        are formatted from the m0 arrays at once.
+        """
+        m0_lines = self._m0_columns('kinetic_phases')
+        kinetic_phases = self.config.get('kinetic_phases', {})
+
+        heads, tails = [], []
+        for nme in kinetic_phases['names']:
+            # Get parameters for this kinetic phase
+            parms = kinetic_phases.get('parms', {}).get(nme, [])
+            # Start the kinetic phase line with name and initial moles
+            heads.append(f"    {nme}\n        -m0 ")
+            tail = "\n"
+            # Add parameters if they exist
+            if parms:
+                parms_str = " ".join([f"{p:.5e}" for p in parms])
+                tail += f"        -parms {parms_str}\n"
+            # Add formula if it exists
+            formula = kinetic_phases.get('formula', {}).get(nme, None)
+            if formula:
+                tail += f"        -formula {formula}\n"
+            tails.append(tail)
+        _, first = self.get_zones('kinetic_phases')
+        for i_phase, cell in enumerate(first.tolist(), start=1):
+            yield (f"KINETICS {i_phase}\n"
+                   + "".join(head + col[cell] + tail
+                             for head, col, tail in zip(heads, m0_lines, tails))
+                   + "END\n")
+
     def generate_exchange_phases_blocks(self):
         """
         Generate exchange blocks from the config.
         """
-        self.add_m0_to_config()
-        exchange = self.config.get('exchange_phases', {})
-        blocks = []
-
-        n_phases = self.nxyz
-        for i_phase in range(1, n_phases+1):
-            block = f"EXCHANGE {i_phase}\n"
-            for nme in exchange['names']:
-                m0 = exchange.get('m0', {}).get(nme, None).flatten()
-                block += f"    {nme} {m0[i_phase-1]:.5e}\n"
-            # Hard code equilibrate 1 as requested
-            block += "    -equilibrate 1\n"
-            block += "END\n"
-            blocks.append(block)
+        blocks = list(self._iter_exchange_phases_blocks())
         self.exchange_blocks = blocks
         return blocks
 
+    def _iter_exchange_phases_blocks(self):
+        """
+        Yield the exchange block of each zone, the lines of all cells are
+        formatted from the m0 arrays at once.
+        """
+        columns = self._m0_columns('exchange_phases')
+        exchange = self.config.get('exchange_phases', {})
+
+        lines = [(f"    {nme} ", col) for nme, col in zip(exchange['names'], columns)]
+        _, first = self.get_zones('exchange_phases')
+        for i_phase, cell in enumerate(first.tolist(), start=1):
+            # Hard code equilibrate 1 as requested
+            yield (f"EXCHANGE {i_phase}\n"
+                   + "".join(f"{head}{col[cell]}\n" for head, col in lines)
+                   + "    -equilibrate 1\nEND\n")
+
     def read_external_files(self):
         """
         Read the external files required for regeneration using numpy.
+        The {key}.{name}.m0.npy files are memory-mapped, the layered txt
+        files are read if there is no .npy file.
         Returns a dictionary with the loaded arrays organized by key, name, and layer.
         """
         file_data = {}
         # Read phase files following the same logic as validate_external_files
+        # only the phase blocks, the other config sections are not phases
         for key, value in self.config.items():
-            if key not in ['reactive', 'emulator']:
+            if key in ic_position:
                 if 'names' not in self.config[key]:
                     print(f"Warning: Key '{key}' does not have 'names' attribute, skipping.")
                     continue
@@ -285,6 +377,14 @@ class Regenerator:
                 file_data[key] = {}
 
                 for nme in names:
+                    file_path = os.path.join(self.wd, f"{key}.{nme}.m0.npy")
+                    if os.path.exists(file_path):
+                        array_data = np.load(file_path, mmap_mode='r')
+                        assert array_data.size == self.nxyz, \
+                            f"{file_path} has {array_data.size} values, expected {self.nxyz}"
+                        file_data[key][nme] = array_data.reshape(self.grid_shape)
+                        continue
+
                     layer_arrays = []
 
                     # Load all layers for this name
@@ -312,9 +412,8 @@ class Regenerator:
                                 # Stack arrays along the first axis (layers)
                                 merged_array = np.stack(valid_arrays, axis=0)
 
-                                # Reshape to grid dimensions
-                                nlay, nrow, ncol = self.grid_shape
-                                reshaped_array = merged_array.reshape(nlay, nrow, ncol)
+                                # Reshape to grid dimensions, DIS or DISV
+                                reshaped_array = merged_array.reshape(self.grid_shape)
 
                                 file_data[key][nme] = reshaped_array
                             else:
@@ -358,6 +457,77 @@ class SelectedOutput:
         self.mf6api = mf6rtm.mf6api
         self.sout_fname = "sout.csv"
         self.get_selected_output_on = True
+        self.sout_format = "csv"
+        self.ring_size = 0
+        self.ring = None
+        self.chunk_time = 64
+        self.chunk_cells = 65536
+        self.async_buffers = 0
+        self._writer = None
+        self._current_sout = None
+        # selected output of the last reaction step, skipped cells keep the
+        # output of the step they last reacted
+        self._sout_k = None
+        # cells reacted since their selected output was last calculated
+        self._sout_stale = None
+        self.observations = {}
+        self.ml_observations = []
+        self._obs_writers = {}
+
+    def set_observations(self, observations, ml_observations=None) -> None:
+        """Set the named observation sets written at every time step.
+
+        Parameters
+        ----------
+        observations : dict[str, np.ndarray]
+            Node numbers (0-based) of each observation set.
+        ml_observations : list of str, optional
+            Names of the observation sets the Machine Learning arrays are
+            restricted to, one file per set. Default is all cells.
+        """
+        self.observations = {
+            name: np.asarray(nodes, dtype=np.int64) for name, nodes in observations.items()
+        }
+        ml_observations = list(ml_observations or [])
+        for name in ml_observations:
+            assert name in self.observations, f"observation set '{name}' not found"
+        self.ml_observations = ml_observations
+
+    def set_format(self, sout_format="csv", ring_size=0, chunk_time=64,
+                   chunk_cells=65536, async_buffers=0) -> None:
+        """Set the selected output file format and ring buffer size.
+
+        Parameters
+        ----------
+        sout_format : str
+            'csv' writes sout.csv, 'binary' writes fixed-width records to
+            sout.bin with the column names in sout.bin.json, 'store' writes
+            a chunked columnar store to the sout.store directory, read with
+            mf6rtm.io.soutio.SoutStore.
+        ring_size : int
+            Number of last time steps kept in memory in ``self.ring``,
+            0 to disable.
+        chunk_time : int
+            Number of time steps per chunk of the 'store' format.
+        chunk_cells : int
+            Number of cells per chunk of the 'store' format.
+        async_buffers : int
+            Number of buffers of the asynchronous writer thread that writes
+            the output while the next time step is solved, 0 to write on
+            the main thread. Observation sets are written on the same
+            thread.
+        """
+        assert sout_format in SOUT_FORMATS, f"sout format must be one of {SOUT_FORMATS}"
+        self.sout_format = sout_format
+        self.sout_fname = {
+            "csv": "sout.csv",
+            "binary": "sout.bin",
+            "store": "sout.store",
+        }[sout_format]
+        self.ring_size = ring_size
+        self.chunk_time = chunk_time
+        self.chunk_cells = chunk_cells
+        self.async_buffers = async_buffers
 
     def write_ml_arrays(self, conc_array, iter,
                         add_var_names=None,
@@ -373,36 +543,54 @@ class SelectedOutput:
         add_var_names : list of str, optional
             Extra PHREEQC variables to include.
         fname : str
-            Output filename (relative to model wd).
+            Output filename (relative to model wd). If ``ml_observations``
+            is set, one file per observation set prefixed with its name.
         """
-
+        if self.ml_observations:
+            for name in self.ml_observations:
+                self._write_ml_arrays(conc_array, iter, add_var_names,
+                                      f"{name}{fname}", self.observations[name])
+        else:
+            self._write_ml_arrays(conc_array, iter, add_var_names, fname)
+
+    def _write_ml_arrays(self, conc_array, iter, add_var_names, fname,
+                         nodes=None) -> None:
+        """Write the Machine Learning arrays of all cells or of the given
+        node numbers"""
+        nxyz = self.mf6rtm.nxyz
+        sel = slice(None) if nodes is None else nodes
+        cells = np.arange(nxyz) if nodes is None else nodes
         # Base arrays and labels
         cols = ["time", "cell", "saturation"] + list(self.phreeqcbmi.components)
         arrays = [
-            np.full((self.mf6rtm.nxyz, 1), self.mf6rtm.ctime),
-            np.arange(self.mf6rtm.nxyz).reshape(-1, 1),
-            self.mf6rtm.get_saturation_from_mf6().reshape(-1, 1),
-            np.reshape(conc_array, (self.phreeqcbmi.ncomps, self.mf6rtm.nxyz)).T
+            np.full((len(cells), 1), self.mf6rtm.ctime),
+            cells.reshape(-1, 1),
+            self.mf6rtm.get_saturation_from_mf6()[sel].reshape(-1, 1),
+            np.reshape(conc_array, (self.phreeqcbmi.ncomps, nxyz))[:, sel].T
         ]
 
         # Optional PHREEQC selected outputs
         if add_var_names:
             col_idx = [self.phreeqcbmi.soutdf.columns.get_loc(c) for c in add_var_names]
-            sout = self.phreeqcbmi.GetSelectedOutput().reshape(-1, self.mf6rtm.nxyz)
-            arrays.append(sout[col_idx, :].T)
+            sout = self.phreeqcbmi.GetSelectedOutput().reshape(-1, nxyz)
+            arrays.append(sout[col_idx][:, sel].T)
             cols.extend(add_var_names)
 
         arr = np.hstack(arrays)
         header_str = ",".join(cols)
 
-        # Write
+        # Write, on the writer thread if asynchronous output is on
+        self._submit(self._savetxt_ml_arrays,
+                     os.path.join(self.mf6rtm.wd, fname), arr, header_str,
+                     iter == 0)
+
+    @staticmethod
+    def _savetxt_ml_arrays(fname, arr, header_str, write_header) -> None:
+        """Append the Machine Learning arrays to a CSV file"""
         fmt = ["%.6f", "%d"] + ["%.10e"] * (arr.shape[1] - 2)
-        fname = os.path.join(self.mf6rtm.wd, fname)
 
         # flag for writing headers
-        write_header = False
-        if iter == 0:
-            write_header = True
+        if write_header:
             try:
                 os.remove(fname)
             except FileNotFoundError:
@@ -413,73 +601,173 @@ class SelectedOutput:
                     header=header_str if write_header else "",
                     comments="", fmt=fmt)
 
+    def _submit(self, func, *args) -> None:
+        """Call func on the writer thread if asynchronous output is on"""
+        if isinstance(self._writer, AsyncSoutWriter):
+            self._writer.submit(func, *args)
+        else:
+            func(*args)
+
     def _update_selected_output(self) -> None:
-        """Update the selected output dataframe and save to attribute"""
+        """Update the selected output of the current time step, only the
+        current step is held (plus the ring buffer if enabled)"""
         self._get_selected_output()
-        updf = pd.concat(
-            [
-                self.phreeqcbmi.soutdf.astype(self._current_soutdf.dtypes),
-                self._current_soutdf,
-            ]
-        )
-        self._update_soutdf(updf)
+        if self.ring_size > 0:
+            if self.ring is None:
+                self.ring = RingBuffer(self.ring_size, *self._current_sout.shape)
+            self.ring.append(self._current_sout)
 
     def __replace_inactive_cells_in_sout(self, sout, diffmask):
-        """Function to replace inactive cells in the selected output dataframe"""
-        # match headers in components closest string
+        """Function to replace inactive cells in the selected output array"""
+        skip = np.logical_not(diffmask)
+        sout[:, skip] = self._sout_k[:, skip]
+        return sout
 
-        inactive_idx = get_indices(0, diffmask)
+    def has_stale_output(self, dry) -> bool:
+        """True if cells reacted since their selected output was last
+        calculated, other than dry and inactive cells"""
+        if not self.get_selected_output_on or self._sout_stale is None:
+            return False
+        return bool(np.any(self._sout_stale & ~np.asarray(dry, dtype=bool)))
 
-        sout[:, inactive_idx] = self._sout_k[:, inactive_idx]
-        return sout
+    def get_reaction_mask(self, diffmask, dry, selected_output_on) -> np.ndarray:
+        """Cells sent to reactions at a reaction step.
 
-    def _get_selected_output(self) -> None:
-        """Get the selected output from phreeqc bmi and replace skipped reactive cells with previous conc"""
-        # selected ouput
+        The selected output is only calculated at the reaction steps that
+        need it. Cells reacted at steps without selected output have no
+        output of their last reaction, so they are reacted again at the next
+        step calculating it, even if the tolerances skip them.
+
+        Parameters
+        ----------
+        diffmask : np.ndarray
+            The (nxyz) mask of the cells sent to reactions.
+        dry : np.ndarray
+            The (nxyz) mask of the dry and inactive cells, never reacted.
+        selected_output_on : bool
+            True if the selected output is calculated at this step.
+
+        Returns
+        -------
+        np.ndarray
+            The (nxyz) mask of the cells sent to reactions.
+        """
+        if not (selected_output_on and self.has_stale_output(dry)):
+            return diffmask
+        stale = self._sout_stale & ~np.asarray(dry, dtype=bool)
+        return np.logical_or(diffmask, stale)
+
+    def _update_reacted_output(self, selected_output_on) -> None:
+        """Update the selected output after a reaction step, the skipped
+        cells keep the output of the step they last reacted"""
+        reacted = np.asarray(self.mf6rtm.diffmask, dtype=bool)
+        if self._sout_stale is None:
+            self._sout_stale = np.zeros(self.mf6rtm.nxyz, dtype=bool)
+        if not selected_output_on:
+            self._sout_stale |= reacted
+            return
         self.phreeqcbmi.set_scalar("NthSelectedOutput", 0)
         sout = self.phreeqcbmi.GetSelectedOutput()
         sout = sout.reshape(-1, self.mf6rtm.nxyz)
 
-        if self.mf6rtm._check_inactive_cells_exist(self.mf6rtm.diffmask) and hasattr(self, "_sout_k"):
+        if self.mf6rtm._check_inactive_cells_exist(self.mf6rtm.diffmask) and self._sout_k is not None:
             sout = self.__replace_inactive_cells_in_sout(sout, self.mf6rtm.diffmask)
         self._sout_k = sout  # save sout to a private attribute
+        self._sout_stale &= ~reacted
+
+    def _get_selected_output(self) -> None:
+        """Get the selected output of the last reaction step, from phreeqc
+        bmi before the first reaction step"""
+        if self._sout_k is None:
+            self.phreeqcbmi.set_scalar("NthSelectedOutput", 0)
+            sout = self.phreeqcbmi.GetSelectedOutput()
+            sout = sout.reshape(-1, self.mf6rtm.nxyz)
+        else:
+            sout = self._sout_k.copy()
         # add time to selected ouput
-        sout[0] = np.ones_like(sout[0]) * (self.mf6rtm.ctime + self.mf6rtm.time_step)
-        df = pd.DataFrame(columns=self.phreeqcbmi.soutdf.columns)
-        for col, arr in zip(df.columns, sout):
-            df[col] = arr
-        self._current_soutdf = df
+        sout[0] = self.mf6rtm.ctime + self.mf6rtm.time_step
+        self._current_sout = sout
 
-    def _update_soutdf(self, df: pd.DataFrame) -> None:
-        """Update the selected output dataframe to phreeqcrm object"""
-        self.phreeqcbmi.soutdf = df
+    @property
+    def _current_soutdf(self) -> pd.DataFrame:
+        """Selected output of the current time step as a dataframe"""
+        return pd.DataFrame(self._current_sout.T, columns=self.phreeqcbmi.sout_headers)
 
     def _check_sout_exist(self) -> bool:
         """Check if selected output file exists"""
         return os.path.exists(os.path.join(self.mf6rtm.wd, self.sout_fname))
 
+    def _open_writer(self, fname, headers, nxyz, asynchronous=True):
+        """Open a selected output writer in the selected format, on the
+        writer thread if asynchronous output is on and asynchronous"""
+        fname = os.path.join(self.mf6rtm.wd, fname)
+        if self.sout_format == "binary":
+            writer = BinarySoutWriter(fname, headers, nxyz)
+        elif self.sout_format == "store":
+            writer = ChunkedSoutWriter(
+                fname, headers, nxyz,
+                chunk_time=self.chunk_time, chunk_cells=self.chunk_cells,
+            )
+        else:
+            writer = CsvSoutWriter(fname, headers)
+        if asynchronous and self.async_buffers > 0:
+            writer = AsyncSoutWriter(
+                writer, (len(headers), nxyz), nbuffers=self.async_buffers,
+            )
+        return writer
+
+    def _obs_fname(self, name) -> str:
+        """Selected output file name of an observation set"""
+        stem, ext = os.path.splitext(self.sout_fname)
+        return f"{stem}_{name}{ext}"
+
     def _write_sout_headers(self) -> None:
-        """Write selected output headers to a file"""
-        with open(os.path.join(self.mf6rtm.wd, self.sout_fname), "w") as f:
-            f.write(",".join(self.phreeqcbmi.sout_headers))
-            f.write("\n")
+        """Open the selected output files and write the headers"""
+        headers = list(self.phreeqcbmi.sout_headers)
+        self._writer = self._open_writer(self.sout_fname, headers, self.mf6rtm.nxyz)
+        # observation sets have a node column after the time column, they
+        # are written through the writer thread of the full grid output
+        obs_headers = headers[:1] + ["node"] + headers[1:]
+        self._obs_writers = {
+            name: self._open_writer(self._obs_fname(name), obs_headers, len(nodes),
+                                    asynchronous=False)
+            for name, nodes in self.observations.items()
+        }
+
+    def _append_observations(self) -> None:
+        """Append the current selected output of the observation cells to
+        the file of each observation set"""
+        assert self._current_sout is not None, "current sout is empty"
+        sout = self._current_sout
+        for name, nodes in self.observations.items():
+            obs = np.empty((sout.shape[0] + 1, len(nodes)), dtype=sout.dtype)
+            obs[0] = sout[0, nodes]
+            obs[1] = nodes
+            obs[2:] = sout[1:, nodes]
+            self._submit(self._obs_writers[name].write, obs)
+
+    def _close(self) -> None:
+        """Close the selected output files"""
+        # the writer thread finishes the queued observation writes first
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for writer in self._obs_writers.values():
+            writer.close()
+        self._obs_writers = {}
 
     def _rm_sout_file(self) -> None:
         """Remove the selected output file"""
+        fname = os.path.join(self.mf6rtm.wd, self.sout_fname)
         try:
-            os.remove(os.path.join(self.mf6rtm.wd, self.sout_fname))
+            if os.path.isdir(fname):
+                shutil.rmtree(fname)
+            else:
+                os.remove(fname)
         except:
             pass
 
     def _append_to_soutdf_file(self) -> None:
         """Append the current selected output to the selected output file"""
-        assert not self._current_soutdf.empty, "current sout is empty"
-        self._current_soutdf.to_csv(
-            os.path.join(self.mf6rtm.wd, self.sout_fname), mode="a", index=False, header=False
-        )
-
-    def _export_soutdf(self) -> None:
-        """Export the selected output dataframe to a csv file"""
-        self.phreeqcbmi.soutdf.to_csv(
-            os.path.join(self.mf6rtm.wd, self.sout_fname), index=False
-        )
+        assert self._current_sout is not None, "current sout is empty"
+        self._writer.write(self._current_sout)
@@ -0,0 +1,467 @@
+"""soutio to stream PhreeqcRM selected output to disk one time step at
+a time, with an optional in-memory ring buffer of the last time steps.
+
+The binary format stores one fixed-width record per time step. A record is
+the ``(ncols, nxyz)`` selected output array in C order, so column ``j`` of
+record ``k`` starts at byte ``(k * ncols + j) * nxyz * itemsize``. The
+columns, nxyz and dtype are written to a ``.json`` sidecar file.
+
+The store format is a directory with one subdirectory per selected output
+column holding ``.npy`` chunks of ``chunk_time`` time steps by
+``chunk_cells`` cells, named ``t{time chunk}_c{cell chunk}.npy``, and an
+``index.json`` file with the columns, grid size, chunk sizes and times.
+"""
+import os
+import json
+import queue
+import threading
+import numpy as np
+import pandas as pd
+
+SOUT_FORMATS = ['csv', 'binary', 'store']
+
+
+class RingBuffer:
+    """Preallocated buffer holding the selected output of the last time steps.
+
+    Parameters
+    ----------
+    size : int
+        Number of time steps kept in memory.
+    ncols : int
+        Number of selected output columns.
+    nxyz : int
+        Total number of cells in the grid.
+    """
+    def __init__(self, size, ncols, nxyz, dtype=np.float64):
+        assert size > 0, "ring buffer size must be positive"
+        self.size = size
+        self.data = np.empty((size, ncols, nxyz), dtype=dtype)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, sout):
+        """Copy the selected output of a time step into the buffer"""
+        np.copyto(self.data[self.count % self.size], sout)
+        self.count += 1
+
+    def last(self, n=None):
+        """Return a copy of the last n time steps, oldest first.
+
+        Parameters
+        ----------
+        n : int, optional
+            Number of time steps, default is all the steps held.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n, ncols, nxyz).
+        """
+        n = len(self) if n is None else min(n, len(self))
+        idx = [(self.count - n + i) % self.size for i in range(n)]
+        return self.data[idx]
+
+
+class CsvSoutWriter:
+    """Append the selected output of each time step to a csv file.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the csv file.
+    headers : list of str
+        Selected output column names.
+    """
+    def __init__(self, fname, headers):
+        self.fname = fname
+        self.headers = list(headers)
+        self._file = open(fname, "w", newline="")
+        self._file.write(",".join(self.headers))
+        self._file.write("\n")
+        self._file.flush()
+
+    def write(self, sout):
+        """Write the (ncols, nxyz) selected output array of a time step"""
+        df = pd.DataFrame(sout.T, columns=self.headers)
+        df.to_csv(self._file, index=False, header=False)
+
+    def close(self):
+        self._file.close()
+
+
+class BinarySoutWriter:
+    """Append the selected output of each time step as a fixed-width record.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the binary file.
+    headers : list of str
+        Selected output column names.
+    nxyz : int
+        Total number of cells in the grid.
+    dtype : str or np.dtype, optional
+        Data type of the records, default is float64.
+    """
+    def __init__(self, fname, headers, nxyz, dtype=np.float64):
+        self.fname = fname
+        self.headers = list(headers)
+        self.nxyz = nxyz
+        self.dtype = np.dtype(dtype)
+        with open(f"{fname}.json", "w") as f:
+            json.dump(
+                {"columns": self.headers, "nxyz": nxyz, "dtype": self.dtype.str},
+                f,
+                indent=2,
+            )
+        self._file = open(fname, "wb")
+        self.nrecords = 0
+
+    def write(self, sout):
+        """Write the (ncols, nxyz) selected output array of a time step"""
+        assert sout.shape == (len(self.headers), self.nxyz), "selected output shape mismatch"
+        np.ascontiguousarray(sout, dtype=self.dtype).tofile(self._file)
+        self.nrecords += 1
+
+    def close(self):
+        self._file.close()
+
+
+class AsyncSoutWriter:
+    """Serialize the selected output on a background writer thread.
+
+    Each time step is copied into a free buffer of a preallocated pool and
+    queued for the thread, so the main thread continues with the next
+    transport solve while the previous step is written. When the disk falls
+    behind and no buffer is free, ``write`` blocks until the thread releases
+    one (backpressure). Errors raised on the thread are raised again on the
+    main thread at the next ``write``, ``submit`` or ``close``.
+
+    Parameters
+    ----------
+    writer : CsvSoutWriter, BinarySoutWriter or ChunkedSoutWriter
+        The writer called on the background thread.
+    shape : tuple[int, int]
+        Shape (ncols, nxyz) of the selected output array.
+    nbuffers : int, optional
+        Number of buffers in the pool, which also bounds the queue.
+        Default is 2.
+    """
+    def __init__(self, writer, shape, nbuffers=2, dtype=np.float64):
+        assert nbuffers > 0, "number of buffers must be positive"
+        self.writer = writer
+        self._free = queue.Queue()
+        for _ in range(nbuffers):
+            self._free.put(np.empty(shape, dtype=dtype))
+        self._jobs = queue.Queue(maxsize=nbuffers)
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="mf6rtm-sout-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        """Writer thread loop, a None job stops the thread"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            func, args, buf = job
+            try:
+                if self._error is None:
+                    func(*args)
+            except BaseException as e:
+                self._error = e
+            finally:
+                if buf is not None:
+                    self._free.put(buf)
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError("selected output writer thread failed") from self._error
+
+    def write(self, sout):
+        """Snapshot the (ncols, nxyz) selected output array and queue it"""
+        self._raise_error()
+        buf = self._free.get()
+        np.copyto(buf, sout)
+        self._jobs.put((self.writer.write, (buf,), buf))
+
+    def submit(self, func, *args):
+        """Queue a call on the writer thread, the arguments must not be
+        modified by the caller afterwards"""
+        self._raise_error()
+        self._jobs.put((func, args, None))
+
+    def close(self):
+        """Wait for the queued writes and close the writer"""
+        self._jobs.put(None)
+        self._thread.join()
+        self.writer.close()
+        self._raise_error()
+
+
+def read_binary_sout(fname):
+    """Memory map a binary selected output file.
+
+    Parameters
+    ----------
+    fname : str
+        Path of the binary file.
+
+    Returns
+    -------
+    tuple[np.memmap, list of str]
+        Array of shape (ntimes, ncols, nxyz) and the column names.
+    """
+    with open(f"{fname}.json") as f:
+        meta = json.load(f)
+    ncols = len(meta["columns"])
+    nxyz = meta["nxyz"]
+    dtype = np.dtype(meta["dtype"])
+    nrec = os.path.getsize(fname) // (ncols * nxyz * dtype.itemsize)
+    if nrec == 0:
+        return np.empty((0, ncols, nxyz), dtype=dtype), meta["columns"]
+    data = np.memmap(fname, dtype=dtype, mode="r", shape=(nrec, ncols, nxyz))
+    return data, meta["columns"]
+
+
+def binary_sout_to_dataframe(fname):
+    """Read a binary selected output file into a dataframe laid out as the
+    csv selected output (one row per cell and time step)"""
+    data, columns = read_binary_sout(fname)
+    arr = data.transpose(0, 2, 1).reshape(-1, len(columns))
+    return pd.DataFrame(arr, columns=columns)
+
+
+def _column_dirname(icol, column):
+    """Directory name of a store column, safe for any PHREEQC heading"""
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in column)
+    return f"{icol:03d}_{safe}"
+
+
+class ChunkedSoutWriter:
+    """Write the selected output to a chunked columnar store.
+
+    Each time step is written directly into the memory mapped ``.npy`` chunks
+    of the current time chunk, so memory does not grow with the number of
+    time steps or with the chunk size. The index is written when a time chunk
+    is complete and on close, so a store read during the run holds the
+    complete time chunks.
+
+    Parameters
+    ----------
+    path : str
+        Path of the store directory.
+    headers : list of str
+        Selected output column names.
+    nxyz : int
+        Total number of cells in the grid.
+    chunk_time : int, optional
+        Number of time steps per chunk, default is 64.
+    chunk_cells : int, optional
+        Number of cells per chunk, default is 65536.
+    dtype : str or np.dtype, optional
+        Data type of the chunks, default is float64.
+    """
+    def __init__(self, path, headers, nxyz, chunk_time=64, chunk_cells=65536,
+                 dtype=np.float64):
+        assert chunk_time > 0 and chunk_cells > 0, "chunk sizes must be positive"
+        self.path = path
+        self.headers = list(headers)
+        self.nxyz = nxyz
+        self.chunk_time = chunk_time
+        self.chunk_cells = min(chunk_cells, nxyz)
+        self.dtype = np.dtype(dtype)
+        self.dirnames = [_column_dirname(i, c) for i, c in enumerate(self.headers)]
+        self.cell_bounds = [
+            (c0, min(c0 + self.chunk_cells, nxyz))
+            for c0 in range(0, nxyz, self.chunk_cells)
+        ]
+        for d in self.dirnames:
+            os.makedirs(os.path.join(path, d), exist_ok=True)
+        self.times = []
+        self._chunks = None
+        self._write_index()
+
+    def _open_chunks(self, tchunk):
+        """Create the memory mapped chunks of a time chunk"""
+        self._chunks = [
+            [
+                np.lib.format.open_memmap(
+                    os.path.join(self.path, d, f"t{tchunk}_c{ic}.npy"),
+                    mode="w+",
+                    dtype=self.dtype,
+                    shape=(self.chunk_time, c1 - c0),
+                )
+                for ic, (c0, c1) in enumerate(self.cell_bounds)
+            ]
+            for d in self.dirnames
+        ]
+
+    def _flush_chunks(self):
+        """Flush and release the chunks of the current time chunk"""
+        if self._chunks is not None:
+            for col in self._chunks:
+                for mm in col:
+                    mm.flush()
+            self._chunks = None
+
+    def _write_index(self):
+        """Write the store index"""
+        index = {
+            "columns": self.headers,
+            "dirnames": self.dirnames,
+            "nxyz": self.nxyz,
+            "dtype": self.dtype.str,
+            "chunk_time": self.chunk_time,
+            "chunk_cells": self.chunk_cells,
+            "times": self.times,
+        }
+        with open(os.path.join(self.path, "index.json"), "w") as f:
+            json.dump(index, f)
+
+    def write(self, sout, time=None):
+        """Write the (ncols, nxyz) selected output array of a time step.
+
+        Parameters
+        ----------
+        sout : np.ndarray
+            Selected output array of the time step.
+        time : float, optional
+            Time of the step, default is the first selected output column.
+        """
+        assert sout.shape == (len(self.headers), self.nxyz), "selected output shape mismatch"
+        tchunk, it = divmod(len(self.times), self.chunk_time)
+        if it == 0:
+            self._flush_chunks()
+            self._open_chunks(tchunk)
+        for col, chunks in zip(sout, self._chunks):
+            for (c0, c1), mm in zip(self.cell_bounds, chunks):
+                mm[it] = col[c0:c1]
+        self.times.append(float(sout[0, 0] if time is None else time))
+        if it == self.chunk_time - 1:
+            self._flush_chunks()
+            self._write_index()
+
+    def close(self):
+        self._flush_chunks()
+        self._write_index()
+
+
+class SoutStore:
+    """Read (time, cell, variable) slices of a chunked selected output store.
+
+    Only the chunks touched by a query are memory mapped and read.
+
+    Parameters
+    ----------
+    path : str
+        Path of the store directory.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            index = json.load(f)
+        self.columns = index["columns"]
+        self.dirnames = index["dirnames"]
+        self.nxyz = index["nxyz"]
+        self.dtype = np.dtype(index["dtype"])
+        self.chunk_time = index["chunk_time"]
+        self.chunk_cells = index["chunk_cells"]
+        self.times = np.array(index["times"], dtype=np.float64)
+        self.ntimes = len(self.times)
+
+    def _icol(self, var):
+        """Column index of a variable name or index"""
+        if isinstance(var, (int, np.integer)):
+            return int(var)
+        return self.columns.index(var)
+
+    def _chunk(self, icol, tchunk, cchunk):
+        """Memory map a chunk"""
+        fname = os.path.join(self.path, self.dirnames[icol], f"t{tchunk}_c{cchunk}.npy")
+        return np.load(fname, mmap_mode="r")
+
+    def time_index(self, time):
+        """Index of the time step closest to a simulation time"""
+        return int(np.argmin(np.abs(self.times - time)))
+
+    def get(self, var, time=None, cell=None):
+        """Read a slice of one variable.
+
+        Parameters
+        ----------
+        var : str or int
+            Selected output column name or index.
+        time : int, slice or array-like of int, optional
+            Time step indices, default is all time steps.
+        cell : int, slice or array-like of int, optional
+            Cell indices (0-based), default is all cells.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (ntime, ncell), with the dimensions of integer
+            selections dropped.
+        """
+        icol = self._icol(var)
+        tidx = np.arange(self.ntimes)[slice(None) if time is None else time]
+        cidx = np.arange(self.nxyz)[slice(None) if cell is None else cell]
+        out = np.empty((np.size(tidx), np.size(cidx)), dtype=self.dtype)
+        tflat = np.atleast_1d(tidx)
+        cflat = np.atleast_1d(cidx)
+        tchunks = tflat // self.chunk_time
+        cchunks = cflat // self.chunk_cells
+        for tc in np.unique(tchunks):
+            trows = np.nonzero(tchunks == tc)[0]
+            for cc in np.unique(cchunks):
+                ccols = np.nonzero(cchunks == cc)[0]
+                chunk = self._chunk(icol, tc, cc)
+                out[np.ix_(trows, ccols)] = chunk[np.ix_(
+                    tflat[trows] - tc * self.chunk_time,
+                    cflat[ccols] - cc * self.chunk_cells,
+                )]
+        return out.reshape(np.shape(tidx) + np.shape(cidx))
+
+    def select(self, time=None, cell=None, var=None):
+        """Read a (time, cell, variable) block.
+
+        Parameters
+        ----------
+        time : int, slice or array-like of int, optional
+            Time step indices, default is all time steps.
+        cell : int, slice or array-like of int, optional
+            Cell indices (0-based), default is all cells.
+        var : list of str or int, optional
+            Selected output columns, default is all columns.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (ntime, ncell, nvar).
+        """
+        var = self.columns if var is None else var
+        tidx = np.atleast_1d(np.arange(self.ntimes)[slice(None) if time is None else time])
+        cidx = np.atleast_1d(np.arange(self.nxyz)[slice(None) if cell is None else cell])
+        return np.stack([self.get(v, tidx, cidx) for v in var], axis=-1)
+
+    def breakthrough(self, var, cell):
+        """Times and values of one variable at one cell.
+
+        Parameters
+        ----------
+        var : str or int
+            Selected output column name or index.
+        cell : int
+            Cell index (0-based).
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The times and the values at each time step.
+        """
+        return self.times, self.get(var, cell=int(cell))
@@ -6,6 +6,7 @@ import os
 import warnings
 import phreeqcrm
 import shutil
+import hashlib
 import numpy as np
 
 warnings.filterwarnings("ignore")
@@ -17,7 +18,9 @@ from contextlib import contextmanager
 
 from mf6rtm.simulation.solver import solve
 from mf6rtm.utils import utils
+from mf6rtm.utils.database import DatabaseIndex
 from mf6rtm.config import MF6RTMConfig
+from mf6rtm.mup3d import cache
 
 
 class Block:
@@ -355,8 +358,12 @@ class Mup3d(object):
         self.phreeqc_rm = None
         self.sconc = None
         self.phinp = None
+        self.phinp_sha256 = None
         self.components = None
         self.fixed_components = None
+        self.idomain = None
+        self.init_cache = cache.CACHE_DIR
+        self.solution_library = None
         self.componenth2o = False
         self.config = MF6RTMConfig() #default config
 
@@ -433,9 +440,84 @@ class Mup3d(object):
         -------
         None
         """
-        # FIXME: implemented but commented in main coupling loop
         self.fixed_components = fixed_components
 
+    def set_idomain(self, idomain):
+        """Set the Modflow 6 idomain of the grid. Cells with idomain < 1 are
+        not chemistry cells in PhreeqcRM.
+
+        Parameters
+        ----------
+        idomain : array_like
+            Integer array of the grid shape or of size nxyz.
+        Returns
+        -------
+        None
+        """
+        idomain = np.asarray(idomain, dtype=int)
+        assert idomain.size == self.nxyz, f'idomain must have {self.nxyz} cells, not {idomain.size}'
+        self.idomain = np.reshape(idomain, self.grid_shape)
+
+    def get_grid_to_chem_mapping(self):
+        """Mapping of grid cells to PhreeqcRM chemistry cells, with inactive
+        cells of idomain mapped to -1.
+
+        Returns
+        -------
+        np.ndarray or None
+            The (nxyz) mapping, None if idomain is not set or all cells are
+            active.
+        """
+        if self.idomain is None:
+            return None
+        active = np.reshape(self.idomain, self.nxyz) > 0
+        if active.all():
+            return None
+        grid2chem = np.full(self.nxyz, -1, dtype=int)
+        grid2chem[active] = np.arange(np.count_nonzero(active))
+        return grid2chem
+
+    def set_init_cache(self, init_cache):
+        """Set the directory of the initial equilibration cache.
+
+        Initial equilibrations are stored by the hash of the PHREEQC script,
+        the database, the unique initial conditions and the PhreeqcRM
+        settings, and reused by ``initialize`` when these do not change.
+
+        Parameters
+        ----------
+        init_cache : str or None
+            Directory relative to wd or absolute, e.g. a user directory
+            shared by several models. None disables the cache.
+        Returns
+        -------
+        None
+        """
+        self.init_cache = init_cache
+        self.solution_library = None
+
+    def get_ic_to_chem_mapping(self, ic1):
+        """Mapping of grid cells to one chemistry cell per unique combination
+        of initial conditions, with inactive cells of idomain mapped to -1.
+
+        Parameters
+        ----------
+        ic1 : np.ndarray
+            The (nxyz, 7) initial condition numbers of the grid cells.
+
+        Returns
+        -------
+        np.ndarray
+            The (nxyz) mapping. Grid cells with the same row of ic1 share a
+            chemistry cell.
+        """
+        grid2chem = self.get_grid_to_chem_mapping()
+        active = np.ones(self.nxyz, dtype=bool) if grid2chem is None else grid2chem >= 0
+        _, inverse = np.unique(ic1[active], axis=0, return_inverse=True)
+        ic2chem = np.full(self.nxyz, -1, dtype=int)
+        ic2chem[active] = np.reshape(inverse, -1)
+        return ic2chem
+
     def set_initial_temp(self, temp):
         """Sets the initial temperature for the MF6RTM model.
 
@@ -646,21 +728,25 @@ class Mup3d(object):
         Returns
         -------
         str
-            The generated PHREEQC script as a string.
+            The path of the phinp file. Its hash is kept in
+            ``self.phinp_sha256`` for the initial equilibration cache.
         """
 
         # where to save the phinp file
         filename = os.path.join(self.wd, 'phinp.dat')
         self.phinp = filename
+        # solutions of a previous script are not valid
+        self.solution_library = None
         # assert that database in self.database exists
         assert os.path.exists(self.database), f'{self.database} not found inside the model dir'
 
+        # names of the database blocks, the database is parsed once
+        dbindex = DatabaseIndex.load(self.database)
+
         # Check if all compounds are in the database
-        names = utils.get_compound_names(self.database)
+        names = set(dbindex.names('SOLUTION_MASTER_SPECIES'))
         assert all([key in names for key in self.solutions.data.keys() if key not in ["pH", "pe"]]), f'Not all compounds are in the database - check: {", ".join([key for key in self.solutions.data.keys() if key not in names and key not in ["pH", "pe"]])}'
 
-        script = ""
-
         # Convert single values to lists
         for key, value in self.solutions.data.items():
             if not isinstance(value, list):
@@ -673,77 +759,96 @@ class Mup3d(object):
         # Get the number of solutions
         num_solutions = len(next(iter(self.solutions.data.values())))
 
-        # Initialize the list of previous concentrations and phases
+        # blocks are streamed to a temporary file, replaced when complete
+        tmpname = f'{filename}.tmp'
+        try:
+            with open(tmpname, 'w', buffering=1 << 20) as file:
+                script = utils.ScriptWriter(file, charge_species=["pH"] if add_charge_flag else None)
+                self._write_phreeqc_blocks(script, dbindex, num_solutions)
+                script.close()
+            os.replace(tmpname, filename)
+        finally:
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+        self.phinp_sha256 = script.sha256
+        return filename
+
+    def _write_phreeqc_blocks(self, script, dbindex, num_solutions):
+        """Write the blocks of the phinp file.
 
+        Parameters
+        ----------
+        script : utils.ScriptWriter
+            The writer of the phinp file.
+        dbindex : DatabaseIndex
+            The index of the database.
+        num_solutions : int
+            Number of solutions.
+        Returns
+        -------
+        None
+        """
         for i in range(num_solutions):
             # Get the current concentrations and phases
             concentrations = {species: values[i] for species, values in self.solutions.data.items()}
-            script += utils.handle_block(concentrations, utils.generate_solution_block, i, temp=self.init_temp, water=1)
+            script.write_block(concentrations, utils.generate_solution_block, i, temp=self.init_temp, water=1)
 
         # check if self.equilibrium_phases is not None
         if self.equilibrium_phases is not None:
+            names = set(dbindex.names('PHASES'))
             for i in self.equilibrium_phases.data.keys():
                 # Get the current   phases
                 phases = self.equilibrium_phases.data[i]
                 # check if all equilibrium phases are in the database
-                names = utils.get_compound_names(self.database, 'PHASES')
                 assert all([key in names for key in phases.keys()]), 'Following phases are not in database: '+', '.join(f'{key}' for key in phases.keys() if key not in names)
 
                 # Handle the  EQUILIBRIUM_PHASES blocks
-                script += utils.handle_block(phases, utils.generate_equ_phases_block, i)
+                script.write_block(phases, utils.generate_equ_phases_block, i)
 
         # check if self.exchange_phases is not None
         if self.exchange_phases is not None:
+            names = set(dbindex.names('EXCHANGE'))
             for i in self.exchange_phases.data.keys():
                 # Get the current   phases
                 phases = self.exchange_phases.data[i]
                 # check if all equilibrium phases are in the database
-                names = utils.get_compound_names(self.database, 'EXCHANGE')
                 assert all([key in names for key in phases.keys()]), 'Following phases are not in database: '+', '.join(f'{key}' for key in phases.keys() if key not in names)
                 assert self.exchange_phases.eq_solutions is not None, 'No equilibrate solutions defined'
                 assert isinstance(self.exchange_phases.eq_solutions, (list, np.ndarray)), "exchange_phases.eq_solutions must be a list or numpy array"
                 assert len(self.exchange_phases.data.keys()) == len(self.exchange_phases.eq_solutions), "Mismatch between number of exchangers and eq_solutions"
                 # Handle the  EQUILIBRIUM_PHASES blocks
-                script += utils.handle_block(phases, utils.generate_exchange_block, i, equilibrate_solutions=self.exchange_phases.eq_solutions[i])
+                script.write_block(phases, utils.generate_exchange_block, i, equilibrate_solutions=self.exchange_phases.eq_solutions[i])
 
         # check if self.kinetic_phases is not None
         if self.kinetic_phases is not None:
+            names = set()
+            for blocknme in ['PHASES', 'SOLUTION_MASTER_SPECIES']:
+                names.update(dbindex.names(blocknme))
             for i in self.kinetic_phases.data.keys():
                 # Get the current   phases
                 phases = self.kinetic_phases.data[i]
                 # check if all kinetic phases are in the database
-                names = []
-                for blocknme in ['PHASES', 'SOLUTION_MASTER_SPECIES']:
-                    names += utils.get_compound_names(self.database, blocknme)
-
                 assert all([key in names for key in phases.keys()]), 'Following phases are not in database: '+', '.join(f'{key}' for key in phases.keys() if key not in names)
 
-                script += utils.handle_block(phases, utils.generate_kinetics_block, i)
+                script.write_block(phases, utils.generate_kinetics_block, i)
 
         if self.surfaces_phases is not None:
+            names = set(dbindex.names('SURFACE_MASTER_SPECIES'))
             for i in self.surfaces_phases.data.keys():
                 # Get the current   phases
                 phases = self.surfaces_phases.data[i]
                 # check if all surfaces are in the database
-                names = utils.get_compound_names(self.database, 'SURFACE_MASTER_SPECIES')
                 assert all([key in names for key in phases.keys()]), 'Following phases are not in database: '+', '.join(f'{key}' for key in phases.keys() if key not in names)
-                script += utils.handle_block(phases, utils.generate_surface_block, i, options=self.surfaces_phases.options)
+                script.write_block(phases, utils.generate_surface_block, i, options=self.surfaces_phases.options)
 
         # add end of line before postfix
-        script += utils.endmainblock
+        script.write(utils.endmainblock)
 
         # Append the postfix file to the script
         if self.postfix is not None and os.path.isfile(self.postfix):
             with open(self.postfix, 'r') as source:  # Open the source file in read mode
-                script += '\n'
-                script += source.read()
-
-        if add_charge_flag:
-            script = utils.add_charge_flag_to_species_in_solution(script)
-
-        with open(filename, 'w') as file:
-            file.write(script)
-        return script
+                script.write('\n')
+                script.write(source.read())
 
     def initialize(self, nthreads=1, add_charge_flag=False):
         """Initialize a PhreeqcRM object and calculate initial concentrations.
@@ -769,9 +874,11 @@ class Mup3d(object):
             Dictionary with components as keys and concentration arrays (mol/m^3) as values,
             structured to match the shape of the Modflow6 model domain grid.
         phreeqc_rm : PhreeqcRM
-            Initialized PhreeqcRM object.
+            Initialized PhreeqcRM object, not created if the initial
+            equilibration is found in the cache (see ``set_init_cache``).
         nchem : int
-            Number of chemistry cells.
+            Number of chemistry cells equilibrated, one per unique combination
+            of initial conditions.
 
         Returns
         -------
@@ -783,7 +890,9 @@ class Mup3d(object):
         1. Generates PHREEQC input script
         2. Initializes PhreeqcRM object
         3. Sets up initial conditions
-        4. Calculates initial concentrations
+        4. Calculates initial concentrations of the unique combinations of
+           initial conditions, or loads them from the cache, and maps them
+           to the grid cells
         5. Converts concentrations to proper units and grid structure
         """
         # get model dis info
@@ -791,8 +900,105 @@ class Mup3d(object):
 
         # create phinp
         # check if phinp.dat is in wd
-        phinp = self.generate_phreeqc_script(add_charge_flag=add_charge_flag)
+        self.generate_phreeqc_script(add_charge_flag=add_charge_flag)
+
+        ic1 = np.ones((self.nxyz, 7), dtype=int)*-1
+
+        # this gets a column slice
+        ic1[:, 0] = np.reshape(self.solutions.ic, self.nxyz)
+
+        if isinstance(self.equilibrium_phases, EquilibriumPhases):
+            ic1[:, 1] = np.reshape(self.equilibrium_phases.ic, self.nxyz)
+        if isinstance(self.exchange_phases, ExchangePhases):
+            ic1[:, 2] = np.reshape(self.exchange_phases.ic, self.nxyz)  # Exchange
+        if isinstance(self.surfaces_phases, Surfaces):
+            ic1[:, 3] = np.reshape(self.surfaces_phases.ic, self.nxyz)  # Surface
+        ic1[:, 4] = -1  # Gas phase
+        ic1[:, 5] = -1  # Solid solutions
+        if isinstance(self.kinetic_phases, KineticPhases):
+            ic1[:, 6] = np.reshape(self.kinetic_phases.ic, self.nxyz)  # Kinetics
+
+        ic1_flatten = ic1.flatten('F')
+
+        # set initial conditions as attribute but in a new sub class
+        self.ic1 = ic1
+        self.ic1_flatten = ic1_flatten
+
+        # cells with the same initial conditions are equilibrated once,
+        # inactive cells of idomain are not chemistry cells
+        grid2chem = self.get_grid_to_chem_mapping()
+        ic2chem = self.get_ic_to_chem_mapping(ic1)
+        chem, first = np.unique(ic2chem, return_index=True)
+        first = first[chem >= 0]
+        self.nchem = first.size
+
+        # reuse the equilibration of the same chemistry
+        cached = None
+        if self.init_cache is not None:
+            cache_dir = Path(self.wd) / self.init_cache
+            key = cache.chemistry_key(self.phinp_sha256, self.database, ic1[first], {
+                'componenth2o': bool(self.componenth2o),
+                'units_solution': 2,
+                'porosity': 1.0,
+            })
+            cached = cache.load(cache_dir, key)
+        if cached is not None:
+            print(f'Reusing the initial equilibration in {cache_dir}')
+            components, conc_chem = cached
+        else:
+            components, c_dbl_vect = self._run_initial_equilibration(
+                ic1_flatten, ic2chem, nthreads
+            )
+            conc_chem = np.reshape(c_dbl_vect, (len(components), self.nxyz))[:, first]
+            if self.init_cache is not None:
+                cache.save(cache_dir, key, components, conc_chem)
+        self.ncomps = len(components)
+        # set components as attribute
+        self.components = components
+
+        # broadcast the chemistry cells to the grid cells
+        c_dbl_vect = conc_chem[:, np.maximum(ic2chem, 0)]
+        c_dbl_vect[:, ic2chem < 0] = 0.0
+        c_dbl_vect = c_dbl_vect.ravel()
+        self.init_conc_array_phreeqc = c_dbl_vect
+
+        conc = [c_dbl_vect[i:i + self.nxyz] for i in range(0, len(c_dbl_vect), self.nxyz)]
+
+        self.sconc = {}
 
+        for i, c in enumerate(components):
+            # where thelement is a component name (c)
+            get_conc = np.reshape(conc[i], self.grid_shape)
+            get_conc = utils.concentration_l_to_m3(get_conc)
+            if c.lower() == 'charge':
+                get_conc += self.charge_offset
+            if grid2chem is not None:
+                # inactive cells are not calculated
+                get_conc = np.where(np.reshape(grid2chem, self.grid_shape) < 0, 0.0, get_conc)
+            self.sconc[c] = get_conc
+
+        self.set_reaction_temp()
+        self.write_simulation()
+        print('Phreeqc initialized')
+        return
+
+    def _run_initial_equilibration(self, ic1_flatten, ic2chem, nthreads=1):
+        """Equilibrate the initial conditions with a new PhreeqcRM object.
+
+        Parameters
+        ----------
+        ic1_flatten : np.ndarray
+            The (nxyz * 7) initial condition numbers, column major.
+        ic2chem : np.ndarray
+            The (nxyz) mapping of grid cells to chemistry cells.
+        nthreads : int, optional
+            Number of threads for parallel processing. Default is 1.
+
+        Returns
+        -------
+        tuple
+            The component names and the (ncomps * nxyz) concentrations (mol/L).
+        """
         # initialize phreeqccrm object
         self.phreeqc_rm = phreeqcrm.PhreeqcRM(self.nxyz, nthreads)
         status = self.phreeqc_rm.SetComponentH2O(self.componenth2o)
@@ -815,8 +1021,6 @@ class Mup3d(object):
 
         print_chemistry_mask = np.full((self.nxyz), 1)
         status = self.phreeqc_rm.SetPrintChemistryMask(print_chemistry_mask)
-        nchem = self.phreeqc_rm.GetChemistryCellCount()
-        self.nchem = nchem
 
         # Set printing of chemistry file
         status = self.phreeqc_rm.SetPrintChemistryOn(False, True, False)  # workers, initial_phreeqc, utility
@@ -832,10 +1036,6 @@ class Mup3d(object):
         # Get component information - these two functions need to be invoked to find comps
         ncomps = self.phreeqc_rm.FindComponents()
         components = list(self.phreeqc_rm.GetComponents())
-        self.ncomps = ncomps
-
-        # set components as attribute
-        self.components = components
 
         # Initial equilibration of cells
         time = 0.0
@@ -843,27 +1043,7 @@ class Mup3d(object):
         status = self.phreeqc_rm.SetTime(time)
         status = self.phreeqc_rm.SetTimeStep(time_step)
 
-        ic1 = np.ones((self.nxyz, 7), dtype=int)*-1
-
-        # this gets a column slice
-        ic1[:, 0] = np.reshape(self.solutions.ic, self.nxyz)
-
-        if isinstance(self.equilibrium_phases, EquilibriumPhases):
-            ic1[:, 1] = np.reshape(self.equilibrium_phases.ic, self.nxyz)
-        if isinstance(self.exchange_phases, ExchangePhases):
-            ic1[:, 2] = np.reshape(self.exchange_phases.ic, self.nxyz)  # Exchange
-        if isinstance(self.surfaces_phases, Surfaces):
-            ic1[:, 3] = np.reshape(self.surfaces_phases.ic, self.nxyz)  # Surface
-        ic1[:, 4] = -1  # Gas phase
-        ic1[:, 5] = -1  # Solid solutions
-        if isinstance(self.kinetic_phases, KineticPhases):
-            ic1[:, 6] = np.reshape(self.kinetic_phases.ic, self.nxyz)  # Kinetics
-
-        ic1_flatten = ic1.flatten('F')
-
-        # set initial conditions as attribute but in a new sub class
-        self.ic1 = ic1
-        self.ic1_flatten = ic1_flatten
+        status = self.phreeqc_rm.CreateMapping(ic2chem)
 
         # initialize ic1 phreeqc to module with phrreeqcrm
         status = self.phreeqc_rm.InitialPhreeqc2Module(ic1_flatten)
@@ -871,24 +1051,7 @@ class Mup3d(object):
         # get initial concentrations from running phreeqc
         status = self.phreeqc_rm.RunCells()
         c_dbl_vect = self.phreeqc_rm.GetConcentrations()
-        self.init_conc_array_phreeqc = c_dbl_vect
-
-        conc = [c_dbl_vect[i:i + self.nxyz] for i in range(0, len(c_dbl_vect), self.nxyz)]
-
-        self.sconc = {}
-
-        for i, c in enumerate(components):
-            # where thelement is a component name (c)
-            get_conc = np.reshape(conc[i], self.grid_shape)
-            get_conc = utils.concentration_l_to_m3(get_conc)
-            if c.lower() == 'charge':
-                get_conc += self.charge_offset
-            self.sconc[c] = get_conc
-
-        self.set_reaction_temp()
-        self.write_simulation()
-        print('Phreeqc initialized')
-        return
+        return components, c_dbl_vect
 
     def set_config(self, **kwargs) -> MF6RTMConfig:
         """Create and store a config object.
@@ -926,6 +1089,8 @@ class Mup3d(object):
         """
         assert self.wd is not None, "Model directory not specified"
         config_path = self.wd / "mf6rtm.toml"
+        if self.fixed_components is not None:
+            self.config.reactive_fixed_components = list(self.fixed_components)
         print(self.config)
         self.config.save_to_file(filepath=config_path)
         return config_path
@@ -940,7 +1105,10 @@ class Mup3d(object):
         self._write_phreeqc_init_file()
         if self.config.reactive_externalio:
             self.write_internal_parameters()
-            self.write_external_files_layered()
+            if self.config.reactive_externalio_format == 'txt':
+                self.write_external_files_layered()
+            else:
+                self.write_external_files()
         self.save_config()
         print(f"Simulation saved in {self.wd}")
         return
@@ -967,9 +1135,11 @@ class Mup3d(object):
 
         Notes
         -----
-        This function initializes a PhreeqcRM object, loads a database, runs a Phreeqc input file,
-        and transfers solutions and reactants to the reaction-module workers. It then equilibrates
-        the cells, gets the concentrations, and converts them to moles/m3.
+        The solutions are taken from the solution library of the model. Solutions not in the
+        library are computed once with a new PhreeqcRM object, that loads a database, runs the
+        Phreeqc input file and transfers the solutions to the reaction-module workers, and are
+        added to the library, which is stored in the initial equilibration cache if set. The
+        concentrations are converted to moles/m3.
 
         See Also
         --------
@@ -981,8 +1151,75 @@ class Mup3d(object):
 
         assert len(chem_stress) > 0, 'No ChemStress attribute found in self'
 
-        # Get total number of grid cells affected by the stress period
-        nxyz_spd = len(getattr(self, attr).sol_spd)
+        # solutions are computed once for all ChemStress packages
+        sol_spd = getattr(self, attr).sol_spd
+        library = self._get_solution_library()
+        missing = library.missing(sol_spd)
+        if missing:
+            components, c_dbl_vect = self._run_solutions(missing, nthreads)
+            library.add(components, missing, c_dbl_vect)
+        components = library.components
+
+        c_dbl_vect = utils.concentration_l_to_m3(library.get(sol_spd))
+
+        # find charge in c_dbl_vect and add charge_offset
+        for i, c in enumerate(components):
+            if c.lower() == 'charge':
+                c_dbl_vect[i] += self.charge_offset
+
+        sconc = dict(enumerate(c_dbl_vect.T.tolist()))
+
+        # set as attribute
+        setattr(getattr(self, attr), 'data', sconc)
+        setattr(getattr(self, attr), 'auxiliary', components)
+        print(f'ChemStress {attr} initialized')
+        return sconc
+
+    def _get_solution_library(self):
+        """The library of the solutions of the PHREEQC script, created on
+        first use and loaded from the initial equilibration cache if set.
+
+        Returns
+        -------
+        cache.SolutionLibrary
+            The solution library.
+        """
+        if self.solution_library is None:
+            # scripts not written by generate_phreeqc_script are hashed here
+            script_sha256 = getattr(self, 'phinp_sha256', None)
+            if script_sha256 is None:
+                script_sha256 = hashlib.sha256(Path(self.phinp).read_bytes()).hexdigest()
+            key = cache.chemistry_key(script_sha256, self.database, np.empty((0, 7), dtype=int), {
+                'componenth2o': bool(self.componenth2o),
+                'units_solution': 2,
+                'porosity': 1.0,
+                'library': 'solutions',
+            })
+            cache_dir = None
+            if self.init_cache is not None:
+                cache_dir = Path(self.wd) / self.init_cache
+            self.solution_library = cache.SolutionLibrary(key, cache_dir)
+        return self.solution_library
+
+    def _run_solutions(self, numbers, nthreads=1):
+        """Concentrations of solutions of the PHREEQC script with a new
+        PhreeqcRM object.
+
+        Parameters
+        ----------
+        numbers : list
+            Solution numbers.
+        nthreads : int, optional
+            Number of threads to use for PhreeqcRM (default is 1).
+
+        Returns
+        -------
+        tuple
+            The component names and the (ncomps, len(numbers))
+            concentrations (mol/L).
+        """
+        # one cell per solution
+        nxyz_spd = len(numbers)
 
         phreeqc_rm = phreeqcrm.PhreeqcRM(nxyz_spd, nthreads)
         status = phreeqc_rm.SetComponentH2O(self.componenth2o)
@@ -1014,18 +1251,10 @@ class Mup3d(object):
 
         # Transfer solutions and reactants from the InitialPhreeqc instance to
         # the reaction-module workers. See https://usgs-coupled.github.io/phreeqcrm/namespacephreeqcrm.html#ac3d7e7db76abda97a3d11b3ff1903322
-        ic1 = [-1] * nxyz_spd * 7
-        for e, i in enumerate(getattr(self, attr).sol_spd):
-            # TODO: modify to conform to the index, element convention
-            #       (i and e are reversed in line above)
-            ic1[e] = i  # Solution 1
-            # TODO: implment other ic1 blocks
-            # ic1[nxyz_spd + i]     = -1  # Equilibrium phases none
-            # ic1[2 * nxyz_spd + i] =  -1  # Exchange 1
-            # ic1[3 * nxyz_spd + i] = -1  # Surface none
-            # ic1[4 * nxyz_spd + i] = -1  # Gas phase none
-            # ic1[5 * nxyz_spd + i] = -1  # Solid solutions none
-            # ic1[6 * nxyz_spd + i] = -1  # Kinetics none
+        ic1 = np.full((nxyz_spd, 7), -1, dtype=int)
+        ic1[:, 0] = numbers  # Solution
+        # TODO: implment other ic1 blocks
+        ic1 = ic1.flatten('F')
         status = phreeqc_rm.InitialPhreeqc2Module(ic1)
 
         # Initial equilibration of cells
@@ -1036,27 +1265,11 @@ class Mup3d(object):
 
         # status = phreeqc_rm.RunCells()
         c_dbl_vect = phreeqc_rm.GetConcentrations()
-        c_dbl_vect = utils.concentration_l_to_m3(c_dbl_vect)
-
-        c_dbl_vect = [c_dbl_vect[i:i + nxyz_spd] for i in range(0, len(c_dbl_vect), nxyz_spd)]
-
-        # find charge in c_dbl_vect and add charge_offset
-        for i, c in enumerate(components):
-            if c.lower() == 'charge':
-                c_dbl_vect[i] += self.charge_offset
-
-        sconc = {}
-        for i in range(nxyz_spd):
-            sconc[i] = [array[i] for array in c_dbl_vect]
+        c_dbl_vect = np.reshape(c_dbl_vect, (ncomps, nxyz_spd))
 
         status = phreeqc_rm.CloseFiles()
         status = phreeqc_rm.MpiWorkerBreak()
-
-        # set as attribute
-        setattr(getattr(self, attr), 'data', sconc)
-        setattr(getattr(self, attr), 'auxiliary', components)
-        print(f'ChemStress {attr} initialized')
-        return sconc
+        return components, c_dbl_vect
 
     def _initialize_phreeqc_from_file(self, yamlfile):
         """Initialize phreeqc from a yaml file
@@ -1299,6 +1512,46 @@ class Mup3d(object):
             List of property names to extract and write per species and layer.
             Default is ['m0'].
         """
+        for attr, name, prop, arr in self._external_arrays(internals, property_to_write):
+            for ly in range(arr.shape[0]):
+                filepath = os.path.join(self.wd, f"{attr}.{name}.{prop}.layer{ly+1}.txt")
+                with open(filepath, "w") as fh:
+                    fh.write("\n".join(f"{val:.10e}" for val in arr[ly].flatten()))
+
+    def write_external_files(self,
+                             internals = [
+                                            "exchange_phases",
+                                            "equilibrium_phases",
+                                            "kinetic_phases"
+                                            ],
+                             property_to_write = ['m0']) -> None:
+        """
+        Write binary external array files for selected geochemical phases and properties.
+
+        Each property of each species is written at once to a .npy file
+        with the grid shape of the initial conditions, (nlay, nrow, ncol)
+        for DIS or (nlay, ncpl) for DISV grids, read memory-mapped by the
+        Regenerator. The files are saved in the model's working directory
+        and follow the naming convention:
+
+            {phase}.{species}.{property}.npy
+
+        Parameters
+        ----------
+        internals : list of str, optional
+            List of model attributes containing geochemical phase data.
+            Default is ["exchange_phases", "equilibrium_phases", "kinetic_phases"].
+
+        property_to_write : list of str, optional
+            List of property names to extract and write per species.
+            Default is ['m0'].
+        """
+        for attr, name, prop, arr in self._external_arrays(internals, property_to_write):
+            np.save(os.path.join(self.wd, f"{attr}.{name}.{prop}.npy"), arr)
+
+    def _external_arrays(self, internals, property_to_write):
+        """Yield the phase, species, property and grid array of the
+        external files"""
         valid_internals = [k for k in internals if getattr(self, k, None) is not None]
         for attr in valid_internals:
             phase_obj = getattr(self, attr)
@@ -1313,10 +1566,7 @@ class Mup3d(object):
                     arr = utils.map_species_property_to_grid(
                         data, ic, name, prop
                     )
-                    for ly in range(arr.shape[0]):
-                        filepath = os.path.join(self.wd, f"{attr}.{name}.{prop}.layer{ly+1}.txt")
-                        with open(filepath, "w") as fh:
-                            fh.write("\n".join(f"{val:.10e}" for val in arr[ly].flatten()))
+                    yield attr, name, prop, arr
 
     def _write_phreeqc_init_file(self, filename='mf6rtm.yaml') -> None:
         """Write the phreeqc init yaml file.
@@ -1368,6 +1618,11 @@ class Mup3d(object):
         rv = [1] * self.nxyz
         phreeqcrm_yaml.YAMLSetRepresentativeVolume(rv)
 
+        # inactive cells of idomain are not chemistry cells
+        grid2chem = self.get_grid_to_chem_mapping()
+        if grid2chem is not None:
+            status = phreeqcrm_yaml.YAMLCreateMapping(grid2chem.tolist())
+
         # Load database
         status = phreeqcrm_yaml.YAMLLoadDatabase(os.path.basename(self.database))
         status = phreeqcrm_yaml.YAMLRunFile(True, True, True, os.path.basename(self.phinp))
@@ -0,0 +1,155 @@
+"""
+The cache module stores the initial equilibration of the unique combinations
+of initial conditions computed by Mup3d.initialize. Entries are keyed by the
+hash of the PHREEQC script, the database, the unique combinations and the
+PhreeqcRM settings, so models rebuilt with the same chemistry skip PHREEQC.
+The SolutionLibrary stores the solutions of the boundary chemistry the same
+way.
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from importlib import metadata
+
+import numpy as np
+
+CACHE_DIR = "init_cache"
+
+
+def chemistry_key(script_sha256: str, database: os.PathLike, ic_unique: np.ndarray,
+                  settings: dict) -> str:
+    """SHA-256 of the inputs of the initial equilibration.
+
+    Parameters
+    ----------
+    script_sha256 : str
+        SHA-256 of the PHREEQC script with the initial condition blocks, as
+        computed by utils.ScriptWriter while the script is written.
+    database : os.PathLike
+        Path to the PHREEQC database.
+    ic_unique : np.ndarray
+        The (nchem, 7) unique rows of the initial condition numbers.
+    settings : dict
+        PhreeqcRM settings affecting the equilibration, JSON serializable.
+
+    Returns
+    -------
+    str
+        The hexadecimal key.
+    """
+    try:
+        version = metadata.version("phreeqcrm")
+    except metadata.PackageNotFoundError:
+        version = ""
+    sha = hashlib.sha256()
+    sha.update(script_sha256.encode())
+    sha.update(Path(database).read_bytes())
+    sha.update(np.ascontiguousarray(ic_unique, dtype=np.int64).tobytes())
+    sha.update(json.dumps(settings, sort_keys=True).encode())
+    sha.update(version.encode())
+    return sha.hexdigest()
+
+
+def load(cache: os.PathLike, key: str) -> tuple:
+    """Load a cached initial equilibration.
+
+    Returns
+    -------
+    tuple or None
+        The component names and the (ncomps, nchem) concentrations (mol/L),
+        None if the key is not cached.
+    """
+    fname = Path(cache) / f"{key[:16]}.npz"
+    if not fname.exists():
+        return None
+    with np.load(fname) as data:
+        if str(data["key"]) != key:
+            return None
+        return [str(c) for c in data["components"]], data["conc"].copy()
+
+
+def save(cache: os.PathLike, key: str, components: list, conc: np.ndarray) -> Path:
+    """Save an initial equilibration, replacing the file atomically so
+    concurrent builds sharing the cache do not read partial files"""
+    cache = Path(cache)
+    cache.mkdir(parents=True, exist_ok=True)
+    fname = cache / f"{key[:16]}.npz"
+    tmp = cache / f"{key[:16]}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, key=key, components=np.array(components, dtype=str), conc=conc)
+    os.replace(tmp, fname)
+    return fname
+
+
+class SolutionLibrary(object):
+    """Concentrations of the solutions of a PHREEQC script by solution number.
+
+    Each solution is computed once and, if a cache directory is given, stored
+    under the key of the script so later builds with the same chemistry reuse
+    it. Packages referencing the same solutions are filled by indexing the
+    library.
+
+    Parameters
+    ----------
+    key : str
+        Key of the script, database and PhreeqcRM settings, see
+        ``chemistry_key``.
+    cache : os.PathLike, optional
+        Directory of the cached libraries. Default is None, the library is
+        kept in memory only.
+
+    Attributes
+    ----------
+    components : list[str] or None
+        PhreeqcRM component names, None until a solution is added.
+    numbers : np.ndarray
+        Solution numbers in the library.
+    conc : np.ndarray
+        The (ncomps, nsolutions) concentrations (mol/L) of the solutions.
+    """
+    def __init__(self, key: str, cache: os.PathLike = None) -> None:
+        self.key = key
+        self.fname = None
+        self.components = None
+        self.numbers = np.empty(0, dtype=np.int64)
+        self.conc = np.empty((0, 0))
+        if cache is not None:
+            self.fname = Path(cache) / f"{key[:16]}.solutions.npz"
+            if self.fname.exists():
+                with np.load(self.fname) as data:
+                    if str(data["key"]) == key:
+                        self.components = [str(c) for c in data["components"]]
+                        self.numbers = data["numbers"].copy()
+                        self.conc = data["conc"].copy()
+
+    def missing(self, numbers: list) -> list:
+        """Solution numbers that are not in the library"""
+        numbers = np.unique(np.asarray(numbers, dtype=np.int64))
+        return numbers[~np.isin(numbers, self.numbers)].tolist()
+
+    def add(self, components: list, numbers: list, conc: np.ndarray) -> None:
+        """Add the (ncomps, len(numbers)) concentrations of solutions and
+        save the library if it is cached"""
+        if self.components is None:
+            self.components = list(components)
+            self.conc = np.empty((len(components), 0))
+        assert list(components) == self.components, \
+            "Solution components do not match the library components"
+        self.numbers = np.concatenate([self.numbers, np.asarray(numbers, dtype=np.int64)])
+        self.conc = np.concatenate([self.conc, conc], axis=1)
+        if self.fname is not None:
+            self.fname.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.fname.with_name(f"{self.fname.stem}.{os.getpid()}.tmp.npz")
+            np.savez(tmp, key=self.key, components=np.array(self.components, dtype=str),
+                     numbers=self.numbers, conc=self.conc)
+            os.replace(tmp, self.fname)
+
+    def get(self, numbers: list) -> np.ndarray:
+        """The (ncomps, len(numbers)) concentrations of solutions"""
+        numbers = np.asarray(numbers, dtype=np.int64)
+        order = np.argsort(self.numbers)
+        pos = np.searchsorted(self.numbers, numbers, sorter=order)
+        index = order[np.minimum(pos, max(self.numbers.size - 1, 0))]
+        assert self.numbers.size and np.array_equal(self.numbers[index], numbers), \
+            f"Solutions {self.missing(numbers)} are not in the library"
+        return self.conc[:, index]
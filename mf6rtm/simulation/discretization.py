@@ -4,12 +4,46 @@ This module contains the Discretization functions for various ModFlow grid types
 
 from mf6rtm.simulation.mf6api import Mf6API
 import math
+import numpy as np
 
 
 def total_cells_in_grid(modflow_api: Mf6API) -> int:
     return math.prod(grid_dimensions(modflow_api))
 
 
+def node_indices(grid_shape: tuple[int, ...], cells: list) -> np.ndarray:
+    """
+    Returns the 0-based node numbers of a list of cells.
+
+    Parameters
+    ----------
+    grid_shape : tuple[int, ...]
+        Grid dimensions, (nlay, nrow, ncol) for DIS or (nlay, ncpl) for DISV.
+    cells : list
+        Cells given as 0-based node numbers, (layer, row, col) tuples for
+        DIS or (layer, cell2d) tuples for DISV, all 0-based.
+
+    Returns
+    -------
+    np.ndarray
+        Node numbers of the cells.
+    """
+    nxyz = math.prod(grid_shape)
+    nodes = np.empty(len(cells), dtype=np.int64)
+    for i, cell in enumerate(cells):
+        if np.ndim(cell) == 0:
+            nodes[i] = int(cell)
+        elif len(cell) == len(grid_shape):
+            nodes[i] = np.ravel_multi_index(tuple(int(c) for c in cell), grid_shape)
+        else:
+            raise ValueError(
+                f"Cell {cell} does not match the grid dimensions {grid_shape}"
+            )
+    if np.any((nodes < 0) | (nodes >= nxyz)):
+        raise ValueError(f"Node numbers must be between 0 and {nxyz - 1}")
+    return nodes
+
+
 def grid_dimensions(modflow_api: Mf6API) -> tuple[int, ...]:
     grid_type = modflow_api.grid_type.upper()
     try:
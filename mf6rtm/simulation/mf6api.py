@@ -1,7 +1,10 @@
 from datetime import datetime
+import time
 import flopy
 import modflowapi
 
+from mf6rtm.simulation.profiler import NULL_PROFILER
+
 
 class Mf6API(modflowapi.ModflowApi):
     def __init__(self, wd, dll):
@@ -11,7 +14,8 @@ class Mf6API(modflowapi.ModflowApi):
         # NOTE: The `flopy.mf6.MFSimulation() class has different methods & attributes
         # than the `modflowapi.extensions.ApiSimulation()` class
         self.sim = flopy.mf6.MFSimulation.load(sim_ws=wd, verbosity_level=0)
-        self.fmi = False
+        self.fmi = self._check_fmi()
+        self.profiler = NULL_PROFILER
 
     def _prepare_mf6(self):
         """Prepare mf6 bmi for transport calculations"""
@@ -21,50 +25,101 @@ class Mf6API(modflowapi.ModflowApi):
         self.sim_start = datetime.now()
         self.ctimes = [0.0]
         self.num_fails = 0
+        # resolve addresses once for the transport loop
+        self.kper_address = self.get_var_address("KPER", "TDIS")
+        self.kstp_address = self.get_var_address("KSTP", "TDIS")
+        self.max_iters = {
+            sln: self.get_value(self.get_var_address("MXITER", f"SLN_{sln}"))
+            for sln in range(1, self.nsln + 1)
+        }
+        # solutions of fixed components are not solved
+        self.fixed_slns = set()
+
+    def solution_model_names(self) -> dict:
+        """Model names (lower case) of each solution, by one-based solution
+        number in solution group order"""
+        slns = {}
+        for rows in self.sim.name_file.solutiongroup.get_data().values():
+            for row in rows:
+                slns[len(slns) + 1] = [
+                    str(nme).lower() for nme in list(row)[2:] if nme is not None
+                ]
+        return slns
+
+    def set_fixed_models(self, model_names: list) -> set:
+        """Set the solutions that are not solved, those with all models in
+        model_names, and return their numbers"""
+        fixed = {str(nme).lower() for nme in model_names}
+        self.fixed_slns = {
+            sln for sln, nmes in self.solution_model_names().items()
+            if nmes and set(nmes) <= fixed
+        }
+        return self.fixed_slns
 
     def _check_fmi(self):
-        """Check if fmi is in the nam file"""
-        ...
-        return
+        """Check if the transport models read the flow through fmi, i.e.
+        there is no flow model in the simulation"""
+        return not any(
+            self.sim.get_model(nme).model_type == "gwf6" for nme in self.sim.model_names
+        )
 
     def _set_simtype_gwt(self):
         """Set the gwt sim type as sequential or flow interface"""
         ...
 
-    def _solve_gwt(self):
-        """Function to solve the transport loop"""
+    def _solve_gwt(self, count_fails=True):
+        """Function to solve the transport loop
+
+        Parameters
+        ----------
+        count_fails : bool, optional
+            Add the solutions that did not converge to ``num_fails``. The
+            time step control counts them itself, only for the steps it
+            does not retry. Default is True.
+        """
         # prep to solve each Modflow6 model "solution" (i.e. sln)
         for sln in range(1, self.nsln + 1):
-            self.prepare_solve(sln)
+            if sln in self.fixed_slns:
+                continue
+            with self.profiler.trace("prepare_solve", sln=sln):
+                self.prepare_solve(sln)
         # the one-based stress period number
-        stress_period = self.get_value(self.get_var_address("KPER", "TDIS"))[0]
-        time_step = self.get_value(self.get_var_address("KSTP", "TDIS"))[0]
+        stress_period = self.get_value(self.kper_address)[0]
+        time_step = self.get_value(self.kstp_address)[0]
 
         self.kper = stress_period
         self.kstp = time_step
         msg = f"{'Transport':<15} | {'Stress period:':<15} {stress_period:<5} | {'Time step:':<15} {time_step:<10} | {'Running ...':<10}"
         # print(msg)
+        # wall time (s) and number of iterations of each solution
+        self.sln_times = [0.0] * self.nsln
+        self.sln_iters = [0] * self.nsln
+        self.converged = True
+        self.nfails = 0
         # mf6 transport loop block
         for sln in range(1, self.nsln + 1):
-            # if self.fixed_components is not None and modelnmes[sln-1] in self.fixed_components:
-            #     print(f'not transporting {modelnmes[sln-1]}')
-            #     continue
+            # fixed components keep their concentrations
+            if sln in self.fixed_slns:
+                continue
 
             # set iteration counter
             kiter = 0
             # max number of solution iterations
-            max_iter = self.get_value(
-                self.get_var_address("MXITER", f"SLN_{sln}")
-            )  # FIXME: not sure to define this inside the loop
-            self.prepare_solve(sln)
+            max_iter = self.max_iters[sln]
+            with self.profiler.trace("prepare_solve", sln=sln):
+                self.prepare_solve(sln)
 
             sol_start = datetime.now()
-            while kiter < max_iter:
-                convg = self.solve(sln)
-                if convg:
-                    td = (datetime.now() - sol_start).total_seconds() / 60.0
-                    break
-                kiter += 1
+            sln_start = time.perf_counter()
+            with self.profiler.trace("solve", sln=sln):
+                while kiter < max_iter:
+                    convg = self.solve(sln)
+                    if convg:
+                        td = (datetime.now() - sol_start).total_seconds() / 60.0
+                        break
+                    kiter += 1
+            self.sln_times[sln - 1] = time.perf_counter() - sln_start
+            self.sln_iters[sln - 1] = kiter + 1 if convg else kiter
             if not convg:
                 td = (datetime.now() - sol_start).total_seconds() / 60.0
                 print(
@@ -72,11 +127,15 @@ class Mf6API(modflowapi.ModflowApi):
                         stress_period, time_step, kiter, td
                     )
                 )
-                self.num_fails += 1
+                self.nfails += 1
+                self.converged = False
             try:
-                self.finalize_solve(sln)
+                with self.profiler.trace("finalize_solve", sln=sln):
+                    self.finalize_solve(sln)
             except:
                 pass
+        if count_fails:
+            self.num_fails += self.nfails
         td = (datetime.now() - sol_start).total_seconds() / 60.0
         print(
             f"{'Transport':<15} | {'Stress period:':<15} {stress_period:<5} | {'Time step:':<15} {time_step:<10} | {'Completed in :':<10}  {td//60:.0f} min {td%60:10.2e} sec"
@@ -5,6 +5,7 @@ import pandas as pd
 import phreeqcrm
 from mf6rtm.utils import utils
 from mf6rtm.simulation.mf6api import Mf6API
+from mf6rtm.simulation.profiler import NULL_PROFILER
 
 
 class PhreeqcBMI(phreeqcrm.BMIPhreeqcRM):
@@ -13,6 +14,8 @@ class PhreeqcBMI(phreeqcrm.BMIPhreeqcRM):
         print("Processing initial chemistry configuration")
         self.initialize(yaml)
         self.sat_now = None
+        self.compact = False
+        self.profiler = NULL_PROFILER
 
     def get_grid_to_map(self):
         """Function to get grid to map"""
@@ -31,6 +34,28 @@ class PhreeqcBMI(phreeqcrm.BMIPhreeqcRM):
         self.soutdf = soutdf
         self.sout_headers = sout_headers
 
+        # saturation buffer sent to reactions, owned by phreeqcbmi
+        self.sat_react = np.ones(self.GetGridCellCount(), dtype=np.float64)
+        self.ncells_react = self.GetGridCellCount()
+
+    def set_compact_chemistry(self, compact=True):
+        """Rebalance worker cells by cell with a rebalance fraction of 1.0.
+
+        Cells skipped by the concentration change mask take no time in
+        RunCells, so rebalancing fully on the last timings gives each worker
+        a similar share of the cells sent to reactions. The chemistry cells
+        are not compacted, skipped cells stay in the worker partitions.
+
+        Parameters
+        ----------
+        compact : bool
+            If True, rebalance by cell with fraction 1.0, otherwise restore
+            the PhreeqcRM default fraction of 0.5.
+        """
+        self.SetRebalanceByCell(True)
+        self.SetRebalanceFraction(1.0 if compact else 0.5)
+        self.compact = compact
+
     def _set_ctime(self, ctime):
         """Set the current time in phreeqc bmi"""
         # self.ctime = self.SetTime(ctime*86400)
@@ -49,34 +74,40 @@ class PhreeqcBMI(phreeqcrm.BMIPhreeqcRM):
         dest[0] = value
         x = self.set_value(var_name, dest)
 
-    def _solve_phreeqcrm(self, dt, diffmask):
-        """Function to solve phreeqc bmi"""
+    def _solve_phreeqcrm(self, dt, diffmask, selected_output_on=True):
+        """Function to solve phreeqc bmi
+
+        Parameters
+        ----------
+        dt : float
+            Reaction time step in the Modflow 6 time units.
+        diffmask : np.ndarray or None
+            Cell mask (nxyz) where zero cells are skipped.
+        selected_output_on : bool, optional
+            If False, PhreeqcRM does not calculate the selected output
+            (USER_PUNCH) for this step.
+        """
         # status = phreeqc_rm.SetTemperature([self.init_temp[0]] * self.ncpl)
         # status = phreeqc_rm.SetPressure([2.0] * nxyz)
         self.SetTimeStep(dt * 1.0 / self.GetTimeConversion())
 
         if self.sat_now is not None:
-            sat = self.sat_now
+            np.copyto(self.sat_react, self.sat_now)
         else:
-            sat = [1] * self.GetGridCellCount()
-
-        self.SetSaturation(sat)
+            self.sat_react.fill(1.0)
 
         # update which cells to run depending on conc change between tsteps
+        # skipped cells are turned off in the buffer, sat_now is not modified
         if diffmask is not None:
-            # get idx where diffmask is 0
-            inact = utils.get_indices(0, diffmask)
-            if len(inact) > 0:
-                for i in inact:
-                    sat[i] = 0
-            # print(
-            #     f"{'Cells sent to reactions':<25} | {self.GetGridCellCount()-len(inact):<0}/{self.GetGridCellCount():<15}"
-            # )
-            self.SetSaturation(sat)
-
-        print_selected_output_on = True
+            skip = np.logical_not(diffmask)
+            self.sat_react[skip] = 0.0
+            self.ncells_react = self.sat_react.size - np.count_nonzero(skip)
+        else:
+            self.ncells_react = self.sat_react.size
+        self.SetSaturation(self.sat_react)
+
         # print_chemistry_on = False
-        status = self.SetSelectedOutputOn(print_selected_output_on)
+        status = self.SetSelectedOutputOn(selected_output_on)
         status = self.SetPrintChemistryOn(False, False, False)
         # reactions loop
         sol_start = datetime.now()
@@ -88,11 +119,16 @@ class PhreeqcBMI(phreeqcrm.BMIPhreeqcRM):
         # status = self.RunCells()
         # if status < 0:
         #     print('Error in RunCells: {0}'.format(status))
-        self.update()
+        with self.profiler.trace("update", ncells=int(self.ncells_react)):
+            self.update()
         td = (datetime.now() - sol_start).total_seconds() / 60.0
         message = f"{'Reactions':<15} | {'Stress period:':<15} {self.kper:<5} | {'Time step:':<15} {self.kstp:<10} | {'Completed in :':<10}  {td // 60:.0f} min {td % 60:10.2e} sec"
         self.LogMessage(message)
         print(message)
+        if self.compact:
+            message = f"{'Cells sent to reactions':<25} | {self.ncells_react:<0}/{self.sat_react.size:<15}"
+            self.LogMessage(message)
+            print(message)
         # self.ScreenMessage(message)
 
     def _get_kper_kstp_from_mf6api(self, mf6api: Mf6API):
@@ -0,0 +1,231 @@
+"""
+The profiler module provides the StepProfiler class that records timings
+and counters of every time step of the coupled solve to a JSON Lines file,
+one JSON object per time step, and writes a summary at the end of the run.
+Optionally, the spans are also written as a timeline in the Chrome
+trace-event format, which can be opened in chrome://tracing, Perfetto or
+speedscope.
+"""
+import os
+import json
+import time
+import threading
+
+from contextlib import contextmanager, nullcontext
+
+_NULL_SPAN = nullcontext()
+
+
+def rss_bytes() -> int:
+    """Resident set size of the current process in bytes, 0 if unknown"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class StepProfiler(object):
+    """Per time step timings and counters of the coupled solve.
+
+    Timings are recorded with ``span`` blocks that add the elapsed seconds
+    to the current step record, counters with ``count``. When tracing,
+    every ``span`` and ``trace`` block is also written as a complete
+    ("X") trace event and numeric counters as counter ("C") events, so
+    nested spans show on a timeline. When disabled, ``span`` and ``trace``
+    return a shared no-op context and the other methods return
+    immediately.
+
+    Parameters
+    ----------
+    fname : os.PathLike, optional
+        Path of the JSON Lines file, one record per time step. The summary
+        is written next to it with the extension replaced by
+        ``.summary.json``.
+    enabled : bool, optional
+        If False, nothing is recorded. Default is True.
+    trace_fname : os.PathLike, optional
+        Path of the Chrome trace-event JSON file. Events are streamed to
+        the file as they complete. Default is None (no trace).
+    """
+    def __init__(self, fname=None, enabled=True, trace_fname=None) -> None:
+        self.enabled = enabled and (fname is not None or trace_fname is not None)
+        self.fname = fname
+        self.trace_fname = trace_fname
+        self.tracing = self.enabled and trace_fname is not None
+        self.record = None
+        self.totals = {}
+        self.maxima = {}
+        self._timing_keys = {"step"}
+        self.nsteps = 0
+        self.peak_rss = 0
+        self._file = None
+        self._step_start = 0.0
+        self._run_start = time.perf_counter()
+        self._trace_file = None
+        self._pid = os.getpid()
+        if self.enabled and fname is not None:
+            self._file = open(fname, "w")
+        if self.tracing:
+            # JSON array format, the closing bracket is written by close and
+            # is optional for the viewers if the run is interrupted
+            self._trace_file = open(trace_fname, "w")
+            self._trace_file.write("[")
+            self._trace_sep = "\n"
+            self._trace_lock = threading.Lock()
+            self._emit({"name": "process_name", "ph": "M", "pid": self._pid,
+                        "tid": threading.get_ident(), "args": {"name": "mf6rtm"}})
+
+    def _emit(self, event) -> None:
+        """Append a trace event to the trace file"""
+        line = json.dumps(event, separators=(",", ":"))
+        with self._trace_lock:
+            self._trace_file.write(self._trace_sep)
+            self._trace_file.write(line)
+            self._trace_sep = ",\n"
+
+    def _trace_event(self, name, start, elapsed, cat, args=None) -> None:
+        """Write a complete event, times in seconds from perf_counter"""
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((start - self._run_start) * 1e6, 3),
+            "dur": round(elapsed * 1e6, 3),
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self._emit(event)
+
+    @contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.record is not None:
+                self.record[name] = self.record.get(name, 0.0) + elapsed
+                self._timing_keys.add(name)
+            if self.tracing:
+                self._trace_event(name, start, elapsed, "step")
+
+    @contextmanager
+    def _trace(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._trace_event(name, start, time.perf_counter() - start, "detail", args)
+
+    def span(self, name):
+        """Context manager adding its elapsed seconds to ``name``"""
+        if not self.enabled or (self.record is None and not self.tracing):
+            return _NULL_SPAN
+        return self._span(name)
+
+    def trace(self, name, **args):
+        """Context manager writing a trace event only, not part of the step
+        record. Keyword arguments are attached to the event."""
+        if not self.tracing:
+            return _NULL_SPAN
+        return self._trace(name, args)
+
+    def count(self, name, value) -> None:
+        """Set a counter or value of the current time step"""
+        if self.enabled and self.record is not None:
+            self.record[name] = value
+        if self.tracing and isinstance(value, (int, float)):
+            self._emit({
+                "name": name,
+                "ph": "C",
+                "ts": round((time.perf_counter() - self._run_start) * 1e6, 3),
+                "pid": self._pid,
+                "args": {name: float(value)},
+            })
+
+    def start_step(self, **fields) -> None:
+        """Start the record of a time step with identifying fields"""
+        if not self.enabled:
+            return
+        self.record = dict(fields)
+        self._step_start = time.perf_counter()
+
+    def end_step(self) -> None:
+        """Close the record of the time step and append it to the file"""
+        if not self.enabled or self.record is None:
+            return
+        self.record["step"] = time.perf_counter() - self._step_start
+        rss = rss_bytes()
+        self.record["rss_mb"] = round(rss / 1e6, 3)
+        self.peak_rss = max(self.peak_rss, rss)
+        for key in self._timing_keys.intersection(self.record):
+            value = self.record[key]
+            self.totals[key] = self.totals.get(key, 0.0) + value
+            self.maxima[key] = max(self.maxima.get(key, 0.0), value)
+        if self._file is not None:
+            self._file.write(json.dumps(self.record, separators=(",", ":")))
+            self._file.write("\n")
+        self.nsteps += 1
+        self.record = None
+
+    def summary(self) -> dict:
+        """Totals, means and maxima of the timings over all time steps.
+
+        Returns
+        -------
+        dict
+            Summary with the run wall time, number of steps, peak RSS and,
+            for every timing, its total, mean, max and fraction of the total
+            step time.
+        """
+        step_total = self.totals.get("step", 0.0)
+        timings = {}
+        for key, total in self.totals.items():
+            timings[key] = {
+                "total": total,
+                "mean": total / max(self.nsteps, 1),
+                "max": self.maxima[key],
+                "fraction": total / step_total if step_total > 0 else 0.0,
+            }
+        return {
+            "wall_time": time.perf_counter() - self._run_start,
+            "nsteps": self.nsteps,
+            "peak_rss_mb": round(self.peak_rss / 1e6, 3),
+            "timings": timings,
+        }
+
+    def close(self) -> dict:
+        """Close the files, write and print the summary"""
+        if not self.enabled:
+            return {}
+        summary = self.summary()
+        if self._trace_file is not None:
+            self._emit({"name": "thread_name", "ph": "M", "pid": self._pid,
+                        "tid": threading.get_ident(), "args": {"name": "solve"}})
+            self._trace_file.write("\n]\n")
+            self._trace_file.close()
+        if self._file is not None:
+            self._file.close()
+            with open(f"{os.path.splitext(self.fname)[0]}.summary.json", "w") as f:
+                json.dump(summary, f, indent=2)
+        print(f"\n{'Profile':<15} | {'total (s)':>12} | {'mean (s)':>12} | {'max (s)':>12} | {'fraction':>8}")
+        for key, t in summary["timings"].items():
+            print(
+                f"{key:<15} | {t['total']:12.4e} | {t['mean']:12.4e} | "
+                f"{t['max']:12.4e} | {t['fraction']:8.1%}"
+            )
+        print(f"{'Peak RSS':<15} | {summary['peak_rss_mb']:.1f} MB over {self.nsteps} steps\n")
+        self.enabled = False
+        return summary
+
+
+# shared disabled profiler used until a run attaches its own
+NULL_PROFILER = StepProfiler(enabled=False)
@@ -12,7 +12,13 @@ from pathlib import Path
 from PIL import Image
 from mf6rtm.simulation.mf6api import Mf6API
 from mf6rtm.simulation.phreeqcbmi import PhreeqcBMI
-from mf6rtm.simulation.discretization import total_cells_in_grid
+from mf6rtm.simulation.discretization import (total_cells_in_grid,
+                                              grid_dimensions, node_indices)
+from mf6rtm.simulation.transfer import ConcentrationTransfer, CouplingTable
+from mf6rtm.simulation.timing import AdaptiveTiming, TimeStepControl
+from mf6rtm.simulation.tolerance import ChangeTolerance, get_conc_change_mask
+from mf6rtm.simulation.profiler import StepProfiler
+from mf6rtm.simulation.steadyflow import prepare_steady_flow
 from mf6rtm.config.config import MF6RTMConfig
 from mf6rtm.io.externalio import SelectedOutput
 from mf6rtm.utils import utils
@@ -76,7 +82,8 @@ def prep_to_run(wd:os.PathLike) -> tuple[os.PathLike,os.PathLike]:
         regcls = Regenerator.regenerate_from_external_files(wd=wd,
                                                 phinpfile='phinp.dat',
                                                 yamlfile='mf6rtm.yaml',
-                                                dllfile=dll
+                                                dllfile=dll,
+                                                zones=config.reactive_externalio_zones
                                                 )
         yamlfile = regcls.yamlfile
     else:
@@ -112,8 +119,16 @@ def initialize_interfaces(wd:os.PathLike, nthread: int = 1) -> Mf6API:
         # set nthreds to nthread
         set_nthread_yaml(yamlfile, nthread=nthread)
 
+    # solve a steady flow once and couple the transport only simulation
+    mf6_ws = wd
+    config = check_config_file(wd)
+    if config.flow_steady:
+        mf6_ws = prepare_steady_flow(
+            wd, cache=config.flow_cache, check=(config.flow_steady == 'auto')
+        )
+
     # initialize the interfaces
-    mf6api = Mf6API(wd, dll)
+    mf6api = Mf6API(mf6_ws, dll)
     phreeqcrm = PhreeqcBMI(yamlfile) #FIXME: Does not work with path like
     mf6rtm = Mf6RTM(wd, mf6api, phreeqcrm)
     return mf6rtm
@@ -165,10 +180,9 @@ class Mf6RTM(object):
             Filename for the output, default is "sout.csv".
         reactive : bool
             Flag indicating if the model is reactive, default is True.
-        epsaqu : float
-            ??Epsaqueous value??, initialized to 0.0.
-        fixed_components : Any
-            Fixed components, default is None.
+        fixed_components : list[str] or None
+            Components that are not transported, from the configuration,
+            default is None.
         get_selected_output_on : bool
             Flag indicating if selected output is on, default is True.
         component_model_dict : dict[str, str]
@@ -188,7 +202,6 @@ class Mf6RTM(object):
         self.phreeqcbmi = phreeqcbmi
         self.charge_offset = 0.0
         self.wd = Path(wd)
-        self.epsaqu = 0.0
         self.fixed_components = None
         self.selected_output = SelectedOutput(self)
 
@@ -202,7 +215,37 @@ class Mf6RTM(object):
 
         self.config = MF6RTMConfig.from_toml_file(self.wd/"mf6rtm.toml")
         self.reactive = self.config.reactive_enabled
+        self._set_fixed_components(self.config.reactive_fixed_components)
         self.set_emulator_training()
+        self.selected_output.set_format(
+            self.config.output_format,
+            ring_size=self.config.output_ring_size,
+            chunk_time=self.config.output_chunk_time,
+            chunk_cells=self.config.output_chunk_cells,
+            async_buffers=self.config.output_async_buffers,
+        )
+        self.set_observations()
+
+    def set_observations(self) -> None:
+        """
+        Resolve the observation sets of the configuration to node numbers.
+
+        Cells of each set are given as node numbers, (layer, row, col) for
+        DIS or (layer, cell2d) for DISV grids. Each set is written at every
+        time step to its own selected output file.
+
+        Returns
+        -------
+        None
+        """
+        observations = getattr(self.config, "observations", {})
+        if not observations:
+            return
+        grid_shape = grid_dimensions(self.mf6api)
+        self.selected_output.set_observations(
+            {name: node_indices(grid_shape, cells) for name, cells in observations.items()},
+            ml_observations=self.config.emulator_observations,
+        )
 
     def set_emulator_training(self) -> None:
         """
@@ -263,31 +306,16 @@ class Mf6RTM(object):
         else:
             return
 
-    def get_saturation_from_mf6(self) -> dict[Any, np.ndarray]:
+    def get_saturation_from_mf6(self) -> np.ndarray:
         """
         Get the saturation
 
-        Parameters
-        ----------
-        mf6 (modflowapi): the modflow api object
-
         Returns
         -------
-        array: the saturation
+        array: the saturation, copied from the address resolved in the
+            coupling table
         """
-        sat = {
-            component: self.mf6api.get_value(
-                self.mf6api.get_var_address(
-                    "FMI/GWFSAT",
-                    f"{self.component_model_dict[component]}"
-                )
-            )
-            for component in self.phreeqcbmi.components
-        }
-        # select the first component to get the length of the array
-        sat = sat[
-            self.phreeqcbmi.components[0]
-        ]  # saturation is the same for all components
+        sat = self.transfer.get_saturation()
         self.phreeqcbmi.sat_now = sat  # set phreeqcmbi saturation
         return sat
 
@@ -341,8 +369,15 @@ class Mf6RTM(object):
 
         return component_model_dict, conservative_transport_models
 
-    # TODO: remove or have raise not implemented error
-    def _set_fixed_components(self, fixed_components): ...
+    def _set_fixed_components(self, fixed_components: Union[list[str], None]) -> None:
+        """Set the components that are not transported. Their transport
+        solutions are not solved and PhreeqcRM keeps their concentrations
+        from the previous chemistry step"""
+        if fixed_components:
+            unknown = set(fixed_components) - set(self.component_model_dict)
+            assert not unknown, f"Fixed components {sorted(unknown)} are not PhreeqcRM components"
+            fixed_components = list(fixed_components)
+        self.fixed_components = fixed_components or None
 
     # TODO: make reactive a property
     def _set_reactive(self, reactive: bool) -> None:
@@ -359,6 +394,69 @@ class Mf6RTM(object):
         self.mf6api._prepare_mf6()
         self.phreeqcbmi._prepare_phreeqcrm_bmi()
 
+        # resolve addresses and memory views once for the coupling loop
+        self.coupling_table = CouplingTable.build(
+            self.mf6api,
+            self.phreeqcbmi.components,
+            self.component_model_dict,
+            charge_offset=self.charge_offset,
+            fixed_components=self.fixed_components or (),
+            nxyz=self.nxyz,
+        )
+        if self.fixed_components:
+            self.mf6api.set_fixed_models(
+                [self.component_model_dict[c] for c in self.fixed_components]
+            )
+        # preallocated concentration exchange between mf6 and phreeqcrm
+        self.transfer = ConcentrationTransfer(
+            self.coupling_table, self.phreeqcbmi, self.nxyz
+        )
+        # rebalance workers fully on the cell timings of the last step
+        if self.config.reactive_compact:
+            self.phreeqcbmi.set_compact_chemistry()
+
+        # run-time reaction timing for the adaptive strategy
+        self.adaptive_timing = None
+        if self.config.reactive_timing == 'adaptive':
+            self.adaptive_timing = AdaptiveTiming(
+                self.transfer,
+                tolerance=self.config.reactive_adaptive_tolerance,
+                max_tsteps=self.config.reactive_adaptive_max_tsteps,
+                atol=self.config.reactive_adaptive_atol,
+            )
+
+        # transport change tolerances of the cells sent to reactions
+        self.change_tolerance = ChangeTolerance(
+            self.phreeqcbmi.components,
+            self.nxyz,
+            atol=self.config.reactive_skip_atol,
+            rtol=self.config.reactive_skip_rtol,
+            tolerances=self.config.reactive_skip_tolerances,
+        )
+
+        # cutback of the coupled step on transport failures
+        self.step_control = None
+        if self.config.timestep_cutback:
+            self.step_control = TimeStepControl(
+                self.mf6api,
+                self.mf6api.sim.model_names,
+                cutback=self.config.timestep_cutback_factor,
+                grow=self.config.timestep_grow_factor,
+                grow_after=self.config.timestep_grow_after,
+                min_fraction=self.config.timestep_min_fraction,
+            )
+
+        # per time step timings and counters, and optional timeline trace
+        trace_fname = None
+        if self.config.profile_trace:
+            trace_fname = self.wd / self.config.profile_trace_fname
+        self.profiler = StepProfiler(
+            self.wd / self.config.profile_fname if self.config.profile_enabled else None,
+            trace_fname=trace_fname,
+        )
+        self.mf6api.profiler = self.profiler
+        self.phreeqcbmi.profiler = self.profiler
+
         # get and write sout headers
         self.selected_output._write_sout_headers()
 
@@ -379,6 +477,8 @@ class Mf6RTM(object):
 
     def _finalize(self) -> None:
         """Finalize the APIs"""
+        self.selected_output._close()
+        self.profiler.close()
         self._finalize_mf6api()
         self._finalize_phreeqcrm()
 
@@ -391,115 +491,36 @@ class Mf6RTM(object):
         self.phreeqcbmi.finalize()
 
 
-    def _get_cdlbl_vect(self) -> np.ndarray[np.float64]:
-        """Get the concentration array from phreeqc bmi reshape to (ncomps, nxyz)"""
-        c_dbl_vect = self.phreeqcbmi.GetConcentrations()
-
-        conc = [
-            c_dbl_vect[i : i + self.nxyz] for i in range(0, len(c_dbl_vect), self.nxyz)
-        ]  # reshape array
-        # TODO: refactor to use np.reshape(), which is 2x faster
-        return conc
-
     def _set_conc_at_current_kstep(self, c_dbl_vect: np.ndarray[np.float64]):
-        """Saves the current concentration array to the object"""
-        self.current_iteration_conc = np.reshape(
-            c_dbl_vect, (self.phreeqcbmi.ncomps, self.nxyz)
-        )
+        """Saves the current (ncomps, nxyz) concentration array to the object"""
+        self.current_iteration_conc = c_dbl_vect
 
     def _set_conc_at_previous_kstep(self, c_dbl_vect: np.ndarray[np.float64]):
-        """Saves the current concentration array to the object"""
-        self.previous_iteration_conc = np.reshape(
-            c_dbl_vect, (self.phreeqcbmi.ncomps, self.nxyz)
-        )
+        """Saves the reacted (ncomps, nxyz) concentration array to the object"""
+        self.previous_iteration_conc = c_dbl_vect
 
     def _transfer_array_to_mf6(self) -> np.ndarray[np.float64]:
         """Transfer the concentration array to mf6"""
-        c_dbl_vect = self._get_cdlbl_vect()
-
-        # check if reactive cells were skipped due to small changes from transport and replace with previous conc
+        # reactive cells skipped due to small changes from transport keep transported conc
+        active = None
         if self._check_previous_conc_exists() and self._check_inactive_cells_exist(
             self.diffmask
         ):
-            c_dbl_vect = self._replace_inactive_cells(c_dbl_vect, self.diffmask)
-        else:
-            pass
-
-        conc_dict = {}
-        for i, c in enumerate(self.phreeqcbmi.components):
-            conc_dict[c] = c_dbl_vect[i]
-            # Set concentrations in mf6
-            gwt_model_name = self.component_model_dict[c]
-            if gwt_model_name.lower() == "charge":
-                self.mf6api.set_value(
-                    f"{gwt_model_name.upper()}/X",
-                    utils.concentration_l_to_m3(conc_dict[c]) + self.charge_offset,
-                )
-            else:
-                self.mf6api.set_value(
-                    f"{gwt_model_name.upper()}/X",
-                    utils.concentration_l_to_m3(conc_dict[c]),
-                )
-        return c_dbl_vect
+            active = self.diffmask
+        return self.transfer.to_mf6(active=active)
 
     def _check_previous_conc_exists(self) -> bool:
-        """Function to replace inactive cells in the concentration array"""
-        # check if self.previous_iteration_conc is a property
-        return hasattr(self, "previous_iteration_conc")
+        """Check if concentrations were already transferred back from phreeqc"""
+        return self.transfer.has_reacted
 
     def _check_inactive_cells_exist(self, diffmask: np.ndarray[np.float64]) -> bool:
         """Function to check if inactive cells exist in the concentration array"""
-        inact = utils.get_indices(0, diffmask)
-        return len(inact) > 0
-
-    def _replace_inactive_cells(
-        self,
-        c_dbl_vect: np.ndarray[np.float64],
-        diffmask: np.ndarray[np.float64],
-    ) -> np.ndarray[np.float64]:
-        """Function to replace inactive cells in the concentration array"""
-        c_dbl_vect = np.reshape(c_dbl_vect, (self.phreeqcbmi.ncomps, self.nxyz))
-        # get inactive cells
-        inactive_idx = [
-            utils.get_indices(0, diffmask) for k in range(self.phreeqcbmi.ncomps)
-        ]
-        c_dbl_vect[:, inactive_idx] = self.previous_iteration_conc[:, inactive_idx]
-        c_dbl_vect = c_dbl_vect.flatten()
-        conc = [
-            c_dbl_vect[i : i + self.nxyz] for i in range(0, len(c_dbl_vect), self.nxyz)
-        ]
-        return conc
+        return not np.all(diffmask)
 
     def _transfer_array_to_phreeqcrm(self) -> np.ndarray[np.float64]:
         """Transfer the concentration array to phreeqc bmi"""
-        mf6_conc_array = []
-        for c in self.phreeqcbmi.components:
-            if c.lower() == "charge":
-                mf6_conc_array.append(
-                    utils.concentration_m3_to_l(
-                        self.mf6api.get_value(
-                            self.mf6api.get_var_address(
-                                "X",
-                                f"{self.component_model_dict[c].upper()}",
-                            )
-                        )
-                        - self.charge_offset
-                    )
-                )
-
-            else:
-                mf6_conc_array.append(
-                    utils.concentration_m3_to_l(
-                        self.mf6api.get_value(
-                            self.mf6api.get_var_address(
-                                "X",
-                                f"{self.component_model_dict[c].upper()}",
-                            )
-                        )
-                    )
-                )
-        c_dbl_vect = np.reshape(mf6_conc_array, self.nxyz * self.phreeqcbmi.ncomps)
-        self.phreeqcbmi.SetConcentrations(c_dbl_vect)
+        # the adaptive timing read the concentrations of this step already
+        c_dbl_vect = self.transfer.to_phreeqcrm(refresh=self.adaptive_timing is None)
 
         # set the kper and kstp
         self.phreeqcbmi._get_kper_kstp_from_mf6api(
@@ -532,16 +553,115 @@ class Mf6RTM(object):
             return True
         elif self.config.reactive_timing == 'user':
             return current_tstep in self.config.reactive_tsteps
+        elif self.config.reactive_timing == 'adaptive':
+            # always react at the last time step of the simulation, and at
+            # output steps if the selected output of reacted cells is missing
+            last = self.ctime + self.time_step >= self.etime * (1.0 - 1e-12)
+            stale = self.output_due and self.selected_output.has_stale_output(
+                self.transfer.sat <= 0.0
+            )
+            due = self.adaptive_timing.step(self.time_step, force=last or stale)
+            if not due:
+                print(
+                    f"{'Reactions':<15} | {'Stress period:':<15} {self.mf6api.kper:<5} | "
+                    f"{'Time step:':<15} {self.mf6api.kstp:<10} | {'Skipped':<10}  "
+                    f"error {self.adaptive_timing.error:10.2e}"
+                )
+            return due
         else:
             # Handle unknown strategy
             print(f"Warning: Unknown strategy '{self.config.reactive_timing}'. Defaulting to reactive.")
             return True
+    def is_output_tstep(self) -> bool:
+        """Check if selected output is due at the current time step based on
+        the output schedule in the configuration"""
+        return self.config.is_output_tstep(
+            self.mf6api.kper,
+            self.mf6api.kstp,
+            self.kiter,
+            self.ctime,
+            self.time_step,
+        )
+
     def set_kiter(self) -> int:
         if hasattr(self, "kiter"):
             self.kiter += 1
         else:
             self.kiter = 0
         return self.kiter
+
+    def _solve_transport(self, dt: float) -> float:
+        """Solve transport over the next coupled step.
+
+        Without step control the coupled step is the Modflow 6 time step.
+        With step control the Modflow 6 time step is prepared when the
+        previous one is completed, and the coupled step is retried shorter
+        until transport converges.
+
+        Parameters
+        ----------
+        dt : float
+            Length of the Modflow 6 time step.
+
+        Returns
+        -------
+        float
+            Length of the solved coupled step.
+        """
+        ctl = self.step_control
+        if ctl is None or ctl.end_of_step:
+            with self.profiler.trace("prepare_time_step"):
+                self.mf6api.prepare_time_step(dt)
+        if ctl is None:
+            self.mf6api._solve_gwt()
+            return dt
+        if ctl.end_of_step:
+            ctl.start_step()
+        ctl.save()
+        while True:
+            dt = ctl.set_step()
+            # failures recovered by a cutback are not counted
+            self.mf6api._solve_gwt(count_fails=False)
+            if self.mf6api.converged:
+                ctl.converged(dt)
+                break
+            if not ctl.failed(dt):
+                self.mf6api.num_fails += self.mf6api.nfails
+                print(f"Transport did not converge at the smallest step {dt:.4g}, continuing")
+                break
+            ctl.restore()
+            print(f"Transport cutback from step {dt:.4g} to {ctl.fraction * ctl.dt_mf6:.4g}")
+        self.time_step = dt
+        return dt
+
+    def _write_outputs(self) -> None:
+        """Write the selected output, observations and ML targets of the
+        current time step"""
+        if not self.selected_output.get_selected_output_on:
+            return
+        prof = self.profiler
+        observations_on = bool(self.selected_output.observations)
+        if self.output_due or observations_on:
+            # get sout of the current step
+            with prof.trace("get_selected_output"):
+                self.selected_output._update_selected_output()
+        if self.output_due:
+            # append current sout rows to file
+            with prof.trace("write_selected_output"):
+                self.selected_output._append_to_soutdf_file()
+        if observations_on:
+            # append observation cells to their own files
+            with prof.trace("write_observations"):
+                self.selected_output._append_observations()
+        # Export ML target arrays if option is on
+        if self.ml_output:
+            with prof.trace("write_ml_targets"):
+                self.selected_output.write_ml_arrays(self.previous_iteration_conc,
+                                                     self.kiter,
+                                                     add_var_names=self.selected_output.target_var,
+                                                     fname='_targets.csv'
+                                                     )
+
     def solve(self) -> bool:
         """Solve the model"""
         success = False  # initialize success flag
@@ -559,15 +679,26 @@ class Mf6RTM(object):
             self.set_kiter()
             # length of the current solve time
             dt = self._set_time_step()
-            self.mf6api.prepare_time_step(dt)
-            self.mf6api._solve_gwt()
+            prof = self.profiler
+            prof.start_step(kiter=self.kiter, time=ctime, dt=dt)
+            with prof.span("transport"):
+                dt = self._solve_transport(dt)
+            prof.count("kper", int(self.mf6api.kper))
+            prof.count("kstp", int(self.mf6api.kstp))
+            prof.count("transport_sln", self.mf6api.sln_times)
+            prof.count("gwt_iters", self.mf6api.sln_iters)
 
             # get saturation
             self.get_saturation_from_mf6()
+            # selected output is calculated and written only when due
+            self.output_due = self.is_output_tstep()
             # check_reactive_kstp()
-            if self.is_reactive_tstep():
+            reactive_tstep = self.is_reactive_tstep()
+            prof.count("reactive", reactive_tstep)
+            if reactive_tstep:
 
-                c_dbl_vect = self._transfer_array_to_phreeqcrm()
+                with prof.span("to_phreeqcrm"):
+                    c_dbl_vect = self._transfer_array_to_phreeqcrm()
                 self._set_conc_at_current_kstep(c_dbl_vect)
 
                 # Export ML feature arrays if option is on
@@ -578,42 +709,67 @@ class Mf6RTM(object):
                                                     fname='_features.csv'
                                                 )
 
-                if ctime == 0.0:
+                # cells with transport changes within the tolerances are skipped
+                if (not self._check_previous_conc_exists()
+                        or not self.change_tolerance.enabled):
                     self.diffmask = np.ones(self.nxyz)
                 else:
-                    diffmask = get_conc_change_mask(
-                        self.current_iteration_conc,
-                        self.previous_iteration_conc,
-                        self.phreeqcbmi.ncomps,
-                        self.nxyz,
-                        treshold=self.epsaqu,
+                    with prof.span("mask"):
+                        self.diffmask = self.change_tolerance.mask(
+                            self.current_iteration_conc,
+                            self.previous_iteration_conc,
+                        )
+                    prof.count("ncells_skipped", self.change_tolerance.nskipped)
+                    prof.count("skip_triggers", self.change_tolerance.triggers)
+                    if self.change_tolerance.nskipped:
+                        self.phreeqcbmi.LogMessage(self.change_tolerance.summary())
+                # dry cells and cells removed by idomain are not reacted
+                dry = self.transfer.sat <= 0.0
+                if dry.any():
+                    self.diffmask = np.logical_and(self.diffmask, ~dry)
+                prof.count("ncells_dry", int(np.count_nonzero(dry)))
+                # selected output is calculated at output steps, and at all
+                # user reaction steps for the output steps between them
+                selected_output_on = (self.output_due or self.ml_output
+                                      or bool(self.selected_output.observations)
+                                      or self.config.reactive_timing == 'user')
+                # cells reacted without selected output are reacted again
+                self.diffmask = self.selected_output.get_reaction_mask(
+                    self.diffmask, dry, selected_output_on
+                )
+                # solve reactions over the accumulated transport steps
+                dt_react = dt
+                if self.adaptive_timing is not None:
+                    dt_react = self.adaptive_timing.dt
+                with prof.span("chemistry"):
+                    self.phreeqcbmi._solve_phreeqcrm(
+                        dt_react,
+                        diffmask=self.diffmask,
+                        selected_output_on=selected_output_on,
                     )
-                    self.diffmask = diffmask
-                # solve reactions
-                self.phreeqcbmi._solve_phreeqcrm(dt, diffmask=self.diffmask)
-                c_dbl_vect = self._transfer_array_to_mf6()
+                self.selected_output._update_reacted_output(selected_output_on)
+                prof.count("ncells_react", int(self.phreeqcbmi.ncells_react))
+                with prof.span("to_mf6"):
+                    c_dbl_vect = self._transfer_array_to_mf6()
+                if self.adaptive_timing is not None:
+                    self.adaptive_timing.update_rates(self.diffmask)
 
                 self._set_conc_at_previous_kstep(c_dbl_vect)
 
-            self.mf6api.finalize_time_step()
+            if self.step_control is None or self.step_control.end_of_step:
+                with prof.span("transport"), prof.trace("finalize_time_step"):
+                    self.mf6api.finalize_time_step()
             ctime = self._set_ctime()  # update the current time tracking
-            if self.selected_output.get_selected_output_on:
-                # get sout and update df
-                self.selected_output._update_selected_output()
-                # append current sout rows to file
-                self.selected_output._append_to_soutdf_file()
-                # Export ML target arrays if option is on
-                if self.ml_output:
-                    self.selected_output.write_ml_arrays(self.previous_iteration_conc,
-                                            self.kiter,
-                                            add_var_names=self.selected_output.target_var,
-                                            fname='_targets.csv'
-                                                )
+            with prof.span("output"):
+                self._write_outputs()
+            prof.end_step()
 
         sim_end = datetime.now()
         td = (sim_end - sim_start).total_seconds() / 60.0
 
         self.mf6api._check_num_fails()
+        if self.step_control is not None and self.step_control.ncutbacks > 0:
+            print(f"Time step was cut back {self.step_control.ncutbacks} times")
 
         # Clean up and close api objs
         try:
@@ -646,28 +802,6 @@ def get_inactive_idx(arr: np.ndarray, val: float = 1e30):
     return idx
 
 
-def get_conc_change_mask(
-    ci: np.ndarray[np.float64],
-    ck: np.ndarray[np.float64],
-    ncomp: int,
-    nxyz: int,
-    treshold: float = 1e-10,
-) -> np.ndarray[np.float64]:
-    """Function to get the active-inactive cell mask for concentration change to inform phreeqc which cells to update"""
-    # reshape arrays to 2D (nxyz, ncomp)
-    ci = ci.reshape(nxyz, ncomp)
-    ck = ck.reshape(nxyz, ncomp) + 1e-30
-
-    # get the difference between the two arrays and divide by ci
-    diff = np.abs((ci - ck.reshape(-1 * nxyz, ncomp)) / ci) < treshold
-    diff = np.where(diff, 0, 1)
-    diff = diff.sum(axis=1)
-
-    # where values <0 put -1 else 1
-    diff = np.where(diff == 0, 0, 1)
-    return diff
-
-
 def longest_common_substring(strings):
     """Function to find the longest common substring of a list of strings
     Used here to find the common "stem" of the GWT model names for matching
@@ -0,0 +1,327 @@
+"""
+The steadyflow module splits a coupled flow and transport simulation with a
+steady flow field into a flow simulation, solved once, and a transport only
+simulation that reads the heads and flows through the Flow Model Interface
+(FMI) package. Flow solutions are cached by the hash of the flow input files
+so repeated runs with the same flow model reuse them.
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+
+import flopy
+
+TRANSPORT_WS = "transport"
+HEAD_FNAME = "flow.hds"
+BUDGET_FNAME = "flow.cbb"
+# written once the flow simulation converged, cached solutions without it
+# are incomplete
+COMPLETE_FNAME = "complete"
+# packages without stress data, or checked separately
+NON_STRESS_PACKAGES = ("sto", "oc", "obs")
+TIME_SERIES_RECORDS = ("ts_filerecord", "tas_filerecord")
+
+
+def load_simulation(ws: os.PathLike) -> flopy.mf6.MFSimulation:
+    """Load a simulation without file headers so written inputs only
+    change when the model changes"""
+    return flopy.mf6.MFSimulation.load(
+        sim_ws=ws, verbosity_level=0, write_headers=False
+    )
+
+
+def model_names_of_type(sim: flopy.mf6.MFSimulation, model_type: str) -> list:
+    """Names of the models of a type, e.g. 'gwf6' or 'gwt6'"""
+    return [
+        name for name in sim.model_names
+        if sim.get_model(name).model_type == model_type
+    ]
+
+
+def transient_stress_packages(gwf) -> list:
+    """Names of the flow packages with stress data changing over time.
+
+    Stress data change if list or array input (e.g. CHD, RCHA recharge) is
+    given for more than one stress period, or if the package reads time
+    series or time array series.
+
+    Parameters
+    ----------
+    gwf : flopy.mf6.ModflowGwf
+        The flow model.
+
+    Returns
+    -------
+    list
+        Names of the packages.
+    """
+    names = []
+    for package in gwf.packagelist:
+        if package.package_type in NON_STRESS_PACKAGES:
+            continue
+        transient = package.package_type in ("ts", "tas")
+        for block in package.blocks.values():
+            for name, dataset in block.datasets.items():
+                if name in TIME_SERIES_RECORDS and dataset.get_data():
+                    transient = True
+                elif (hasattr(dataset, "get_active_key_list")
+                        and len(dataset.get_active_key_list()) > 1):
+                    transient = True
+        if transient:
+            names.append(package.package_name)
+    return names
+
+
+def is_steady_flow(sim: flopy.mf6.MFSimulation) -> bool:
+    """Check if the flow model of a simulation is steady state.
+
+    The flow is steady if the storage package is absent or steady state in
+    all stress periods, and the stress data of the other packages do not
+    change over time (see ``transient_stress_packages``).
+
+    Parameters
+    ----------
+    sim : flopy.mf6.MFSimulation
+        The coupled simulation.
+
+    Returns
+    -------
+    bool
+        True if the flow field does not change over the simulation.
+    """
+    gwf_names = model_names_of_type(sim, "gwf6")
+    if len(gwf_names) != 1:
+        return False
+    gwf = sim.get_model(gwf_names[0])
+    for package in gwf.packagelist:
+        if package.package_type == "sto":
+            transient = [
+                package.transient.get_data(key=key)
+                for key, _ in package.transient.get_active_key_list()
+            ]
+            if any(transient):
+                return False
+    return not transient_stress_packages(gwf)
+
+
+def _keep_models(sim: flopy.mf6.MFSimulation, model_type: str) -> tuple:
+    """Remove exchanges, models and solution group entries of other model
+    types.
+
+    Returns
+    -------
+    tuple
+        Names of the kept models and file names of the dropped solutions.
+        The dropped solution packages stay registered in flopy (removing
+        them fails on the solution group update) and are still written.
+    """
+    keep = model_names_of_type(sim, model_type)
+    for exchange in list(sim.exchange_files):
+        sim.remove_package(exchange)
+    groups = sim.name_file.solutiongroup.get_data()
+    for name in sim.model_names:
+        if name not in keep:
+            sim.remove_model(name)
+    lower = [name.lower() for name in keep]
+    kept, dropped = {}, []
+    for key, rows in groups.items():
+        kept[key] = [tuple(row) for row in rows if str(row["slnmnames"]).lower() in lower]
+        dropped += [str(row["slnfname"]) for row in rows
+                    if str(row["slnmnames"]).lower() not in lower]
+    sim.name_file.solutiongroup.set_data(kept)
+    return keep, dropped
+
+
+def _write(sim: flopy.mf6.MFSimulation, ws: os.PathLike, dropped: list) -> None:
+    """Write the simulation to ws without the dropped solution files"""
+    sim.set_sim_path(ws)
+    sim.write_simulation(silent=True)
+    for fname in dropped:
+        path = Path(ws) / fname
+        if path.exists():
+            path.unlink()
+
+
+def write_flow_simulation(wd: os.PathLike, ws: os.PathLike) -> str:
+    """Write the flow model of a coupled simulation as a one time step
+    simulation saving heads, flows and saturation for FMI.
+
+    Parameters
+    ----------
+    wd : os.PathLike
+        Directory of the coupled simulation.
+    ws : os.PathLike
+        Directory of the flow simulation.
+
+    Returns
+    -------
+    str
+        Name of the flow model.
+    """
+    sim = load_simulation(wd)
+    gwf_names, dropped = _keep_models(sim, "gwf6")
+    gwfname = gwf_names[0]
+    gwf = sim.get_model(gwfname)
+    # later periods, incl. auxiliary concentrations read by SSM, are dropped
+    changing = transient_stress_packages(gwf)
+    assert not changing, (
+        f"Stress data of {changing} change over time and would be dropped by "
+        "the one period steady flow, set flow steady to 'auto' or false"
+    )
+
+    # a single steady state solve
+    sim.tdis.nper.set_data(1)
+    sim.tdis.perioddata.set_data([(1.0, 1, 1.0)])
+
+    # flows of all packages, incl. auxiliary concentrations, for FMI and SSM
+    gwf.name_file.save_flows.set_data(True)
+    npf = gwf.get_package("npf")
+    npf.save_specific_discharge.set_data(True)
+    npf.save_saturation.set_data(True)
+    gwf.remove_package("oc")
+    flopy.mf6.ModflowGwfoc(
+        gwf,
+        head_filerecord=HEAD_FNAME,
+        budget_filerecord=BUDGET_FNAME,
+        saverecord=[("HEAD", "LAST"), ("BUDGET", "LAST")],
+    )
+    _write(sim, ws, dropped)
+    return gwfname
+
+
+def write_transport_simulation(wd: os.PathLike, ws: os.PathLike,
+                               flow_ws: os.PathLike) -> list:
+    """Write the transport models of a coupled simulation as a transport
+    only simulation reading the flow solution through FMI.
+
+    Parameters
+    ----------
+    wd : os.PathLike
+        Directory of the coupled simulation.
+    ws : os.PathLike
+        Directory of the transport simulation.
+    flow_ws : os.PathLike
+        Directory of the solved flow simulation.
+
+    Returns
+    -------
+    list
+        Names of the transport models.
+    """
+    sim = load_simulation(wd)
+    gwt_names, dropped = _keep_models(sim, "gwt6")
+    head = os.path.relpath(Path(flow_ws) / HEAD_FNAME, ws)
+    budget = os.path.relpath(Path(flow_ws) / BUDGET_FNAME, ws)
+    for name in gwt_names:
+        gwt = sim.get_model(name)
+        flopy.mf6.ModflowGwtfmi(
+            gwt,
+            packagedata=[("GWFHEAD", head), ("GWFBUDGET", budget)],
+            filename=f"{name}.fmi",
+        )
+    _write(sim, ws, dropped)
+    return gwt_names
+
+
+def inputs_hash(ws: os.PathLike) -> str:
+    """SHA-256 of the names and contents of the files in a directory"""
+    sha = hashlib.sha256()
+    for path in sorted(Path(ws).iterdir()):
+        if path.is_file():
+            sha.update(path.name.encode())
+            sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+def run_flow_simulation(ws: os.PathLike, exe_name: str = "mf6") -> None:
+    """Run the flow simulation with the Modflow 6 executable"""
+    sim = flopy.mf6.MFSimulation.load(sim_ws=ws, verbosity_level=0, exe_name=exe_name)
+    success, buff = sim.run_simulation(silent=True)
+    assert success, "Steady flow simulation did not run:\n" + "\n".join(buff[-20:])
+    for lst in Path(ws).glob("*.lst"):
+        with open(lst, errors="replace") as f:
+            assert "FAILED TO MEET SOLVER CONVERGENCE" not in f.read(), \
+                f"Steady flow simulation did not converge, see {lst}"
+
+
+def publish_flow_solution(staging: Path, flow_ws: Path) -> None:
+    """Move a solved flow simulation into the cache.
+
+    The staging directory is renamed to flow_ws, so other runs see either
+    no solution or a complete one. If another run published the same
+    solution first, the staging directory is removed.
+    """
+    try:
+        os.replace(staging, flow_ws)
+        return
+    except OSError:
+        if not (flow_ws / COMPLETE_FNAME).exists():
+            # incomplete solution left by an older or failed run
+            shutil.rmtree(flow_ws, ignore_errors=True)
+            try:
+                os.replace(staging, flow_ws)
+                return
+            except OSError:
+                pass
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def prepare_steady_flow(wd: os.PathLike, cache: os.PathLike = "flow_cache",
+                        check: bool = False) -> Path:
+    """Solve the steady flow of a coupled simulation once and write the
+    transport only simulation coupled to it.
+
+    The flow simulation is written to a staging directory of the cache,
+    unique to the run, and hashed. If a complete solution with the same hash
+    exists in the cache it is reused, otherwise the flow simulation is run
+    in the staging directory, which is moved into the cache only once it
+    converged. The transport simulation is written to ``wd/transport``.
+
+    Parameters
+    ----------
+    wd : os.PathLike
+        Directory of the coupled simulation.
+    cache : os.PathLike, optional
+        Directory of the cached flow solutions, relative to wd or absolute.
+        Can be shared between runs. Default is 'flow_cache'.
+    check : bool, optional
+        If True, the flow is first checked to be steady and wd is returned
+        unchanged if it is not. Default is False.
+
+    Returns
+    -------
+    Path
+        Directory of the simulation to couple, the transport simulation,
+        or wd if the flow is not steady.
+    """
+    wd = Path(wd)
+    if check and not is_steady_flow(load_simulation(wd)):
+        print("Flow is not steady, running the coupled flow and transport simulation")
+        return wd
+    cache = wd / cache
+    cache.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix="staging.", dir=cache))
+    try:
+        write_flow_simulation(wd, staging)
+        flow_ws = cache / inputs_hash(staging)[:16]
+        if (flow_ws / COMPLETE_FNAME).exists():
+            print(f"Reusing the steady flow solution in {flow_ws}")
+            shutil.rmtree(staging)
+        else:
+            exe = [f for f in os.listdir(wd) if f.split(".")[0] == "mf6"]
+            exe_name = str(wd / exe[0]) if exe else "mf6"
+            print(f"Solving steady flow in {flow_ws}")
+            run_flow_simulation(staging, exe_name=exe_name)
+            (staging / COMPLETE_FNAME).touch()
+            publish_flow_solution(staging, flow_ws)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    transport_ws = wd / TRANSPORT_WS
+    if transport_ws.exists():
+        shutil.rmtree(transport_ws)
+    write_transport_simulation(wd, transport_ws, flow_ws)
+    return transport_ws
@@ -0,0 +1,303 @@
+"""
+The timing module provides the AdaptiveTiming class that decides at run time
+whether reactions are calculated at the current transport time step, or
+transport time steps are accumulated and reacted over the combined dt, and
+the TimeStepControl class that cuts back the coupled time step when
+transport does not converge.
+"""
+import numpy as np
+
+from mf6rtm.simulation.transfer import ConcentrationTransfer
+from mf6rtm.simulation.tolerance import WATER_COMPONENTS, CHARGE_COMPONENT
+
+
+class AdaptiveTiming(object):
+    """Adaptive reaction timing from concentration change norms.
+
+    Transport steps are accumulated until the estimated error of skipping
+    reactions exceeds the error budget. The error of a candidate step is the
+    sum of two scaled max norms over cells, taken for the worst component:
+
+    - the transport change since the last reaction step, and
+    - the reaction change predicted over the accumulated dt from the rates
+      of the last chemistry call, ``(reacted - transported) / dt``.
+
+    Each norm is scaled by the largest absolute concentration of the
+    component plus ``atol``. As for the reaction skip tolerances, the totals
+    of H and O and the charge balance, close to zero, are not checked.
+    Reactions are also calculated when ``max_tsteps`` transport steps have
+    been accumulated.
+
+    Parameters
+    ----------
+    transfer : ConcentrationTransfer
+        The concentration exchange holding the transported and reacted
+        concentration buffers.
+    tolerance : float, optional
+        Error budget (relative) for skipping reactions. Default is 1e-2.
+    max_tsteps : int, optional
+        Maximum number of transport steps reacted together. Default is 10.
+    atol : float, optional
+        Absolute concentration (mol/L) added to the scale of each
+        component. Default is 1e-12.
+    """
+    def __init__(
+        self,
+        transfer: ConcentrationTransfer,
+        tolerance: float = 1e-2,
+        max_tsteps: int = 10,
+        atol: float = 1e-12,
+    ) -> None:
+        assert tolerance > 0, "tolerance must be positive"
+        assert max_tsteps >= 1, "max_tsteps must be at least 1"
+        self.transfer = transfer
+        self.tolerance = tolerance
+        self.max_tsteps = max_tsteps
+        self.atol = atol
+
+        self.checked = np.array([
+            c.lower() not in WATER_COMPONENTS + (CHARGE_COMPONENT,)
+            for c in transfer.table.components
+        ], dtype=bool)
+
+        shape = transfer.conc.shape
+        self.rate = np.zeros(shape, dtype=np.float64)
+        self._work = np.empty(shape, dtype=np.float64)
+        self.dt = 0.0
+        self.ntsteps = 0
+        self.error = 0.0
+        self.nreactions = 0
+        self.nskipped = 0
+
+    def _scaled_max_norm(self, delta: np.ndarray, ref: np.ndarray) -> float:
+        """Largest max norm of delta scaled by max |ref| of the checked
+        components"""
+        if not self.checked.any():
+            return 0.0
+        np.abs(delta, out=delta)
+        num = delta.max(axis=1)
+        np.abs(ref, out=self._work)
+        scale = self._work.max(axis=1) + self.atol
+        return float(np.max(num[self.checked] / scale[self.checked]))
+
+    def estimate_error(self) -> float:
+        """Estimate the error of not reacting the accumulated transport steps.
+
+        Returns
+        -------
+        float
+            The scaled error estimate.
+        """
+        if not self.transfer.has_reacted:
+            return np.inf
+        # transport change since the last reaction step
+        delta = np.subtract(self.transfer.conc, self.transfer.reacted, out=self._work)
+        err_transport = self._scaled_max_norm(delta, self.transfer.conc)
+        # reaction change predicted from the rates of the last chemistry call
+        delta = np.multiply(self.rate, self.dt, out=self._work)
+        err_reaction = self._scaled_max_norm(delta, self.transfer.conc)
+        return err_transport + err_reaction
+
+    def step(self, dt: float, force: bool = False) -> bool:
+        """Accumulate a transport step and decide if reactions are due.
+
+        The transported concentrations are read from Modflow 6 into the
+        transfer buffer before the decision, and are sent to PhreeqcRM from
+        the buffer if reactions are due.
+
+        Parameters
+        ----------
+        dt : float
+            Length of the transport time step.
+        force : bool, optional
+            If True, reactions are due regardless of the error estimate,
+            e.g. at the last time step of the simulation.
+
+        Returns
+        -------
+        bool
+            True if reactions should be calculated over ``self.dt``.
+        """
+        self.dt += dt
+        self.ntsteps += 1
+        self.transfer.from_mf6()
+        self.error = self.estimate_error()
+        due = (
+            force
+            or self.ntsteps >= self.max_tsteps
+            or self.error > self.tolerance
+        )
+        if not due:
+            self.nskipped += 1
+        return due
+
+    def update_rates(self, active: np.ndarray = None) -> None:
+        """Update the reaction rates from the last chemistry call and reset
+        the accumulated transport steps.
+
+        Parameters
+        ----------
+        active : np.ndarray, optional
+            Cell mask (nxyz) of the cells sent to reactions, the rates of
+            skipped cells are kept. If None, all rates are updated.
+        """
+        delta = np.subtract(self.transfer.reacted, self.transfer.conc, out=self._work)
+        delta /= self.dt
+        if active is None:
+            np.copyto(self.rate, delta)
+        else:
+            np.copyto(self.rate, delta, where=np.asarray(active, dtype=bool))
+        self.dt = 0.0
+        self.ntsteps = 0
+        self.nreactions += 1
+
+
+class TimeStepControl(object):
+    """Time step cutback and recovery of the coupled solve.
+
+    A Modflow 6 time step is solved in one or more coupled steps of length
+    ``fraction * dt``. The concentrations (and heads) of all models, ``X``
+    and ``XOLD``, are saved before each coupled step. If a solution does not converge, they
+    are restored and the step is retried with the fraction multiplied by
+    ``cutback``. After ``grow_after`` converged steps in a row the fraction
+    is multiplied by ``grow``, up to 1.
+
+    The coupled step is set by overwriting the length and end time of the
+    current time step in the Modflow 6 TDIS memory between
+    ``prepare_time_step`` and ``finalize_time_step``. Modflow 6 copies ``X``
+    to ``XOLD`` only in ``prepare_time_step``, so ``X`` is copied to
+    ``XOLD`` after each converged coupled step that does not complete the
+    Modflow 6 time step, and the storage terms of the next coupled step
+    start from its solution. Chemistry runs after
+    transport has converged, so a failed step leaves PhreeqcRM untouched.
+
+    Parameters
+    ----------
+    mf6api : Mf6API
+        The Modflow 6 API instance.
+    model_names : list[str]
+        Names of the models whose ``X`` and ``XOLD`` arrays are saved and
+        restored.
+    cutback : float, optional
+        Factor applied to the step fraction after a failure. Default is 0.5.
+    grow : float, optional
+        Factor applied to the step fraction after ``grow_after`` converged
+        steps. Default is 2.0.
+    grow_after : int, optional
+        Number of converged steps in a row before growing. Default is 3.
+    min_fraction : float, optional
+        Smallest fraction of the Modflow 6 time step. A step failing at the
+        smallest fraction is accepted unconverged. Default is 1e-3.
+    """
+    def __init__(
+        self,
+        mf6api,
+        model_names: list[str],
+        cutback: float = 0.5,
+        grow: float = 2.0,
+        grow_after: int = 3,
+        min_fraction: float = 1e-3,
+    ) -> None:
+        assert 0 < cutback < 1, "cutback must be between 0 and 1"
+        assert grow >= 1, "grow must be at least 1"
+        assert 0 < min_fraction <= 1, "min_fraction must be between 0 and 1"
+        self.cutback = cutback
+        self.grow = grow
+        self.grow_after = grow_after
+        self.min_fraction = min_fraction
+
+        # views of the model states and of the TDIS time step
+        self.x = [
+            mf6api.get_value_ptr(mf6api.get_var_address("X", name.upper()))
+            for name in model_names
+        ]
+        self.xold = [
+            mf6api.get_value_ptr(mf6api.get_var_address("XOLD", name.upper()))
+            for name in model_names
+        ]
+        self.saved = [np.empty_like(x) for x in self.x]
+        self.saved_xold = [np.empty_like(x) for x in self.xold]
+        self.delt = mf6api.get_value_ptr(mf6api.get_var_address("DELT", "TDIS"))
+        self.totim = mf6api.get_value_ptr(mf6api.get_var_address("TOTIM", "TDIS"))
+        self.pertim = mf6api.get_value_ptr(mf6api.get_var_address("PERTIM", "TDIS"))
+
+        self.fraction = 1.0
+        self.nconverged = 0
+        self.ncutbacks = 0
+        self.t = 0.0
+        self.t_end = 0.0
+        self.dt_mf6 = 0.0
+        self.pertim_end = 0.0
+
+    @property
+    def end_of_step(self) -> bool:
+        """True if the Modflow 6 time step is completed"""
+        return self.t >= self.t_end - 1e-12 * max(self.dt_mf6, 1.0)
+
+    def start_step(self) -> None:
+        """Read the Modflow 6 time step set by ``prepare_time_step``"""
+        self.dt_mf6 = float(self.delt[0])
+        self.t_end = float(self.totim[0])
+        self.pertim_end = float(self.pertim[0])
+        self.t = self.t_end - self.dt_mf6
+
+    def save(self) -> None:
+        """Save the model states before a coupled step"""
+        for saved, x in zip(self.saved + self.saved_xold, self.x + self.xold):
+            np.copyto(saved, x)
+
+    def restore(self) -> None:
+        """Restore the model states saved before the failed step"""
+        for saved, x in zip(self.saved + self.saved_xold, self.x + self.xold):
+            np.copyto(x, saved)
+
+    def set_step(self) -> float:
+        """Set the next coupled step in the TDIS memory and return its length"""
+        remaining = self.t_end - self.t
+        dt = min(self.fraction * self.dt_mf6, remaining)
+        # do not leave a sliver of the time step
+        if remaining - dt < 1e-6 * self.dt_mf6:
+            dt = remaining
+        self.delt[0] = dt
+        self.totim[0] = self.t + dt
+        self.pertim[0] = self.pertim_end - (self.t_end - self.t - dt)
+        return dt
+
+    def _advance(self, dt: float) -> None:
+        """Advance past an accepted step, the next coupled step of the
+        Modflow 6 time step starts from its ``X``. At the end of the time
+        step the Modflow 6 time step is set back in TDIS, the next time
+        step length is computed from it"""
+        self.t += dt
+        if not self.end_of_step:
+            for x, xold in zip(self.x, self.xold):
+                np.copyto(xold, x)
+        else:
+            self.delt[0] = self.dt_mf6
+            self.totim[0] = self.t_end
+            self.pertim[0] = self.pertim_end
+
+    def converged(self, dt: float) -> None:
+        """Advance past a converged step and grow the fraction"""
+        self._advance(dt)
+        self.nconverged += 1
+        if self.nconverged >= self.grow_after and self.fraction < 1.0:
+            self.fraction = min(1.0, self.fraction * self.grow)
+            self.nconverged = 0
+
+    def failed(self, dt: float) -> bool:
+        """Cut back the fraction after a failed step.
+
+        Returns
+        -------
+        bool
+            True if the step is retried, False if the fraction is already
+            the smallest and the step is accepted.
+        """
+        self.nconverged = 0
+        if self.fraction * self.cutback < self.min_fraction:
+            self._advance(dt)
+            return False
+        self.fraction *= self.cutback
+        self.ncutbacks += 1
+        return True
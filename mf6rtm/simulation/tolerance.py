@@ -0,0 +1,162 @@
+"""
+The tolerance module provides the ChangeTolerance class that selects the
+cells sent to reactions from the transport change of the aqueous components
+since the last reaction step, with absolute and relative tolerances per
+component.
+"""
+import numpy as np
+
+# totals of water elements change little relative to their values and
+# follow the other components, they do not trigger reactions by default
+WATER_COMPONENTS = ("h", "o")
+CHARGE_COMPONENT = "charge"
+
+
+class ChangeTolerance(object):
+    """Per component tolerances of the transport change for reaction skipping.
+
+    A cell is sent to reactions if, for any component ``i``,
+
+    ``|c[i] - c_prev[i]| > atol[i] + rtol[i] * |c[i]|``
+
+    where ``c`` are the transported concentrations and ``c_prev`` the
+    reacted concentrations of the last reaction step of the cell. Other
+    cells are skipped and keep their transported concentrations, so changes
+    below the tolerances add up until the cell is reacted again.
+
+    The totals of H and O do not trigger reactions unless they are given in
+    ``tolerances``. Charge is a balance close to zero and is compared with
+    its absolute tolerance only.
+
+    Parameters
+    ----------
+    components : list[str]
+        PhreeqcRM component names, in PhreeqcRM order.
+    nxyz : int
+        Total number of cells in the grid.
+    atol : float, optional
+        Absolute tolerance (mol/L) of all components. Default is 0.0.
+    rtol : float, optional
+        Relative tolerance of all components. Default is 0.0.
+    tolerances : dict[str, dict], optional
+        Tolerances of single components, e.g. ``{'Fe': {'atol': 1e-9,
+        'rtol': 1e-3}}``, overriding atol and rtol.
+
+    Attributes
+    ----------
+    enabled : bool
+        False if all tolerances are zero, i.e. all cells react.
+    nskipped : int
+        Number of cells skipped at the last call of ``mask``.
+    triggers : dict[str, int]
+        Number of cells exceeding the tolerance of each component at the
+        last call of ``mask``.
+    """
+    def __init__(
+        self,
+        components: list[str],
+        nxyz: int,
+        atol: float = 0.0,
+        rtol: float = 0.0,
+        tolerances: dict = None,
+    ) -> None:
+        tolerances = tolerances or {}
+        unknown = set(tolerances) - set(components)
+        assert not unknown, f"Tolerances of {sorted(unknown)} are not PhreeqcRM components"
+        self.components = [str(c) for c in components]
+        ncomps = len(self.components)
+        self.atol = np.full(ncomps, float(atol))
+        self.rtol = np.full(ncomps, float(rtol))
+        for i, c in enumerate(self.components):
+            if c in tolerances:
+                self.atol[i] = tolerances[c].get("atol", atol)
+                self.rtol[i] = tolerances[c].get("rtol", rtol)
+            elif c.lower() in WATER_COMPONENTS:
+                self.atol[i] = np.inf
+            if c.lower() == CHARGE_COMPONENT:
+                self.rtol[i] = 0.0
+        assert np.all(self.atol >= 0) and np.all(self.rtol >= 0), \
+            "Tolerances must be positive"
+        checked = np.isfinite(self.atol)
+        self.enabled = bool(np.any(checked & ((self.atol > 0) | (self.rtol > 0))))
+
+        self._diff = np.empty((ncomps, nxyz), dtype=np.float64)
+        self._tol = np.empty((ncomps, nxyz), dtype=np.float64)
+        self._exceed = np.empty((ncomps, nxyz), dtype=bool)
+        self.active = np.ones(nxyz, dtype=bool)
+        self.nskipped = 0
+        self.triggers = dict.fromkeys(self.components, 0)
+
+    def mask(self, conc: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        """Cells where the transport change exceeds the tolerances.
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            The ``(ncomps, nxyz)`` transported concentrations.
+        previous : np.ndarray
+            The ``(ncomps, nxyz)`` reacted concentrations of the last
+            reaction step of each cell.
+
+        Returns
+        -------
+        np.ndarray
+            The (nxyz) boolean mask of the cells sent to reactions.
+        """
+        diff = np.subtract(conc, previous, out=self._diff)
+        np.abs(diff, out=diff)
+        tol = np.abs(conc, out=self._tol)
+        tol *= self.rtol[:, None]
+        tol += self.atol[:, None]
+        np.greater(diff, tol, out=self._exceed)
+        np.any(self._exceed, axis=0, out=self.active)
+
+        self.nskipped = int(self.active.size - np.count_nonzero(self.active))
+        counts = np.count_nonzero(self._exceed, axis=1)
+        self.triggers = dict(zip(self.components, counts.tolist()))
+        return self.active
+
+    def summary(self) -> str:
+        """Message with the skipped cells and the components triggering
+        reactions at the last call of ``mask``"""
+        triggers = ", ".join(f"{c}: {n}" for c, n in self.triggers.items() if n)
+        return (f"{'Cells skipped':<25} | {self.nskipped:<0}/{self.active.size:<15}"
+                f" | exceeding tolerance {triggers or 'none'}")
+
+
+def get_conc_change_mask(
+    ci: np.ndarray[np.float64],
+    ck: np.ndarray[np.float64],
+    ncomp: int,
+    nxyz: int,
+    treshold: float = 1e-10,
+    atol: float = 0.0,
+) -> np.ndarray[np.int64]:
+    """Function to get the active-inactive cell mask for concentration change
+    to inform phreeqc which cells to update.
+
+    Parameters
+    ----------
+    ci : np.ndarray
+        Current (ncomp, nxyz) concentrations, flat or 2D.
+    ck : np.ndarray
+        Previous (ncomp, nxyz) concentrations, flat or 2D.
+    ncomp : int
+        Number of components.
+    nxyz : int
+        Number of cells.
+    treshold : float, optional
+        Relative tolerance of all components. Default is 1e-10.
+    atol : float, optional
+        Absolute tolerance of all components. Default is 0.0.
+
+    Returns
+    -------
+    np.ndarray
+        The (nxyz) mask, 1 for cells with a change of any component larger
+        than ``atol + treshold * |ci|``, 0 otherwise.
+    """
+    ci = np.reshape(ci, (ncomp, nxyz))
+    ck = np.reshape(ck, (ncomp, nxyz))
+    exceed = np.abs(ci - ck) > atol + treshold * np.abs(ci)
+    return exceed.any(axis=0).astype(np.int64)
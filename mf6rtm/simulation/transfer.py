@@ -0,0 +1,314 @@
+"""
+The transfer module provides the CouplingTable that resolves once how each
+PhreeqcRM component maps onto Modflow 6 memory, and the ConcentrationTransfer
+class that exchanges aqueous component concentrations between the Modflow 6 GWT
+models and PhreeqcRM through preallocated buffers and direct memory views.
+"""
+import numpy as np
+
+from dataclasses import dataclass
+
+# unit conversion factors between Modflow 6 (mol/m3) and PhreeqcRM (mol/L)
+M3_TO_L = 1e-3
+L_TO_M3 = 1e3
+
+
+@dataclass(frozen=True)
+class CouplingEntry:
+    """Resolved coupling of one PhreeqcRM component to its GWT model.
+
+    Attributes
+    ----------
+    component : str
+        PhreeqcRM component name.
+    model_name : str
+        Modflow 6 GWT model name.
+    x_address : str
+        Memory address of the GWT concentration array.
+    x : np.ndarray
+        View of the GWT concentration array (mol/m3).
+    offset : float
+        Offset (mol/m3) added in Modflow 6, nonzero only for charge.
+    to_phreeqcrm_factor : float
+        Unit factor from Modflow 6 to PhreeqcRM concentrations.
+    to_mf6_factor : float
+        Unit factor from PhreeqcRM to Modflow 6 concentrations.
+    fixed : bool
+        True if the component is not transported. PhreeqcRM keeps its
+        concentrations and they are not copied to Modflow 6.
+    """
+    component: str
+    model_name: str
+    x_address: str
+    x: np.ndarray
+    offset: float = 0.0
+    to_phreeqcrm_factor: float = M3_TO_L
+    to_mf6_factor: float = L_TO_M3
+    fixed: bool = False
+
+
+@dataclass(frozen=True)
+class CouplingTable:
+    """Immutable table of component couplings built once before solving.
+
+    Attributes
+    ----------
+    entries : tuple[CouplingEntry, ...]
+        One entry per PhreeqcRM component, in PhreeqcRM order.
+    sat_address : str
+        Memory address of the flow model saturation seen by the GWT models.
+    sat : np.ndarray
+        View of the saturation array.
+    nodes : np.ndarray or None
+        0-based user node number of each Modflow 6 node when cells are
+        removed by idomain, None if all user cells are Modflow 6 nodes.
+    """
+    entries: tuple
+    sat_address: str
+    sat: np.ndarray
+    nodes: np.ndarray = None
+
+    @classmethod
+    def build(
+        cls,
+        mf6api,
+        components: list[str],
+        component_model_dict: dict[str, str],
+        charge_offset: float = 0.0,
+        fixed_components: list[str] = (),
+        nxyz: int = None,
+    ) -> "CouplingTable":
+        """Resolve addresses and memory views for all components.
+
+        Parameters
+        ----------
+        mf6api : Mf6API
+            The Modflow 6 API instance.
+        components : list[str]
+            PhreeqcRM component names, in PhreeqcRM order.
+        component_model_dict : dict[str, str]
+            Dictionary mapping PhreeqcRM components to GWT model names.
+        charge_offset : float, optional
+            Offset (mol/m3) added to the charge component in Modflow 6.
+        fixed_components : list[str], optional
+            PhreeqcRM components that are not transported.
+        nxyz : int, optional
+            Number of user cells. If the Modflow 6 arrays are smaller, the
+            user node numbers of the Modflow 6 nodes are resolved.
+
+        Returns
+        -------
+        CouplingTable
+            The resolved coupling table.
+        """
+        entries = []
+        for c in components:
+            c = str(c)
+            model_name = component_model_dict[c]
+            x_address = mf6api.get_var_address("X", model_name.upper())
+            entries.append(
+                CouplingEntry(
+                    component=c,
+                    model_name=model_name,
+                    x_address=x_address,
+                    x=mf6api.get_value_ptr(x_address),
+                    offset=charge_offset if c.lower() == "charge" else 0.0,
+                    fixed=c in fixed_components,
+                )
+            )
+        # saturation is the same for all transport models
+        sat_address = mf6api.get_var_address(
+            "FMI/GWFSAT", component_model_dict[entries[0].component]
+        )
+        # cells removed by idomain are not Modflow 6 nodes
+        nodes = None
+        model_name = entries[0].model_name.upper()
+        if nxyz is not None and entries[0].x.size != nxyz:
+            nodeuser = mf6api.get_value_ptr(
+                mf6api.get_var_address("NODEUSER", model_name, "DIS")
+            )
+            nodes = np.asarray(nodeuser, dtype=np.int64) - 1
+        return cls(
+            entries=tuple(entries),
+            sat_address=sat_address,
+            sat=mf6api.get_value_ptr(sat_address),
+            nodes=nodes,
+        )
+
+    @property
+    def components(self) -> list[str]:
+        """Component names in PhreeqcRM order"""
+        return [entry.component for entry in self.entries]
+
+    @property
+    def fixed(self) -> np.ndarray:
+        """Indices of the fixed components in PhreeqcRM order"""
+        return np.array(
+            [i for i, entry in enumerate(self.entries) if entry.fixed], dtype=int
+        )
+
+
+class ConcentrationTransfer(object):
+    """Zero-copy concentration exchange between libmf6 and PhreeqcRM.
+
+    The GWT ``X`` arrays are accessed through ``get_value_ptr`` views, so
+    concentrations are read from and written to Modflow 6 memory directly.
+    Unit conversion and the charge offset are applied in place on two
+    preallocated ``(ncomps, nxyz)`` float64 buffers:
+
+    - ``conc`` holds the transported concentrations sent to PhreeqcRM.
+    - ``reacted`` holds the reacted concentrations sent back to Modflow 6.
+      Cells skipped by the concentration change mask keep their values from
+      their last reaction step, the reference of the change tolerances,
+      while Modflow 6 keeps their transported concentrations.
+
+    Fixed components are neither read from nor written to Modflow 6, their
+    rows of ``conc`` are the PhreeqcRM concentrations of the previous
+    chemistry step.
+
+    When idomain removes cells from the Modflow 6 arrays, the buffers keep
+    all user cells: Modflow 6 nodes are scattered to and gathered from their
+    user cells, removed cells have zero concentrations and saturation.
+
+    Parameters
+    ----------
+    table : CouplingTable
+        The resolved component coupling table.
+    phreeqcbmi : PhreeqcBMI
+        The PhreeqcRM BMI instance.
+    nxyz : int
+        Total number of cells in the grid.
+    """
+    def __init__(
+        self,
+        table: CouplingTable,
+        phreeqcbmi,
+        nxyz: int,
+    ) -> None:
+        self.table = table
+        self.phreeqcbmi = phreeqcbmi
+        self.ncomps = len(table.entries)
+        self.nxyz = nxyz
+
+        self.conc = np.zeros((self.ncomps, self.nxyz), dtype=np.float64)
+        self.reacted = np.zeros((self.ncomps, self.nxyz), dtype=np.float64)
+        self.sat = np.zeros(self.nxyz, dtype=np.float64)
+        self.has_reacted = False
+        self.fixed = table.fixed
+        self.nodes = table.nodes
+        # Modflow 6 node buffer of the scatter and gather
+        self._node_buffer = None
+        if self.nodes is not None:
+            self._node_buffer = np.empty(self.nodes.size, dtype=np.float64)
+        # Modflow 6 values of the reacted cells when cells are skipped
+        nsize = self.nxyz if self.nodes is None else self.nodes.size
+        self._x_buffer = np.empty(nsize, dtype=np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes moved in one direction of the exchange"""
+        return self.conc.nbytes
+
+    def from_mf6(self) -> np.ndarray:
+        """Copy the GWT concentrations into the buffer in PhreeqcRM units.
+
+        Returns
+        -------
+        np.ndarray
+            The ``(ncomps, nxyz)`` concentration buffer in mol/L.
+        """
+        for conc, entry in zip(self.conc, self.table.entries):
+            if entry.fixed:
+                continue
+            out = conc if self.nodes is None else self._node_buffer
+            np.multiply(entry.x, entry.to_phreeqcrm_factor, out=out)
+            if entry.offset:
+                out -= entry.offset * entry.to_phreeqcrm_factor
+            if self.nodes is not None:
+                conc[self.nodes] = out
+        if self.fixed.size:
+            c = self.phreeqcbmi.get_value_ptr("Concentrations").reshape(
+                self.ncomps, self.nxyz
+            )
+            self.conc[self.fixed] = c[self.fixed]
+        return self.conc
+
+    def to_phreeqcrm(self, refresh: bool = True) -> np.ndarray:
+        """Copy the GWT concentrations into the buffer and set them in PhreeqcRM.
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            If False, the buffer already holds the concentrations of the
+            current step (see ``from_mf6``) and is sent as is. Default is
+            True.
+
+        Returns
+        -------
+        np.ndarray
+            The ``(ncomps, nxyz)`` concentration buffer in mol/L.
+        """
+        if refresh:
+            self.from_mf6()
+        # buffer is C-contiguous so ravel returns a view
+        self.phreeqcbmi.SetConcentrations(self.conc.ravel())
+        return self.conc
+
+    def to_mf6(self, active: np.ndarray = None) -> np.ndarray:
+        """Copy the reacted PhreeqcRM concentrations into the GWT models.
+
+        Parameters
+        ----------
+        active : np.ndarray, optional
+            Cell mask (nxyz) where nonzero cells were sent to reactions.
+            Skipped cells keep their transported concentrations in Modflow 6
+            and their reacted concentrations of the last reaction step in the
+            buffer. If None, all cells are updated.
+
+        Returns
+        -------
+        np.ndarray
+            The ``(ncomps, nxyz)`` reacted concentration buffer in mol/L.
+        """
+        c = self.phreeqcbmi.get_value_ptr("Concentrations").reshape(
+            self.ncomps, self.nxyz
+        )
+        if active is None or not self.has_reacted:
+            active = None
+            np.copyto(self.reacted, c)
+        else:
+            active = np.asarray(active, dtype=bool)
+            np.copyto(self.reacted, c, where=active)
+            if self.nodes is not None:
+                active = active[self.nodes]
+        self.has_reacted = True
+
+        for reacted, entry in zip(self.reacted, self.table.entries):
+            if entry.fixed:
+                continue
+            if self.nodes is not None:
+                reacted = np.take(reacted, self.nodes, out=self._node_buffer)
+            out = entry.x if active is None else self._x_buffer
+            np.multiply(reacted, entry.to_mf6_factor, out=out)
+            if entry.offset:
+                np.add(out, entry.offset, out=out)
+            if active is not None:
+                np.copyto(entry.x, out, where=active)
+        return self.reacted
+
+    def get_saturation(self) -> np.ndarray:
+        """Copy the Modflow 6 saturation into a buffer owned by the transfer.
+
+        The buffer can be modified by the caller without touching Modflow 6
+        memory.
+
+        Returns
+        -------
+        np.ndarray
+            The (nxyz) saturation buffer.
+        """
+        if self.nodes is None:
+            np.copyto(self.sat, self.table.sat)
+        else:
+            self.sat[self.nodes] = self.table.sat
+        return self.sat
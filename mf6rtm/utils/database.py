@@ -0,0 +1,166 @@
+"""
+The database module indexes the names defined in the keyword blocks of a
+PHREEQC database. The blocks are parsed in one pass and the index is kept
+in memory and in a json file of the user cache directory, keyed by the file
+hash, so the database is parsed once per change.
+"""
+import io
+import os
+import json
+import hashlib
+from pathlib import Path
+
+INDEX_VERSION = 1
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "mf6rtm" / "database"
+
+# blocks indexed by default, other blocks are parsed on first use
+BLOCKS = (
+    "SOLUTION_MASTER_SPECIES",
+    "PHASES",
+    "EXCHANGE",
+    "EXCHANGE_MASTER_SPECIES",
+    "EXCHANGE_SPECIES",
+    "SURFACE_MASTER_SPECIES",
+    "SURFACE_SPECIES",
+    "RATES",
+)
+
+# indexes of the databases read by this process, by path
+_indexes = {}
+
+
+def parse_blocks(lines: list, blocks: tuple = BLOCKS) -> dict:
+    """Names defined in keyword blocks of PHREEQC database lines.
+
+    A block starts at any line containing its keyword and ends at the next
+    upper case keyword with an underscore. The name is the first word of the
+    lines starting with an upper case letter, and also the last word in
+    EXCHANGE blocks.
+
+    Parameters
+    ----------
+    lines : list
+        Lines of the database.
+    blocks : tuple, optional
+        Keywords of the blocks. Default is BLOCKS.
+
+    Returns
+    -------
+    dict
+        The names of each block, in the order of the database.
+    """
+    blocks = [block.upper() for block in blocks]
+    names = {block: [] for block in blocks}
+    in_block = dict.fromkeys(blocks, False)
+    for line in lines:
+        stripped = line.strip()
+        keyword = stripped.isupper() and len(stripped) > 1 and "_" in stripped
+        words = line.split() if stripped and not line.startswith("#") else None
+        if words and not words[0][0].isupper():
+            words = None
+        for block in blocks:
+            if block in line:
+                in_block[block] = True
+            elif in_block[block] and keyword:
+                in_block[block] = False
+            elif in_block[block] and words:
+                names[block].append(words[0])
+                if block.startswith("EXCHANGE"):
+                    names[block].append(words[-1])
+    return names
+
+
+class DatabaseIndex(object):
+    """Names defined in the keyword blocks of a PHREEQC database.
+
+    Use ``DatabaseIndex.load`` to get the index of a database file, parsed
+    once and reused while the file does not change.
+
+    Parameters
+    ----------
+    sha256 : str
+        Hash of the database contents.
+    blocks : dict
+        Names of each block, in the order of the database.
+    """
+    def __init__(self, sha256: str, blocks: dict) -> None:
+        self.sha256 = sha256
+        self.blocks = blocks
+        self._sets = {}
+
+    @classmethod
+    def load(cls, database_file: os.PathLike) -> "DatabaseIndex":
+        """Index of a database file.
+
+        The index is reused from memory if the modification time and size
+        of the file did not change, then from the json file of the database
+        hash in CACHE_DIR. Otherwise the database is parsed and the json file
+        written, if the directory is writable.
+
+        Parameters
+        ----------
+        database_file : os.PathLike
+            The path to the PHREEQC database file.
+
+        Returns
+        -------
+        DatabaseIndex
+            The index of the database.
+        """
+        path = Path(database_file).resolve()
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _indexes.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        data = path.read_bytes()
+        sha256 = hashlib.sha256(data).hexdigest()
+        index_file = Path(CACHE_DIR) / f"{sha256[:16]}.json"
+        index = None
+        try:
+            with open(index_file, "r") as fh:
+                stored = json.load(fh)
+            if stored["version"] == INDEX_VERSION and stored["sha256"] == sha256:
+                index = cls(sha256, stored["blocks"])
+        except (OSError, ValueError, KeyError):
+            pass
+        if index is None:
+            lines = io.StringIO(data.decode(errors="replace"), newline=None).readlines()
+            index = cls(sha256, parse_blocks(lines))
+            index.save(index_file)
+        _indexes[path] = (stamp, index)
+        return index
+
+    def save(self, index_file: os.PathLike) -> None:
+        """Write the index to a json file, skipped if it is not writable"""
+        tmp = Path(f"{index_file}.{os.getpid()}.tmp")
+        try:
+            tmp.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w") as fh:
+                json.dump({"version": INDEX_VERSION, "sha256": self.sha256,
+                           "blocks": self.blocks}, fh)
+            os.replace(tmp, index_file)
+        except OSError:
+            if tmp.exists():
+                tmp.unlink()
+
+    def names(self, block: str, database_file: os.PathLike = None) -> list:
+        """Names defined in a block, in the order of the database.
+
+        Blocks not indexed by default are parsed from database_file on
+        first use.
+        """
+        block = block.upper()
+        if block not in self.blocks:
+            assert database_file is not None, f"Block {block} is not indexed"
+            with open(database_file, "r", errors="replace") as db:
+                self.blocks.update(parse_blocks(db.readlines(), (block,)))
+        return self.blocks[block]
+
+    def contains(self, block: str, name: str, database_file: os.PathLike = None) -> bool:
+        """Check if a name is defined in a block"""
+        block = block.upper()
+        if block not in self._sets:
+            self._sets[block] = set(self.names(block, database_file))
+        return name in self._sets[block]
@@ -1,9 +1,12 @@
 import platform
 import os
+import hashlib
 import shutil
 import pandas as pd
 import numpy as np
 
+from mf6rtm.utils.database import DatabaseIndex
+
 # global variables
 endmainblock = """\nPRINT
     -reset false
@@ -374,6 +377,80 @@ def handle_block(current_items, block_generator, i, *args, **kwargs):
     script += block_generator(current_items, i, *args, **kwargs)
     return script
 
+class ScriptWriter(object):
+    """Stream a PHREEQC input script to a text file block by block.
+
+    Blocks are written as they are generated instead of concatenating the
+    whole script in memory. The output is the same as joining the blocks
+    and applying ``add_charge_flag_to_species_in_solution`` or ``strip`` to
+    the joined script.
+
+    Parameters
+    ----------
+    fh : io.TextIOBase
+        The open text file, or any text stream.
+    charge_species : list[str], optional
+        Species flagged with 'charge' in SOLUTION blocks. Default is None,
+        no species are flagged.
+    strip : bool, optional
+        If True, leading and trailing whitespace of the script is not
+        written. Default is False.
+
+    Attributes
+    ----------
+    sha256 : str
+        Hash of the text written so far.
+    """
+    def __init__(self, fh, charge_species=None, strip=False):
+        self.fh = fh
+        self.charge_species = charge_species
+        self.strip = strip
+        self._sha = hashlib.sha256()
+        self._started = False
+        # trailing whitespace is held back until the end of the script is known
+        self._tail = ""
+
+    @property
+    def sha256(self):
+        return self._sha.hexdigest()
+
+    def _emit(self, text):
+        self.fh.write(text)
+        self._sha.update(text.encode())
+
+    def write(self, text):
+        """Write a block or raw text, e.g. a postfix file"""
+        if self.charge_species is not None:
+            # generated blocks end with END, so SOLUTION blocks are not split
+            newline = "\n" if text.endswith("\n") else ""
+            text = add_charge_flag_to_species_in_solution(text, self.charge_species) + newline
+        if self.strip and not self._started:
+            text = text.lstrip()
+        if not text:
+            return
+        self._started = True
+        body = text.rstrip()
+        if body:
+            self._emit(self._tail + body)
+            self._tail = text[len(body):]
+        else:
+            self._tail += text
+
+    def write_block(self, current_items, block_generator, i, *args, **kwargs):
+        """Write a block generated as in ``handle_block``"""
+        self.write(block_generator(current_items, i, *args, **kwargs))
+
+    def close(self):
+        """Write the end of the script, the file is not closed"""
+        tail = self._tail
+        if self.strip:
+            tail = ""
+        elif self.charge_species is not None and tail.endswith("\n"):
+            # the last line ending is dropped by add_charge_flag_to_species_in_solution
+            tail = tail[:-1]
+        self._emit(tail)
+        self._tail = ""
+
 def get_compound_names(database_file, block="SOLUTION_MASTER_SPECIES"):
     """Get a list of compound names from a PHREEQC database file
     Parameters
@@ -386,43 +463,14 @@ def get_compound_names(database_file, block="SOLUTION_MASTER_SPECIES"):
     -------
     compound_names : list
         A list of compound names.
+
+    Notes
+    -----
+    The names are read from the index of the database, see DatabaseIndex,
+    which is parsed once while the database does not change.
     """
-    species_names = []
-    with open(database_file, "r", errors="replace") as db:
-        lines = db.readlines()
-        in_block = False
-        for line in lines:
-            if block.upper() in line:
-                in_block = True
-            elif (
-                in_block
-                and line.strip().isupper()
-                and len(line.strip()) > 1
-                and "_" in line.strip()
-            ):  # Stop when encountering the next keyword
-                in_block = False
-            elif in_block:
-                if (
-                    line.strip()
-                    and not line.startswith("#")
-                    and line.split()[0][0].isupper()
-                ):  # Ignore empty lines and comments
-                    species = line.split()[
-                        0
-                    ]  # The species name is the first word on the line
-                    species_names.append(species)
-                if (
-                    line.strip()
-                    and not line.startswith("#")
-                    and line.split()[0][0].isupper()
-                    and block.startswith("EXCHANGE")
-                ):
-                    # Ignore empty lines and comments
-                    species = line.split()[
-                        -1
-                    ]  # The exchange species are the last word on the line
-                    species_names.append(species)
-    return species_names
+    index = DatabaseIndex.load(database_file)
+    return list(index.names(block, database_file))
 
 def map_species_property_to_grid(data_dict, ic_array, species, property_key):
     """